@@ -6,7 +6,16 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # Subcommand modules, imported lazily by name (auth_manager.SUBCOMMANDS).
+    hiddenimports=[
+        'platform_authorization_refresh.credentials_reader',
+        'platform_authorization_refresh.change_feed',
+        'platform_authorization_refresh.metrics_exporter',
+        'platform_authorization_refresh.planner',
+        'platform_authorization_refresh.refresh_history',
+        'platform_authorization_refresh.sync',
+        'platform_authorization_refresh.work_queue',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
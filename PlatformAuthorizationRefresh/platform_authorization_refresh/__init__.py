@@ -3,9 +3,15 @@ PlatformAuthorizationRefresh
 
 This package handles token refresh flows for supported platforms (YouTube, TikTok),
 including updating credentials files and rendering OAuth success/error screens.
+The *_async functions are the asyncio counterparts for embedding refreshes in a service.
 """
 
+from .async_refresh import (BlockingCallbackServer, CallbackServer, refresh_access_token_async,
+                            refresh_tokens_async, update_credentials_async)
 from .auth_manager import refresh_tokens, update_credentials_json
+from .errors import (AccountNotFoundError, AuthorizationDeniedError, AuthorizationTimeoutError, AuthRefreshError,
+                     CallbackServerError, CredentialsFileNotFoundError, IncompleteTokenDataError, TokenExchangeError,
+                     UnsupportedPlatformError)
 from .tiktok_auth_refresh import refresh_tokens as refresh_tiktok_tokens
 from .youtube_auth_refresh import refresh_tokens as refresh_youtube_tokens
 
@@ -14,4 +20,18 @@ __all__ = [
     "update_credentials_json",
     "refresh_tiktok_tokens",
     "refresh_youtube_tokens",
+    "refresh_tokens_async",
+    "refresh_access_token_async",
+    "update_credentials_async",
+    "CallbackServer",
+    "BlockingCallbackServer",
+    "AuthRefreshError",
+    "UnsupportedPlatformError",
+    "AuthorizationTimeoutError",
+    "AuthorizationDeniedError",
+    "TokenExchangeError",
+    "CallbackServerError",
+    "CredentialsFileNotFoundError",
+    "AccountNotFoundError",
+    "IncompleteTokenDataError",
 ]
\ No newline at end of file
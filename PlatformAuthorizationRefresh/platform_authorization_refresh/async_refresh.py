@@ -0,0 +1,572 @@
+"""
+asyncio API for embedding token refreshes in a service.
+
+refresh_tokens() and update_credentials_json() block: the platform modules keep the flow in
+module globals, serve the callback from a Flask thread and poll for the tokens, and a missing
+credentials file exits the process. The coroutines here keep each flow in its own objects, so
+any number of flows run concurrently on one event loop:
+
+  * CallbackServer is a single asyncio listener on the redirect URI's port. Every consent flow
+    registers its OAuth "state" with it, and each redirect is routed to its flow by that
+    parameter, so concurrent flows share the one registered redirect URI.
+  * refresh_tokens_async() runs a consent flow in the browser.
+  * refresh_access_token_async() renews an access token from a stored refresh token, headless.
+  * update_credentials_async() coalesces the concurrent updates of a credentials file into one
+    read-modify-write of the file.
+
+Timeouts and cancellation are asyncio's: an elapsed flow timeout raises AuthorizationTimeoutError,
+and cancelling the awaiting task unregisters its flow. Failures raise the exceptions of errors.py.
+Token endpoint calls and file writes are blocking (requests, json) and run in the loop's default
+executor, one short call at a time; no thread waits on a user.
+
+Usage:
+    async with CallbackServer() as server:
+        token_data = await refresh_tokens_async("youtube", "accountname@gmail.com", server=server)
+    await update_credentials_async("accountname@gmail.com", "credentials.json", token_data, platform="youtube")
+"""
+
+import asyncio
+import functools
+import html
+import json
+import subprocess
+import threading
+import urllib.parse
+import weakref
+import webbrowser
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+
+from platform_authorization_refresh import change_feed, oauth_clients, tiktok_auth_refresh, youtube_auth_refresh
+from platform_authorization_refresh.auth_manager import apply_token_update, credentials_lock, write_credentials_file
+from platform_authorization_refresh.errors import (AccountNotFoundError, AuthorizationDeniedError,
+                                                   AuthorizationTimeoutError, CallbackServerError,
+                                                   CredentialsFileNotFoundError, IncompleteTokenDataError,
+                                                   TokenExchangeError, UnsupportedPlatformError)
+from platform_authorization_refresh.utils import TikTokHtmls, YouTubeHtmls
+
+# The redirect URIs registered for both platforms (http://localhost:8080/callback).
+CALLBACK_HOST = "127.0.0.1"
+CALLBACK_PORT = 8080
+CALLBACK_PATH = "/callback"
+
+YOUTUBE_AUTH_URL = "https://accounts.google.com/o/oauth2/auth"
+YOUTUBE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+TIKTOK_AUTH_URL = "https://www.tiktok.com/v2/auth/authorize/"
+TIKTOK_TOKEN_URL = "https://open.tiktokapis.com/v2/oauth/token/"
+
+# Seconds allowed for one call to a token endpoint.
+TOKEN_REQUEST_TIMEOUT = 30
+
+# Seconds a callback connection may take to send its request; browsers open idle spare connections.
+REQUEST_READ_TIMEOUT = 10
+
+_STATUS_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+
+def _check_platform(platform: str) -> str:
+    platform = platform.lower()
+    if platform not in ("youtube", "tiktok"):
+        raise UnsupportedPlatformError(f"Unsupported platform: {platform}")
+    return platform
+
+
+def _client_credentials(platform: str, client: Optional[oauth_clients.OAuthClient]) -> Tuple[str, str]:
+    """(client id or TikTok client key, client secret); the platform module constants by default."""
+    if client is not None:
+        return client.client_id, client.client_secret
+    if platform == "tiktok":
+        return tiktok_auth_refresh.CLIENT_KEY, tiktok_auth_refresh.CLIENT_SECRET
+    return youtube_auth_refresh.CLIENT_ID, youtube_auth_refresh.CLIENT_SECRET
+
+
+@dataclass
+class _Flow:
+    """The state of one consent flow, from the authorization URL to the tokens."""
+    platform: str
+    account: Optional[str]
+    client_id: str
+    client_secret: str
+    result: "asyncio.Future[Dict[str, Any]]"
+    state: str = field(default_factory=tiktok_auth_refresh.generate_state_token)
+    code_verifier: str = field(default_factory=tiktok_auth_refresh.generate_code_verifier)
+
+    def authorization_url(self) -> str:
+        if self.platform == "youtube":
+            params = {
+                "client_id": self.client_id,
+                "redirect_uri": youtube_auth_refresh.REDIRECT_URI,
+                "response_type": "code",
+                "scope": youtube_auth_refresh.SCOPE,
+                "access_type": "offline",
+                "prompt": "consent",
+                "state": self.state,
+            }
+            if self.account:
+                params["login_hint"] = self.account
+            return YOUTUBE_AUTH_URL + "?" + urllib.parse.urlencode(params)
+
+        params = {
+            "client_key": self.client_id,
+            "scope": tiktok_auth_refresh.SCOPES,
+            "response_type": "code",
+            "redirect_uri": tiktok_auth_refresh.REDIRECT_URI,
+            "state": self.state,
+            "code_challenge": tiktok_auth_refresh.generate_code_challenge(self.code_verifier),
+            "code_challenge_method": "S256",
+            "disable_auto_auth": 1,  # Bypass session to force consent screen
+        }
+        if self.account:
+            params["prefill_username"] = self.account
+        return TIKTOK_AUTH_URL + "?" + urllib.parse.urlencode(params, safe="")
+
+    async def exchange_code(self, code: str) -> Dict[str, Any]:
+        if self.platform == "youtube":
+            return await _request_tokens(YOUTUBE_TOKEN_URL, {
+                "code": code,
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "redirect_uri": youtube_auth_refresh.REDIRECT_URI,
+                "grant_type": "authorization_code",
+            })
+        return await _request_tokens(TIKTOK_TOKEN_URL, {
+            "client_key": self.client_id,
+            "client_secret": self.client_secret,
+            # URL encode the received code as per TikTok's guidance
+            "code": urllib.parse.quote(code, safe=""),
+            "grant_type": "authorization_code",
+            "redirect_uri": tiktok_auth_refresh.REDIRECT_URI,
+            "code_verifier": self.code_verifier,
+        })
+
+    def success_page(self) -> str:
+        pages = YouTubeHtmls if self.platform == "youtube" else TikTokHtmls
+        account_info = ""
+        if self.account:
+            account_info = (
+                f'<div class="account-info">'
+                f'<span>{html.escape(self.account)}</span>'
+                f'<span class="dot"></span>'
+                f'<span>{"YouTube" if self.platform == "youtube" else "TikTok"}</span>'
+                f'</div>'
+            )
+        return pages.SUCCESS_PAGE_BASE.format(account_info=account_info)
+
+    def error_page(self, message: str, token_error: bool = False) -> str:
+        if self.platform == "tiktok" and token_error:
+            return TikTokHtmls.TOKEN_ERROR_PAGE.format(error_message=html.escape(message))
+        pages = YouTubeHtmls if self.platform == "youtube" else TikTokHtmls
+        return pages.ERROR_PAGE.format(error_message=html.escape(message))
+
+
+def _post_token_request(url: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """POST a token request (blocking; run in the executor) and return the token response."""
+    try:
+        response = requests.post(url, data=data, timeout=TOKEN_REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        raise TokenExchangeError(f"Token request to {url} failed: {e}") from e
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if response.status_code != 200 or not isinstance(body, dict) or not body.get("access_token"):
+        detail = body if body is not None else response.text[:200]
+        raise TokenExchangeError(f"Token request to {url} failed ({response.status_code}): {detail}")
+    return body
+
+
+async def _request_tokens(url: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(_post_token_request, url, data))
+
+
+def _token_data(token_response: Dict[str, Any], refresh_token: Optional[str],
+                client: Optional[oauth_clients.OAuthClient], duration: Optional[float]) -> Dict[str, Any]:
+    """Token data in the shape returned by auth_manager.refresh_tokens()."""
+    token_data: Dict[str, Any] = {
+        "access_token": token_response["access_token"],
+        "refresh_token": token_response.get("refresh_token") or refresh_token,
+    }
+    if not token_data["refresh_token"]:
+        raise TokenExchangeError("The token response carries no refresh token")
+    if duration is not None:
+        token_data["refresh_duration_seconds"] = duration
+    for lifetime_key in ("expires_in", "refresh_expires_in"):
+        if token_response.get(lifetime_key) is not None:
+            token_data[lifetime_key] = token_response[lifetime_key]
+    if client is not None:
+        token_data["oauth_client"] = client.name
+    return token_data
+
+
+class CallbackServer:
+    """
+    Local HTTP listener receiving the OAuth redirects of any number of concurrent flows.
+
+    Usage:
+        async with CallbackServer() as server:
+            results = await asyncio.gather(*(refresh_tokens_async("tiktok", account, server=server)
+                                             for account in accounts))
+    """
+
+    def __init__(self, host: str = CALLBACK_HOST, port: int = CALLBACK_PORT) -> None:
+        """:param port: The port to listen on; 0 picks a free port, available in `port` once started."""
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._flows: Dict[str, _Flow] = {}
+
+    async def start(self) -> None:
+        """
+        Start listening.
+        :raises CallbackServerError: If the port cannot be bound (e.g. another server uses it).
+        """
+        try:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        except OSError as e:
+            raise CallbackServerError(f"Cannot listen for OAuth callbacks on {self.host}:{self.port}: {e}") from e
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "CallbackServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def _register(self, flow: _Flow) -> None:
+        self._flows[flow.state] = flow
+
+    def _unregister(self, flow: _Flow) -> None:
+        self._flows.pop(flow.state, None)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_READ_TIMEOUT)
+            status, page = await self._handle_request(head.split(b"\r\n", 1)[0].decode("latin-1"))
+            body = page.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {_STATUS_REASONS[status]}\r\n"
+                "Content-Type: text/html; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode("ascii") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass  # Idle spare connection, oversized or aborted request.
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line: str) -> Tuple[int, str]:
+        """Route one request line to its flow. Returns (HTTP status, page)."""
+        parts = request_line.split(" ")
+        target = urllib.parse.urlsplit(parts[1]) if len(parts) == 3 and parts[0] == "GET" else None
+        if target is None or target.path != CALLBACK_PATH:
+            return 404, YouTubeHtmls.ERROR_PAGE.format(error_message="Not found.")
+        query = dict(urllib.parse.parse_qsl(target.query))
+        flow = self._flows.get(query.get("state", ""))
+        if flow is None or flow.result.done():
+            # Forged, replayed, or for a flow that timed out or was cancelled.
+            return 400, TikTokHtmls.SECURITY_ERROR_PAGE.format()
+
+        error = query.get("error")
+        if error:
+            flow.result.set_exception(AuthorizationDeniedError(f"Authorization failed: {error}"))
+            return 400, flow.error_page(f"Error during authorization: {error}")
+        code = query.get("code")
+        if not code:
+            flow.result.set_exception(AuthorizationDeniedError("No code provided in callback."))
+            return 400, flow.error_page("No code provided in callback.")
+
+        # Accept a single callback per flow, even if the browser retries during the exchange.
+        self._unregister(flow)
+        try:
+            token_response = await flow.exchange_code(code)
+        except Exception as e:  # TokenExchangeError, or any unexpected failure: the flow must not wait forever.
+            if not flow.result.done():
+                flow.result.set_exception(e)
+            return 400, flow.error_page("Token retrieval failed.", token_error=True)
+        if flow.result.done():
+            return 400, flow.error_page("The authorization request expired.", token_error=True)
+        flow.result.set_result(token_response)
+        return 200, flow.success_page()
+
+
+def _launch_browser(url: str, chrome_path: Optional[str], chrome_profile: Optional[str]) -> None:
+    """Open the URL in the given Chrome (and profile), else in the default browser (blocking)."""
+    if chrome_path:
+        browser_args = [chrome_path]
+        if chrome_profile:
+            browser_args.append(f"--profile-directory={chrome_profile}")
+        browser_args.append(url)
+        try:
+            subprocess.Popen(browser_args)
+            return
+        except OSError:
+            pass  # Fall back to the default browser.
+    webbrowser.open(url)
+
+
+async def refresh_tokens_async(platform: str, account: Optional[str] = None, timeout: float = 120,
+                               chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None,
+                               client: Optional[oauth_clients.OAuthClient] = None,
+                               server: Optional[CallbackServer] = None,
+                               open_url: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Run an OAuth consent flow and return its token data.
+
+    :param platform: "youtube" or "tiktok".
+    :param account: Gmail account (login_hint) or TikTok username (prefill_username).
+    :param timeout: Seconds to wait for the user to authorize (0: no limit).
+    :param chrome_path: Optional path to a specific Chrome executable.
+    :param chrome_profile: Optional Chrome profile directory to use (e.g. "Profile 1").
+    :param client: App registration to use (default: the platform module constants).
+    :param server: Running callback server shared by concurrent flows. Without one, a server is
+                   started for this flow only, so only one such flow can run at a time.
+    :param open_url: Called with the authorization URL instead of opening a browser.
+    :return: Token data as returned by auth_manager.refresh_tokens().
+    :raises AuthorizationTimeoutError: If the user did not authorize in time.
+    :raises AuthorizationDeniedError: If the platform redirected back with an error.
+    :raises TokenExchangeError: If the authorization code could not be exchanged for tokens.
+    :raises CallbackServerError: If no server was given and the callback port is in use.
+    """
+    platform = _check_platform(platform)
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    client_id, client_secret = _client_credentials(platform, client)
+    flow = _Flow(platform=platform, account=account, client_id=client_id, client_secret=client_secret,
+                 result=loop.create_future())
+
+    own_server = server is None
+    if own_server:
+        server = CallbackServer()
+        await server.start()
+    server._register(flow)
+    try:
+        url = flow.authorization_url()
+        if open_url is not None:
+            open_url(url)
+        else:
+            await loop.run_in_executor(None, _launch_browser, url, chrome_path, chrome_profile)
+        try:
+            token_response = await asyncio.wait_for(flow.result, timeout if timeout > 0 else None)
+        except asyncio.TimeoutError:
+            raise AuthorizationTimeoutError(f"Authorization timed out after {timeout} seconds") from None
+    finally:
+        server._unregister(flow)
+        if own_server:
+            await server.close()
+    return _token_data(token_response, None, client, loop.time() - start_time)
+
+
+class BlockingCallbackServer:
+    """
+    A CallbackServer running on its own event loop thread, for blocking code that runs flow after
+    flow in one process (the queue worker). The listener stays up between flows and serves every
+    platform, instead of a Flask server per flow that can no longer bind the port after the first.
+
+    Usage:
+        with BlockingCallbackServer() as server:
+            token_data = server.refresh_tokens("youtube", "accountname@gmail.com", timeout=120)
+    """
+
+    def __init__(self, host: str = CALLBACK_HOST, port: int = CALLBACK_PORT,
+                 open_url: Optional[Callable[[str], None]] = None) -> None:
+        """:param open_url: Passed to every flow (see refresh_tokens_async); called on the loop thread."""
+        self.server = CallbackServer(host, port)
+        self.open_url = open_url
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="oauth-callback-server", daemon=True)
+
+    def start(self) -> None:
+        """:raises CallbackServerError: If the port cannot be bound."""
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+        except BaseException:
+            self._stop_loop()
+            raise
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self.server.close(), self._loop).result()
+            self._stop_loop()
+
+    def _stop_loop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "BlockingCallbackServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def refresh_tokens(self, platform: str, account: Optional[str] = None, timeout: float = 120,
+                       chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None,
+                       client: Optional[oauth_clients.OAuthClient] = None) -> Dict[str, Any]:
+        """Run a consent flow and wait for it; see refresh_tokens_async() for the parameters and errors."""
+        future = asyncio.run_coroutine_threadsafe(
+            refresh_tokens_async(platform, account, timeout=timeout, chrome_path=chrome_path,
+                                 chrome_profile=chrome_profile, client=client, server=self.server,
+                                 open_url=self.open_url),
+            self._loop
+        )
+        try:
+            return future.result()
+        except BaseException:
+            # KeyboardInterrupt while waiting: withdraw the flow from the server.
+            future.cancel()
+            raise
+
+
+async def refresh_access_token_async(platform: str, refresh_token: str,
+                                     client: Optional[oauth_clients.OAuthClient] = None) -> Dict[str, Any]:
+    """
+    Renew an access token from a refresh token, without a browser or callback server.
+
+    :param platform: "youtube" or "tiktok".
+    :param refresh_token: The stored refresh token.
+    :param client: The app registration that issued the refresh token (default: the module constants).
+    :return: Token data as returned by refresh_tokens_async(); "refresh_token" is the rotated token
+             when the platform issued a new one, else the given token.
+    :raises TokenExchangeError: If the platform rejected the refresh token or could not be reached.
+    """
+    platform = _check_platform(platform)
+    client_id, client_secret = _client_credentials(platform, client)
+    if platform == "youtube":
+        token_response = await _request_tokens(YOUTUBE_TOKEN_URL, {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        })
+    else:
+        token_response = await _request_tokens(TIKTOK_TOKEN_URL, {
+            "client_key": client_id,
+            "client_secret": client_secret,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        })
+    return _token_data(token_response, refresh_token, client, None)
+
+
+@dataclass
+class _PendingUpdate:
+    account: str
+    token_data: Dict[str, Any]
+    add_new_account: bool
+    platform: Optional[str]
+    result: "asyncio.Future[str]"
+
+
+@dataclass
+class _CredentialsWriter:
+    """The updates of one credentials file waiting for the next write, and the task writing them."""
+    pending: List[_PendingUpdate] = field(default_factory=list)
+    task: Optional["asyncio.Task[None]"] = None
+
+
+# Credentials writers per event loop and file; a writer is removed once it has nothing left to write.
+_writers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Path, _CredentialsWriter]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _write_updates(creds_file_path: Path, updates: List[_PendingUpdate]) -> List[Union[str, Exception]]:
+    """
+    Apply a batch of updates with one read and one write of the file (blocking; run in the executor),
+    under the credentials lock shared with update_credentials_json and sync.
+    Returns, per update, the account key written or the error that rejected it.
+    """
+    if not creds_file_path.exists():
+        raise CredentialsFileNotFoundError(f"Credentials file not found at {creds_file_path}")
+    with credentials_lock(str(creds_file_path)):
+        with creds_file_path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        outcomes: List[Union[str, Exception]] = []
+        changes: List[Tuple[str, Optional[str], str]] = []
+        for update in updates:
+            try:
+                matched_key, action = apply_token_update(data, update.account, update.token_data,
+                                                         update.add_new_account)
+            except (AccountNotFoundError, IncompleteTokenDataError) as e:
+                outcomes.append(e)
+                continue
+            outcomes.append(matched_key)
+            changes.append((matched_key, update.platform, action))
+
+        if changes:
+            write_credentials_file(creds_file_path, data)
+            for matched_key, platform, action in changes:
+                change_feed.record_change(str(creds_file_path), matched_key, platform, action)
+    return outcomes
+
+
+async def _drain_updates(loop: asyncio.AbstractEventLoop, creds_file_path: Path,
+                         writer: _CredentialsWriter) -> None:
+    try:
+        while True:
+            batch = [update for update in writer.pending if not update.result.done()]
+            writer.pending = []
+            if not batch:
+                return
+            try:
+                outcomes = await loop.run_in_executor(None, _write_updates, creds_file_path, batch)
+            except Exception as e:
+                outcomes = [e] * len(batch)
+            for update, outcome in zip(batch, outcomes):
+                if update.result.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    update.result.set_exception(outcome)
+                else:
+                    update.result.set_result(outcome)
+    finally:
+        del _writers[loop][creds_file_path]
+        for update in writer.pending:
+            if not update.result.done():
+                update.result.cancel()
+
+
+async def update_credentials_async(account: str, creds_file: Union[str, Path], token_data: Dict[str, Any],
+                                   add_new_account: bool = False, platform: Optional[str] = None) -> str:
+    """
+    Update the entry of an account in a credentials file, like update_credentials_json().
+
+    Updates of the same file issued while a write is in progress are applied together by the
+    next write, so a burst of completed flows costs one rewrite of the file, not one per flow.
+    Cancelling the call withdraws the update unless its write has already started.
+
+    :param account: The account to update (case insensitive).
+    :param creds_file: The credentials JSON file.
+    :param token_data: Token data as returned by refresh_tokens_async().
+    :param add_new_account: Add the account if it is not in the file.
+    :param platform: "youtube" or "tiktok", recorded in the change feed.
+    :return: The account key as stored in the file.
+    :raises CredentialsFileNotFoundError: If the credentials file does not exist.
+    :raises AccountNotFoundError: If the account is missing and add_new_account is False.
+    :raises IncompleteTokenDataError: If the token data lacks the access or the refresh token.
+    """
+    loop = asyncio.get_running_loop()
+    creds_file_path = Path(creds_file).absolute()
+    update = _PendingUpdate(account=account, token_data=token_data, add_new_account=add_new_account,
+                            platform=platform, result=loop.create_future())
+    file_writers = _writers.setdefault(loop, {})
+    writer = file_writers.get(creds_file_path)
+    if writer is None:
+        writer = file_writers[creds_file_path] = _CredentialsWriter()
+        writer.task = loop.create_task(_drain_updates(loop, creds_file_path, writer))
+    writer.pending.append(update)
+    return await update.result
@@ -1,16 +1,47 @@
 import argparse
+import importlib
 import json
+import os
 import sys
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
 
-from platform_authorization_refresh.utils import Colors, print_status
+from platform_authorization_refresh import (change_feed, oauth_clients, refresh_history, tiktok_auth_refresh,
+                                            youtube_auth_refresh)
+from platform_authorization_refresh.errors import AccountNotFoundError, IncompleteTokenDataError
+from platform_authorization_refresh.file_lock import exclusive_lock, lock_path_for
+from platform_authorization_refresh.utils import Colors, format_utc_timestamp, print_status
 from platform_authorization_refresh.tiktok_auth_refresh import refresh_tokens as refresh_tiktok_tokens
 from platform_authorization_refresh.youtube_auth_refresh import refresh_tokens as refresh_youtube_tokens
 
 
-def update_credentials_json(account: str, creds_file: str, token_data: Dict[str, str],
-                            add_new_account: bool = False) -> None:
+def credentials_lock(creds_file: str) -> ContextManager[None]:
+    """
+    Exclusive lock on <creds file>.lock. Every writer of a credentials file, in any process or on
+    any host sharing the folder, holds it across its read-modify-write, so no writer overwrites an
+    entry written in between.
+    """
+    return exclusive_lock(lock_path_for(Path(creds_file)))
+
+
+def write_credentials_file(creds_file_path: Path, data: Dict[str, Any]) -> None:
+    """
+    Replace a credentials file atomically (temporary file, flushed to disk, then renamed), so a
+    crash mid-write never leaves a truncated file for the poller to read. Call with the
+    credentials lock held.
+    """
+    temp_path = creds_file_path.with_name(f".{creds_file_path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, creds_file_path)
+
+
+def update_credentials_json(account: str, creds_file: str, token_data: Dict[str, Any],
+                            add_new_account: bool = False, platform: Optional[str] = None) -> None:
     """
     Update the credentials JSON file with the new token data for the given account.
 
@@ -22,10 +53,28 @@ def update_credentials_json(account: str, creds_file: str, token_data: Dict[str,
     {
       "accountname@gmail.com": {
         "accessToken": "ya29....",
-        "refreshToken": "1//03z_..."
+        "refreshToken": "1//03z_...",
+        "updatedOn": "2025-04-20T12:59:05.123456Z",
+        "accessTokenExpiresOn": "2025-04-20T13:59:05.123456Z",
+        "refreshTokenExpiresOn": "2026-04-20T12:59:05.123456Z",
+        "refreshDurationSeconds": 9.4,
+        "oauthClient": "default",
+        "version": 3
       },
       ...
     }
+
+    The timestamp and duration fields are optional: they are written when the token data
+    carries "expires_in", "refresh_expires_in" and "refresh_duration_seconds", and are
+    read by the metrics exporter. "oauthClient" names the app registration that issued the
+    tokens (token data "oauth_client"; see oauth_clients.py). "version" counts the writes of
+    the entry and resolves conflicts when replicating between hosts (see sync.py). Consumers
+    that only know about the tokens ignore them.
+
+    Every write is also appended to the file's change log (see change_feed.py), tagged with
+    `platform`, so consumers can reload only the accounts that changed. The file is replaced
+    atomically and recorded in the log under the credentials lock, so the order of the log
+    records is the order of the writes.
     """
     creds_file_path = Path(creds_file)
     if not creds_file_path.exists():
@@ -34,9 +83,33 @@ def update_credentials_json(account: str, creds_file: str, token_data: Dict[str,
     else:
         print_status(f"Using credentials file: {creds_file_path}", Colors.BLUE)
 
-    with creds_file_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    with credentials_lock(str(creds_file_path)):
+        with creds_file_path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        matched_key, action = apply_token_update(data, account, token_data, add_new_account)
+        if action == "added":
+            print_status(f"Account '{account}' not found. Adding it as a new account.", Colors.BLUE)
 
+        write_credentials_file(creds_file_path, data)
+        change_feed.record_change(str(creds_file_path), matched_key, platform, action)
+    print_status(f"Successfully {action} tokens for '{matched_key}' in {creds_file_path}", Colors.GREEN)
+
+
+def apply_token_update(data: Dict[str, Any], account: str, token_data: Dict[str, Any],
+                       add_new_account: bool = False) -> Tuple[str, str]:
+    """
+    Write token data into the entry of an account in loaded credentials data (in place).
+    Nothing is changed when an error is raised.
+
+    :param data: The credentials file contents.
+    :param account: The account to update; matched case insensitively, added under this key if new.
+    :param token_data: Token data as returned by refresh_tokens().
+    :param add_new_account: Add the account if it is not in the data.
+    :return: (the account key in the data, "added" or "updated").
+    :raises AccountNotFoundError: If the account is missing and add_new_account is False.
+    :raises IncompleteTokenDataError: If the token data lacks the access or the refresh token.
+    """
     # Look for a matching key in a case-insensitive manner.
     matched_key = None
     for existing_account in data:
@@ -44,29 +117,57 @@ def update_credentials_json(account: str, creds_file: str, token_data: Dict[str,
             matched_key = existing_account
             break
 
+    if matched_key is None and not add_new_account:
+        raise AccountNotFoundError(f"Account '{account}' not found in credentials file.")
+
+    if not token_data.get("access_token") or not token_data.get("refresh_token"):
+        raise IncompleteTokenDataError("Token data is incomplete; not updating credentials.")
+
     if matched_key is None:
-        if add_new_account:
-            print_status(f"Account '{account}' not found. Adding it as a new account.", Colors.BLUE)
-            # Use the provided account string as the key for the new entry.
-            matched_key = account
-            data[matched_key] = {}
-            new_account = True
-        else:
-            raise KeyError(f"Account '{account}' not found in credentials file.")
+        # Use the provided account string as the key for the new entry.
+        matched_key = account
+        data[matched_key] = {}
+        action = "added"
     else:
-        new_account = False
+        action = "updated"
 
-    if not token_data.get("access_token") or not token_data.get("refresh_token"):
-        raise ValueError("Token data is incomplete; not updating credentials.")
+    entry = data[matched_key]
+    entry["accessToken"] = token_data["access_token"]
+    entry["refreshToken"] = token_data["refresh_token"]
+    apply_token_timestamps(entry, token_data)
+    if token_data.get("oauth_client"):
+        entry["oauthClient"] = token_data["oauth_client"]
+    entry["version"] = entry.get("version", 0) + 1
+    return matched_key, action
 
-    data[matched_key]["accessToken"] = token_data["access_token"]
-    data[matched_key]["refreshToken"] = token_data["refresh_token"]
 
-    with creds_file_path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def apply_token_timestamps(entry: Dict[str, Any], token_data: Dict[str, Any],
+                           now: Optional[datetime] = None) -> None:
+    """
+    Record when the tokens in a credentials entry were issued and when they expire.
+
+    Expiry fields without a matching lifetime in token_data are removed, so a stale
+    expiry from a previous token is never reported for the new one.
+
+    :param entry: The credentials entry to update in place.
+    :param token_data: Token data as returned by refresh_tokens().
+    :param now: The issue time (defaults to the current UTC time).
+    """
+    now = now or datetime.now(timezone.utc)
+    entry["updatedOn"] = format_utc_timestamp(now)
+
+    for lifetime_key, field in (("expires_in", "accessTokenExpiresOn"),
+                                ("refresh_expires_in", "refreshTokenExpiresOn")):
+        lifetime = token_data.get(lifetime_key)
+        try:
+            entry[field] = format_utc_timestamp(now + timedelta(seconds=int(lifetime)))
+        except (TypeError, ValueError):
+            entry.pop(field, None)
+
+    duration = token_data.get("refresh_duration_seconds")
+    if duration is not None:
+        entry["refreshDurationSeconds"] = round(float(duration), 3)
 
-    action = "added" if new_account else "updated"
-    print_status(f"Successfully {action} tokens for '{matched_key}' in {creds_file_path}", Colors.GREEN)
 
 def find_profile_by_gmail(email: str) -> str:
     """
@@ -91,31 +192,78 @@ def find_profile_by_gmail(email: str) -> str:
 
 
 def refresh_tokens(platform: str, account: str, timeout: int = 120,
-                   chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None) -> dict[str, str]:
+                   chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None,
+                   client: Optional[oauth_clients.OAuthClient] = None) -> Dict[str, Any]:
     """
     Refresh tokens for a given platform and update the credentials file.
-    Passes along chrome_path and chrome_profile to the platform-specific refresh functions.
+    Passes along chrome_path and chrome_profile to the platform-specific refresh functions,
+    and routes the flow through the given app registration (default: the module constants).
+
+    Besides the tokens, the result carries the token lifetimes reported by the platform
+    ("expires_in", "refresh_expires_in") when available, and the flow duration in
+    "refresh_duration_seconds", and the registration name in "oauth_client" when one was given.
     """
+    start_time = time.monotonic()
+    client_id = client.client_id if client else None
+    client_secret = client.client_secret if client else None
     if platform == "tiktok":
         access_token, refresh_token = refresh_tiktok_tokens(
-            timeout=timeout, account=account, chrome_path=chrome_path, chrome_profile=chrome_profile
+            timeout=timeout, account=account, chrome_path=chrome_path, chrome_profile=chrome_profile,
+            client_key=client_id, client_secret=client_secret
         )
+        platform_tokens = tiktok_auth_refresh.tokens
     elif platform == "youtube":
         access_token, refresh_token = refresh_youtube_tokens(
-            timeout=timeout, account=account, chrome_path=chrome_path, chrome_profile=chrome_profile
+            timeout=timeout, account=account, chrome_path=chrome_path, chrome_profile=chrome_profile,
+            client_id=client_id, client_secret=client_secret
         )
+        platform_tokens = youtube_auth_refresh.tokens
     else:
         raise ValueError(f"Unsupported platform: {platform}")
 
-    return {
+    token_data: Dict[str, Any] = {
         "access_token": access_token,
-        "refresh_token": refresh_token
+        "refresh_token": refresh_token,
+        "refresh_duration_seconds": time.monotonic() - start_time
     }
+    for lifetime_key in ("expires_in", "refresh_expires_in"):
+        if platform_tokens.get(lifetime_key) is not None:
+            token_data[lifetime_key] = platform_tokens[lifetime_key]
+    if client is not None:
+        token_data["oauth_client"] = client.name
+    return token_data
+
+
+# Subcommands dispatched by main() before the default refresh arguments are parsed, as
+# "module:function" in this package. Each handler receives the remaining command-line arguments.
+# The modules are imported only when their subcommand runs, so a refresh does not load them
+# (planner alone pulls in numpy). Keep PlatformAuthorizationRefresh.spec's hiddenimports in sync.
+SUBCOMMANDS: Dict[str, str] = {
+    "accounts": "credentials_reader:main",
+    "changes": "change_feed:main",
+    "export-metrics": "metrics_exporter:main",
+    "plan": "planner:main",
+    "stats": "refresh_history:main",
+    "sync": "sync:main",
+    "queue": "work_queue:main",
+}
+
+
+def resolve_subcommand(name: str) -> Callable[[List[str]], None]:
+    """Import the module of a SUBCOMMANDS entry and return its handler."""
+    module_name, function_name = SUBCOMMANDS[name].split(":")
+    module = importlib.import_module(f"{__package__}.{module_name}")
+    return getattr(module, function_name)
 
 
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        resolve_subcommand(sys.argv[1])(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
-        description="Refresh OAuth tokens for a specified platform and update the credentials JSON.",
+        description="Refresh OAuth tokens for a specified platform and update the credentials JSON. "
+                    f"Other modes: {', '.join(SUBCOMMANDS)} (pass --help after the mode name for its options).",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     parser.add_argument("--platform", required=True, choices=["tiktok", "youtube"], type=str.lower,
@@ -128,32 +276,94 @@ def main() -> None:
     parser.add_argument("--timeout", type=int, default=120, help="Timeout (in seconds) for the OAuth flow")
     parser.add_argument("--add_new_account", action="store_true", default=False,
                         help="If set, adds the account to the credentials JSON if it is not found (default: False)")
+    parser.add_argument("--history_file", type=Path, default=None,
+                        help="Refresh history database to append this attempt to "
+                             f"(default: {refresh_history.HISTORY_FILE_NAME} next to the credentials file)")
+    parser.add_argument("--oauth_clients_file", type=Path, default=None,
+                        help="JSON file with the pool of OAuth app registrations (default: the built-in registration)")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="DIR",
+                        help="Profile the run and write .pstats and collapsed-stack files to DIR "
+                             "(default: the Logs folder next to the executable)")
     args = parser.parse_args()
 
+    profiler = None
+    if args.profile is not None:
+        # Imported only when profiling, so normal runs do not load or pay for it.
+        from platform_authorization_refresh import profiling
+        profile_dir = Path(args.profile) if args.profile else profiling.default_profile_dir()
+        profiler = profiling.RunProfiler(profiling.profile_output_base(profile_dir,
+                                                                       f"refresh_profile_{args.platform}"))
+        profiler.start()
+
+    timer = refresh_history.PhaseTimer(listener=profiler.set_phase if profiler is not None else None)
+    error: Optional[BaseException] = None
     try:
         chrome_profile = None
         if args.chrome:
-            # Deduce the Chrome profile folder based on the Gmail account.
-            chrome_profile = find_profile_by_gmail(args.account)
+            with timer.phase("chrome_profile"):
+                # Deduce the Chrome profile folder based on the Gmail account.
+                chrome_profile = find_profile_by_gmail(args.account)
             print_status(f"Inferred Chrome profile: {chrome_profile}", Colors.BLUE)
 
-        token_data = refresh_tokens(
-            platform=args.platform,
-            account=args.account,
-            timeout=args.timeout,
-            chrome_path=args.chrome,
-            chrome_profile=chrome_profile
-        )
+        with timer.phase("oauth_client"):
+            pool = oauth_clients.load_pool(args.oauth_clients_file)
+            client = pool.resolve(args.platform, args.account, args.creds_file_path)
+            pool.acquire(args.platform, client)
+        print_status(f"Using OAuth client registration: {client.name}", Colors.BLUE)
 
-        update_credentials_json(
-            account=args.account,
-            creds_file=args.creds_file_path,
-            token_data=token_data,
-            add_new_account=args.add_new_account
-        )
+        with timer.phase("authorize"):
+            token_data = refresh_tokens(
+                platform=args.platform,
+                account=args.account,
+                timeout=args.timeout,
+                chrome_path=args.chrome,
+                chrome_profile=chrome_profile,
+                client=client
+            )
+
+        with timer.phase("persist"):
+            update_credentials_json(
+                account=args.account,
+                creds_file=args.creds_file_path,
+                token_data=token_data,
+                add_new_account=args.add_new_account,
+                platform=args.platform
+            )
+    except (Exception, KeyboardInterrupt) as e:
+        error = e
+    finally:
+        record_refresh_attempt(args, timer, error)
+        if profiler is not None:
+            pstats_path, collapsed_path = profiler.stop()
+            print_status(f"Profile written to {pstats_path} and {collapsed_path}", Colors.BLUE)
+
+    if error is not None:
+        print_status(f"Error: {str(error)}", Colors.RED)
+        sys.exit(130 if isinstance(error, KeyboardInterrupt) else 1)
+
+
+def record_refresh_attempt(args: argparse.Namespace, timer: "refresh_history.PhaseTimer",
+                           error: Optional[BaseException]) -> None:
+    """
+    Append the outcome of a refresh run to the history database.
+    A failure to record history is reported but never fails the refresh itself.
+    """
+    history_file = args.history_file or refresh_history.default_history_file(args.creds_file_path)
+    outcome, error_class = refresh_history.classify_outcome(error)
+    attempt = refresh_history.RefreshAttempt(
+        platform=args.platform,
+        account=args.account,
+        mode="add" if args.add_new_account else "refresh",
+        started_at=timer.started_at,
+        duration_seconds=timer.elapsed,
+        phases=timer.phases,
+        outcome=outcome,
+        error_class=error_class
+    )
+    try:
+        refresh_history.record_attempt(history_file, attempt)
     except Exception as e:
-        print_status(f"Error: {str(e)}", Colors.RED)
-        sys.exit(1)
+        print_status(f"Warning: could not record refresh history in {history_file}: {e}", Colors.YELLOW)
 
 
 if __name__ == "__main__":
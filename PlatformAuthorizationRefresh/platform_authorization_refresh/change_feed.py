@@ -0,0 +1,217 @@
+"""
+Change feed for the credentials files.
+
+update_credentials_json() rewrites the whole credentials file, so a consumer (e.g. the C#
+credentials managers populating their caches) cannot tell which accounts changed without
+re-reading and diffing everything. Every write therefore also appends one record to a sidecar
+log next to the credentials file (<creds file>.changes), one JSON object per line:
+
+    {"seq": 42, "account": "accountname@gmail.com", "platform": "youtube",
+     "action": "updated", "changedOn": "2025-04-20T12:59:05.123456Z"}
+
+"seq" increases by one per record and is never reused. A consumer remembers the highest
+sequence it applied and asks for the changes since it; the records are ordered by seq, so the
+reader binary-searches the file for the first newer record and only reads what changed.
+
+The log is compacted every COMPACT_EVERY records: only the latest record of each account is
+kept (with its original seq). A consumer at any sequence N still sees every account changed
+after N, because that account's latest record is newer than N.
+
+Writers may be several processes (the CLI, the GUI, sync pulls, workers). Appending and
+compacting both hold an exclusive lock on <log>.lock (see file_lock.py), so two writers never
+read the same last sequence, and a compaction never replaces the file under an append.
+Readers take no lock: appends are whole lines and compaction swaps the file atomically.
+
+Usage:
+    PlatformAuthorizationRefresh.exe changes --creds_file_path <path> [--since N] [--compact]
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from platform_authorization_refresh.file_lock import exclusive_lock, lock_path_for
+from platform_authorization_refresh.utils import Colors, format_utc_timestamp, print_status
+
+CHANGE_LOG_SUFFIX = ".changes"
+
+# Compact the log whenever the sequence reaches a multiple of this.
+COMPACT_EVERY = 1000
+
+# Bytes read from the end of the log to find the last sequence number.
+_TAIL_CHUNK = 4096
+
+
+@dataclass
+class Change:
+    """One change log record."""
+    seq: int
+    account: str
+    platform: Optional[str]
+    action: str
+    changedOn: str
+
+
+def change_log_path(creds_file: str) -> Path:
+    """The change log lives next to the credentials file it describes."""
+    creds_file_path = Path(creds_file)
+    return creds_file_path.with_name(creds_file_path.name + CHANGE_LOG_SUFFIX)
+
+
+def _parse_line(line: bytes) -> Optional[Change]:
+    """Parse one log line; a torn (partially written) line yields None."""
+    try:
+        return Change(**json.loads(line))
+    except (ValueError, TypeError):
+        return None
+
+
+def _last_change(f: BinaryIO) -> Optional[Change]:
+    """Read the last complete record by scanning backwards from the end of the file."""
+    end = f.seek(0, os.SEEK_END)
+    position = end
+    buffer = b""
+    while position > 0:
+        step = min(_TAIL_CHUNK, position)
+        position -= step
+        f.seek(position)
+        buffer = f.read(step) + buffer
+        lines = buffer.splitlines()
+        # The first line of the buffer may be cut; only trust it when we reached the file start.
+        for line in reversed(lines if position == 0 else lines[1:]):
+            change = _parse_line(line)
+            if change is not None:
+                return change
+    return None
+
+
+def latest_sequence(creds_file: str) -> int:
+    """The sequence number of the latest change (0 when nothing was recorded yet)."""
+    log_path = change_log_path(creds_file)
+    if not log_path.is_file():
+        return 0
+    with log_path.open("rb") as f:
+        change = _last_change(f)
+    return change.seq if change else 0
+
+
+def record_change(creds_file: str, account: str, platform: Optional[str], action: str) -> Change:
+    """
+    Append a change record for one account and compact the log periodically.
+
+    :param creds_file: The credentials file that was written.
+    :param account: The account key as stored in the credentials file.
+    :param platform: "youtube" or "tiktok" (None if the writer does not know).
+    :param action: "added", "updated", or "replicated" (written by a sync pull, see sync.py).
+    """
+    log_path = change_log_path(creds_file)
+    with exclusive_lock(lock_path_for(log_path)):
+        with log_path.open("a+b") as f:
+            last = _last_change(f)
+            change = Change(seq=(last.seq if last else 0) + 1, account=account, platform=platform,
+                            action=action, changedOn=format_utc_timestamp())
+            f.seek(0, os.SEEK_END)
+            f.write(json.dumps(asdict(change), separators=(",", ":")).encode("utf-8") + b"\n")
+
+    # Compacted after releasing the append lock; compact() takes it again for the whole rewrite.
+    if change.seq % COMPACT_EVERY == 0:
+        try:
+            compact(creds_file)
+        except OSError as e:
+            # A reader holding the file open (Windows) blocks the rename; retried at the next multiple.
+            print_status(f"Warning: could not compact change log {log_path}: {e}", Colors.YELLOW)
+    return change
+
+
+def _seek_to_sequence(f: BinaryIO, since: int) -> None:
+    """
+    Position the file at the first record with seq > since.
+    Binary search over byte offsets: each probe skips to the next line start and reads its seq.
+    `low` is always a line start with only older records before it; the record at `low` itself
+    may still be old, so callers filter on seq as well.
+    """
+    low, high = 0, f.seek(0, os.SEEK_END)
+    while low < high:
+        middle = (low + high) // 2
+        f.seek(middle)
+        if middle:
+            f.readline()
+        line_start = f.tell()
+        change = _parse_line(f.readline()) if line_start < high else None
+        if change is not None and change.seq <= since:
+            low = f.tell()
+        else:
+            high = middle
+    f.seek(low)
+
+
+def changes_since(creds_file: str, since: int = 0) -> Iterator[Change]:
+    """
+    Stream the changes with a sequence number greater than `since`, oldest first.
+    An account may appear more than once; the last record wins.
+    """
+    log_path = change_log_path(creds_file)
+    if not log_path.is_file():
+        return
+    with log_path.open("rb") as f:
+        _seek_to_sequence(f, since)
+        for line in f:
+            change = _parse_line(line)
+            if change is not None and change.seq > since:
+                yield change
+
+
+def changed_accounts_since(creds_file: str, since: int = 0) -> Dict[str, Change]:
+    """The latest change per account (key lowercased) since the given sequence number."""
+    latest: Dict[str, Change] = {}
+    for change in changes_since(creds_file, since):
+        latest[change.account.lower()] = change
+    return latest
+
+
+def compact(creds_file: str) -> int:
+    """
+    Rewrite the log keeping only the latest record of each account, in sequence order.
+    The file is replaced atomically, under the append lock so no record appended meanwhile is
+    lost. Returns the number of records kept.
+    """
+    log_path = change_log_path(creds_file)
+    with exclusive_lock(lock_path_for(log_path)):
+        if not log_path.is_file():
+            return 0
+        kept: List[Change] = sorted(changed_accounts_since(creds_file).values(), key=lambda change: change.seq)
+        temp_path = log_path.with_name(f".{log_path.name}.{os.getpid()}.tmp")
+        with temp_path.open("wb") as f:
+            for change in kept:
+                f.write(json.dumps(asdict(change), separators=(",", ":")).encode("utf-8") + b"\n")
+        os.replace(temp_path, log_path)
+        return len(kept)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="changes",
+        description="Print the credentials changes recorded since a sequence number, one JSON object per line.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--creds_file_path", required=True, help="Credentials JSON file whose change log to read")
+    parser.add_argument("--since", type=int, default=0,
+                        help="Only print changes with a greater sequence number (the last one the consumer applied)")
+    parser.add_argument("--compact", action="store_true", default=False,
+                        help="Compact the change log instead of printing it")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.compact:
+            kept = compact(args.creds_file_path)
+            print_status(f"Change log compacted to {kept} records.", Colors.GREEN)
+            return
+        for change in changes_since(args.creds_file_path, args.since):
+            print(json.dumps(asdict(change), separators=(",", ":")))
+    except Exception as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
@@ -0,0 +1,188 @@
+"""
+Streaming reader for the credentials files.
+
+json.load() materializes the whole fleet to touch a single account. This reader walks the
+top-level object one account entry at a time with a bounded read buffer, so:
+  * a single-account lookup stops at the matching entry,
+  * a full scan holds one entry (plus one read chunk) in memory, whatever the file size.
+
+It is meant for read-only paths (listing, expiry sweeps, metrics export); writers still
+load and rewrite the whole file (see auth_manager.update_credentials_json).
+
+Usage:
+    PlatformAuthorizationRefresh.exe accounts --creds_file_path <path> [--account <name>] [--expired_only]
+"""
+
+import argparse
+import json
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from platform_authorization_refresh.utils import Colors, parse_utc_timestamp, print_status
+
+READ_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    """A sliding window over a text file; consumed text is dropped as the cursor advances."""
+
+    def __init__(self, f: TextIO, chunk_size: int) -> None:
+        self.f = f
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read one more chunk. Returns False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += chunk
+        return True
+
+    def skip_whitespace(self) -> str:
+        """Advance past whitespace and return the next character ("" at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def decode_value(self) -> Any:
+        """
+        Decode the JSON value at the cursor, reading more data while it is incomplete.
+        A value is only accepted once the character after it is buffered, so a number cut at
+        a chunk boundary is never decoded short.
+        """
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            if end < len(self.text) or self.eof:
+                self.pos = end
+                return value
+            self.fill()
+
+
+def _iter_entries(f: TextIO, chunk_size: int) -> Iterator[Tuple[str, Any]]:
+    buffer = _Buffer(f, chunk_size)
+    if buffer.skip_whitespace() != "{":
+        raise ValueError("Credentials file does not contain a JSON object")
+    buffer.pos += 1
+    if buffer.skip_whitespace() == "}":
+        return
+    while True:
+        if buffer.skip_whitespace() != '"':
+            raise ValueError(f"Expected an account name at offset {buffer.pos} of the read window")
+        account = buffer.decode_value()
+        if buffer.skip_whitespace() != ":":
+            raise ValueError(f"Expected ':' after account '{account}'")
+        buffer.pos += 1
+        buffer.skip_whitespace()
+        yield account, buffer.decode_value()
+        separator = buffer.skip_whitespace()
+        buffer.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' after account '{account}'")
+
+
+def iter_credentials(creds_file: Path, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (account, entry) pairs of a credentials file in file order, reading it incrementally.
+
+    :raises ValueError: If the file is not a JSON object (e.g. caught mid-write); entries before
+                        the error have already been yielded.
+    """
+    with Path(creds_file).open("r", encoding="utf-8-sig") as f:
+        yield from _iter_entries(f, chunk_size)
+
+
+def find_credentials(creds_file: Path, account: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Find an account (case insensitive), stopping at the first match.
+
+    :return: (stored account key, entry), or None if the account is not in the file.
+    """
+    account = account.lower()
+    for existing_account, entry in iter_credentials(creds_file):
+        if existing_account.lower() == account:
+            return existing_account, entry
+    return None
+
+
+def describe_entry(account: str, entry: Dict[str, Any], now: datetime) -> Tuple[str, bool]:
+    """A one-line summary of an entry and whether it needs re-authorization (expired refresh token or missing tokens)."""
+    updated_on = parse_utc_timestamp(entry.get("updatedOn"))
+    expires_on = parse_utc_timestamp(entry.get("refreshTokenExpiresOn"))
+    expired = expires_on is not None and expires_on <= now
+    if expires_on is None:
+        validity = "refresh token expiry unknown"
+    elif expired:
+        validity = f"refresh token expired {expires_on:%Y-%m-%d %H:%M} UTC"
+    else:
+        validity = f"refresh token valid until {expires_on:%Y-%m-%d %H:%M} UTC"
+    updated = f"updated {updated_on:%Y-%m-%d %H:%M} UTC" if updated_on else "never tracked"
+    missing = [field for field in ("accessToken", "refreshToken") if not entry.get(field)]
+    if missing:
+        validity += f", missing {' and '.join(missing)}"
+    return f"{account}: {updated}, {validity}", expired or bool(missing)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="accounts",
+        description="List the accounts of a credentials file and check their tokens without loading it whole.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--creds_file_path", required=True, type=Path, help="Credentials JSON file path")
+    parser.add_argument("--account", default=None,
+                        help="Only show this account (case insensitive); exits with 1 if it is not found")
+    parser.add_argument("--expired_only", action="store_true", default=False,
+                        help="Only list accounts with an expired refresh token or missing tokens")
+    args = parser.parse_args(argv)
+
+    if not args.creds_file_path.is_file():
+        print_status(f"Error: Credentials file not found at {args.creds_file_path}", Colors.RED)
+        sys.exit(1)
+
+    now = datetime.now(timezone.utc)
+    try:
+        if args.account is not None:
+            found = find_credentials(args.creds_file_path, args.account)
+            if found is None:
+                print_status(f"Account '{args.account}' not found in {args.creds_file_path}", Colors.RED)
+                sys.exit(1)
+            line, needs_attention = describe_entry(*found, now)
+            print(f"{Colors.RED if needs_attention else Colors.GREEN}{line}{Colors.ENDC}")
+            return
+
+        total = flagged = 0
+        for account, entry in iter_credentials(args.creds_file_path):
+            total += 1
+            line, needs_attention = describe_entry(account, entry, now)
+            flagged += needs_attention
+            if needs_attention or not args.expired_only:
+                print(f"{Colors.RED if needs_attention else Colors.GREEN}{line}{Colors.ENDC}")
+    except (OSError, ValueError) as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
+    print_status(f"{total} account(s), {flagged} needing re-authorization.", Colors.BLUE)
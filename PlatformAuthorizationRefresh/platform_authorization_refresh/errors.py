@@ -0,0 +1,42 @@
+"""
+Exceptions raised by the package's public API.
+
+Each one also derives from the built-in exception the blocking functions raised before, so
+existing `except KeyError` / `except ValueError` / `except TimeoutError` handlers keep working.
+"""
+
+
+class AuthRefreshError(Exception):
+    """Base class of the errors raised by platform_authorization_refresh."""
+
+
+class UnsupportedPlatformError(AuthRefreshError, ValueError):
+    """The platform is neither "youtube" nor "tiktok"."""
+
+
+class AuthorizationTimeoutError(AuthRefreshError, TimeoutError):
+    """The user did not complete the consent flow in time."""
+
+
+class AuthorizationDeniedError(AuthRefreshError):
+    """The platform redirected back with an error (e.g. the user denied consent)."""
+
+
+class TokenExchangeError(AuthRefreshError):
+    """The platform's token endpoint failed or returned no tokens."""
+
+
+class CallbackServerError(AuthRefreshError, OSError):
+    """The local OAuth callback server could not be started (e.g. the port is in use)."""
+
+
+class CredentialsFileNotFoundError(AuthRefreshError, FileNotFoundError):
+    """The credentials file to update does not exist."""
+
+
+class AccountNotFoundError(AuthRefreshError, KeyError):
+    """The account is not in the credentials file and adding it was not requested."""
+
+
+class IncompleteTokenDataError(AuthRefreshError, ValueError):
+    """The token data lacks the access or the refresh token."""
@@ -0,0 +1,69 @@
+"""
+Exclusive inter-process lock held on a lock file (fcntl.flock on POSIX, msvcrt.locking on Windows).
+
+Used where several processes - possibly on several hosts sharing a folder - read and rewrite the
+same small file: the credentials files, the change feed next to them and the shared OAuth rate
+budgets. The lock file itself stays empty and is never deleted, so every process locks the same
+file. Each acquisition opens its own handle, so threads of one process exclude each other as
+well; the lock is not re-entrant.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(f: BinaryIO) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f: BinaryIO) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f: BinaryIO) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f: BinaryIO) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+LOCK_SUFFIX = ".lock"
+
+# Seconds between attempts while another process holds the lock.
+_RETRY_INTERVAL = 0.01
+
+
+def lock_path_for(path: Path) -> Path:
+    """The lock file guarding a file: <file>.lock next to it."""
+    return path.with_name(path.name + LOCK_SUFFIX)
+
+
+@contextmanager
+def exclusive_lock(lock_path: Path, timeout: float = 30.0) -> Iterator[None]:
+    """
+    Hold an exclusive lock on lock_path (created if missing) for the duration of the block.
+
+    :param timeout: Seconds to wait for another holder to release the lock.
+    :raises TimeoutError: If the lock could not be taken in time.
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    with lock_path.open("a+b") as f:
+        while True:
+            try:
+                _try_lock(f)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out after {timeout} seconds waiting for lock {lock_path}")
+                time.sleep(_RETRY_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(f)
@@ -7,19 +7,22 @@ the executable and stream its output in real time. ANSI escape sequences from th
 displayed in the GUI with color styling; the log file output will be clean (ANSI codes stripped).
 
 Usage:
-    python gui_add_account.exe --settings <path_to_appsettings.json> [--log <path_to_log_file>]
+    python gui_add_account.exe --settings <path_to_appsettings.json> [--log <path_to_log_file>] [--profile]
 
 If the --settings argument is not provided, the script defaults to "appsettings.json" in the same folder.
 If the --log argument is not provided, a "Logs" folder is created and a log file named
 "presence_add_account_log_<timestamp>.txt" is used.
+With --profile, the session (and every refresh it launches) is profiled; the .pstats and
+collapsed-stack files are written next to the log file.
 
 Author: Your Name
 Date: YYYY-MM-DD
 """
 
 import argparse
+import bisect
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, messagebox, font as tkfont
 import subprocess
 import sys
 import json
@@ -27,9 +30,15 @@ import threading
 import queue
 import time
 import re
+import os
+from collections import Counter
+from datetime import datetime, timezone
 from pathlib import Path
 import logging
-from typing import Optional, List, Tuple, Any
+from typing import Optional, List, Tuple, Any, Dict, Set, NamedTuple, Callable, Sequence
+
+# utils.py sits next to this script and only uses the standard library.
+from utils import parse_utc_timestamp
 
 ###############################################################################
 # LOG FILE SETUP AND CUSTOM FORMATTER (STRIPS ANSI CODES FOR THE FILE OUTPUT)
@@ -59,6 +68,8 @@ parser.add_argument("appsettings", type=Path,
                     help="Path to the appsettings.json file. This argument is required.")
 parser.add_argument("--log", dest="log_file", type=Path, default=None,
                     help="Optional log file path. If not provided, a 'Logs' folder with a timestamped filename is used.")
+parser.add_argument("--profile", action="store_true", default=False,
+                    help="Profile the session and write .pstats and collapsed-stack files next to the log file.")
 
 args = parser.parse_args()
 log_file_path = get_log_file_path(args.log_file)
@@ -89,11 +100,429 @@ COLOR_ERROR = "#EA4335"
 COLOR_PRESENCE = "#9370DB"
 COLOR_PRESENCE_DARK = "#7851A9"
 
+# How often (ms) the credentials files are checked for changes to re-index.
+ACCOUNT_DIRECTORY_POLL_MS = 5000
+ACCOUNT_SUGGESTIONS_LIMIT = 8
+
+###############################################################################
+# ACCOUNT DIRECTORY (PREFIX INDEX FOR AUTOCOMPLETE AND "DID YOU MEAN")
+###############################################################################
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between a and b, giving up (returning max_distance + 1)
+    as soon as the distance is known to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AccountDirectory:
+    """
+    In-memory index of the accounts in all credentials files, for autocomplete and typo detection.
+
+    Account keys are kept lowercased in a sorted list, so a prefix lookup is a bisect plus a short
+    scan, and in a trigram index used to find near-duplicates of a new account. The index is
+    (re)built on a background thread; only files whose size or modification time changed are
+    re-read, and only the accounts added to or removed from them are applied to the index.
+    """
+
+    # Trigrams shared by more than this fraction of the accounts ("gma", "com", ...) are not
+    # selective and are skipped when gathering typo candidates.
+    COMMON_TRIGRAM_RATIO = 0.2
+
+    def __init__(self, creds_files: Dict[str, Path]) -> None:
+        self.creds_files = creds_files
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.platform_accounts: Dict[str, Set[str]] = {platform: set() for platform in creds_files}
+        self.display_names: Dict[str, str] = {}
+        self.sorted_keys: List[str] = []
+        self.trigram_index: Dict[str, Set[str]] = {}
+        self.file_signatures: Dict[str, Optional[Tuple[float, int]]] = {platform: None for platform in creds_files}
+
+    def refresh_async(self) -> None:
+        """Re-index changed files on a background thread (no-op if a refresh is already running)."""
+        if self.refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def refresh(self) -> None:
+        """Re-read the credentials files that changed since the last refresh and update the index."""
+        if not self.refresh_lock.acquire(blocking=False):
+            return
+        try:
+            for platform, path in self.creds_files.items():
+                try:
+                    stat = path.stat()
+                    signature: Optional[Tuple[float, int]] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    signature = None
+                if signature == self.file_signatures[platform]:
+                    continue
+                accounts: Dict[str, str] = {}
+                if signature is not None:
+                    try:
+                        with path.open("r", encoding="utf-8") as f:
+                            accounts = {key.lower(): key for key in json.load(f)}
+                    except (OSError, ValueError) as e:
+                        # Possibly caught mid-write; keep the current index and retry on the next poll.
+                        logger.debug("Account directory: could not read %s: %s", path, e)
+                        continue
+                self.apply_accounts(platform, accounts)
+                self.file_signatures[platform] = signature
+                logger.debug("Account directory: indexed %d %s accounts.", len(accounts), platform)
+        finally:
+            self.ready.set()
+            self.refresh_lock.release()
+
+    def apply_accounts(self, platform: str, accounts: Dict[str, str]) -> None:
+        """
+        Replace the accounts of one platform, touching only the keys that were added or removed.
+        Only the refresh thread calls this, so the index can be read here without the lock; the
+        lock is taken for the mutations (small changes) or for swapping in a rebuilt index (bulk).
+        """
+        current = self.platform_accounts[platform]
+        added = accounts.keys() - current
+        removed = current - accounts.keys()
+        if len(added) + len(removed) > 1000:
+            self.rebuild_index(platform, accounts)
+            return
+        with self.lock:
+            current.difference_update(removed)
+            current.update(added)
+            for key in added:
+                if key in self.display_names:
+                    continue
+                self.display_names[key] = accounts[key]
+                bisect.insort(self.sorted_keys, key)
+                for gram in trigrams(key):
+                    self.trigram_index.setdefault(gram, set()).add(key)
+            for key in removed:
+                if any(key in keys for keys in self.platform_accounts.values()):
+                    continue
+                del self.display_names[key]
+                del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+                for gram in trigrams(key):
+                    self.trigram_index[gram].discard(key)
+
+    def rebuild_index(self, platform: str, accounts: Dict[str, str]) -> None:
+        """Build a complete new index off the lock (e.g. the initial load) and swap it in."""
+        platform_accounts = {other: set(keys) for other, keys in self.platform_accounts.items()}
+        platform_accounts[platform] = set(accounts)
+        display_names = dict(accounts)
+        for other, keys in platform_accounts.items():
+            if other != platform:
+                for key in keys:
+                    display_names.setdefault(key, self.display_names[key])
+        trigram_index: Dict[str, Set[str]] = {}
+        for key in display_names:
+            for gram in trigrams(key):
+                trigram_index.setdefault(gram, set()).add(key)
+        sorted_keys = sorted(display_names)
+        with self.lock:
+            self.platform_accounts = platform_accounts
+            self.display_names = display_names
+            self.trigram_index = trigram_index
+            self.sorted_keys = sorted_keys
+
+    def platforms_of(self, key: str) -> List[str]:
+        return [platform for platform, keys in self.platform_accounts.items() if key in keys]
+
+    def complete(self, prefix: str, limit: int = ACCOUNT_SUGGESTIONS_LIMIT) -> List[Tuple[str, List[str]]]:
+        """Return up to limit (account, platforms) pairs whose account starts with prefix (case insensitive)."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        with self.lock:
+            start = bisect.bisect_left(self.sorted_keys, prefix)
+            matches = []
+            for key in self.sorted_keys[start:start + limit]:
+                if not key.startswith(prefix):
+                    break
+                matches.append((self.display_names[key], self.platforms_of(key)))
+            return matches
+
+    def contains(self, account: str, platform: Optional[str] = None) -> bool:
+        key = account.strip().lower()
+        with self.lock:
+            if platform is None:
+                return key in self.display_names
+            return key in self.platform_accounts.get(platform, set())
+
+    def suggest(self, account: str, limit: int = 3, max_distance: int = 2) -> List[str]:
+        """Return up to limit existing accounts within max_distance edits of account, closest first."""
+        key = account.strip().lower()
+        with self.lock:
+            common_threshold = max(50, int(len(self.display_names) * self.COMMON_TRIGRAM_RATIO))
+            shared: Counter = Counter()
+            for gram in trigrams(key):
+                postings = self.trigram_index.get(gram)
+                if postings and len(postings) <= common_threshold:
+                    shared.update(postings)
+            scored = []
+            for candidate, _ in shared.most_common(50):
+                if candidate == key:
+                    continue
+                distance = edit_distance(key, candidate, max_distance)
+                if distance <= max_distance:
+                    scored.append((distance, candidate))
+            scored.sort()
+            return [self.display_names[candidate] for _, candidate in scored[:limit]]
+
+###############################################################################
+# FLEET STATUS DASHBOARD (LOADED OFF THE TK THREAD, RENDERED AS A VIRTUAL TABLE)
+###############################################################################
+DASHBOARD_COLUMNS = (
+    ("platform", "Platform", 80),
+    ("account", "Account", 260),
+    ("updated", "Last Update", 130),
+    ("horizon", "Expiry Horizon", 140),
+    ("pending", "Pending Re-auth", 100),
+)
+
+
+class FleetRow(NamedTuple):
+    platform: str
+    account: str
+    updated_on: Optional[datetime]
+    expires_on: Optional[datetime]
+    pending: bool
+    # Lowercased account, computed once at load time for filtering and sorting.
+    account_key: str
+
+
+def load_fleet_rows(creds_files: Dict[str, Path], notifications_file: Optional[Path]) -> List[FleetRow]:
+    """
+    Join the accounts of all credentials files with the pending AuthorizationRefreshNotifications.json
+    records. The expiry horizon is the refresh token's expiry when known, else the access token's.
+    Unreadable files and malformed records or entries are logged and skipped.
+    """
+    pending: Set[Tuple[str, str]] = set()
+    if notifications_file is not None and notifications_file.is_file():
+        try:
+            with notifications_file.open("r", encoding="utf-8-sig") as f:
+                records = json.load(f) or []
+            if not isinstance(records, list):
+                raise ValueError("the notifications file does not contain a JSON array")
+            for record in records:
+                if isinstance(record, dict):
+                    pending.add((str(record.get("Platform", "")).lower(), str(record.get("Account", "")).lower()))
+        except (OSError, ValueError) as e:
+            logger.info("Could not read notifications file %s: %s", notifications_file, e)
+
+    rows: List[FleetRow] = []
+    for platform, path in creds_files.items():
+        if not path.is_file():
+            continue
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("the credentials file does not contain a JSON object")
+        except (OSError, ValueError) as e:
+            logger.info("Could not read credentials file %s: %s", path, e)
+            continue
+        for account, entry in data.items():
+            if not isinstance(entry, dict):
+                logger.info("Skipping malformed %s credentials entry '%s'.", platform, account)
+                continue
+            expires_on = parse_utc_timestamp(entry.get("refreshTokenExpiresOn")) or \
+                parse_utc_timestamp(entry.get("accessTokenExpiresOn"))
+            account_key = account.lower()
+            rows.append(FleetRow(platform, account, parse_utc_timestamp(entry.get("updatedOn")), expires_on,
+                                 (platform, account_key) in pending, account_key))
+    return rows
+
+
+def format_fleet_row(row: FleetRow, now: datetime) -> Tuple[Tuple[str, ...], str]:
+    """The table cells and row tag of a fleet row."""
+    values = (
+        "YouTube" if row.platform == "youtube" else "TikTok",
+        row.account,
+        row.updated_on.astimezone().strftime("%Y-%m-%d %H:%M") if row.updated_on else "—",
+        format_horizon(row.expires_on, now),
+        "Yes" if row.pending else "",
+    )
+    return values, "pending" if row.pending else ""
+
+
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+FLEET_SORT_KEYS: Dict[str, Callable[[FleetRow], Any]] = {
+    "platform": lambda row: (row.platform, row.account_key),
+    "account": lambda row: row.account_key,
+    "updated": lambda row: row.updated_on or _OLDEST,
+    "horizon": lambda row: row.expires_on or _OLDEST,
+    "pending": lambda row: (row.pending, row.account_key),
+}
+
+
+def filter_fleet_rows(rows: List[FleetRow], text: str, platform: str, pending_only: bool,
+                      sort: Tuple[str, bool]) -> List[FleetRow]:
+    """
+    Select and order the rows shown by the dashboard. Works on the raw rows only; formatting is
+    left to the virtual table, which formats the visible rows alone.
+
+    :param text: Case-insensitive substring of the account ("" for all).
+    :param platform: "youtube", "tiktok" or "all".
+    :param sort: (column, descending), the column being a DASHBOARD_COLUMNS name.
+    """
+    text = text.strip().lower()
+    view = [row for row in rows
+            if (not text or text in row.account_key)
+            and (platform == "all" or row.platform == platform)
+            and (not pending_only or row.pending)]
+    column, descending = sort
+    view.sort(key=FLEET_SORT_KEYS[column], reverse=descending)
+    return view
+
+
+def format_horizon(expires_on: Optional[datetime], now: datetime) -> str:
+    if expires_on is None:
+        return "—"
+    seconds = int((expires_on - now).total_seconds())
+    days, remainder = divmod(abs(seconds), 86400)
+    hours, remainder = divmod(remainder, 3600)
+    span = f"{days}d {hours}h" if days else f"{hours}h {remainder // 60}m"
+    return f"in {span}" if seconds >= 0 else f"expired {span} ago"
+
+
+class VirtualTable:
+    """
+    A Treeview that only materialises the visible rows.
+
+    The Treeview holds a fixed pool of items (one per visible line); scrolling changes an offset
+    into the row list and rewrites the pooled items' values, so opening or scrolling a list of
+    50k rows costs the same as a list of 30. Rows are kept raw and only the visible ones are
+    passed through format_row. Selection is tracked by row index in the row list.
+    """
+
+    # Pixels added to the font's line height for each row.
+    ROW_PADDING = 6
+
+    def __init__(self, parent: tk.Widget, columns: Tuple[Tuple[str, str, int], ...], on_sort) -> None:
+        self.frame = ttk.Frame(parent, style='Card.TFrame')
+        # Derived from the font so rows neither clip nor leave gaps at other fonts or DPI scaling.
+        self.row_height = tkfont.nametofont("TkDefaultFont").metrics("linespace") + self.ROW_PADDING
+        ttk.Style().configure("Virtual.Treeview", rowheight=self.row_height)
+        self.tree = ttk.Treeview(self.frame, columns=[column for column, _, _ in columns], show="headings",
+                                 selectmode="none", height=1, style="Virtual.Treeview")
+        for column, heading, width in columns:
+            self.tree.heading(column, text=heading, command=lambda c=column: on_sort(c))
+            self.tree.column(column, width=width, stretch=(column == "account"))
+        self.tree.tag_configure("selected", background=COLOR_PRESENCE, foreground="white")
+        self.tree.tag_configure("pending", foreground=COLOR_ERROR)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.rows: Sequence[Any] = []
+        self.format_row: Callable[[Any], Tuple[Tuple[str, ...], str]] = lambda row: (tuple(row), "")
+        self.selected: Set[int] = set()
+        self.anchor: Optional[int] = None
+        self.offset = 0
+        self.items: List[str] = []
+
+        self.tree.bind("<Configure>", lambda event: self.resize_pool())
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind("<Button-1>", self.on_click)
+        for key, delta in (("<Up>", -1), ("<Down>", 1)):
+            self.tree.bind(key, lambda event, d=delta: self.scroll_to(self.offset + d))
+        self.tree.bind("<Prior>", lambda event: self.scroll_to(self.offset - len(self.items)))
+        self.tree.bind("<Next>", lambda event: self.scroll_to(self.offset + len(self.items)))
+
+    def set_rows(self, rows: Sequence[Any], format_row: Callable[[Any], Tuple[Tuple[str, ...], str]]) -> None:
+        """
+        Replace the displayed rows; clears the selection and scrolls to the top.
+
+        :param format_row: Returns the cell values and the tag of a row; called for visible rows only.
+        """
+        self.rows = rows
+        self.format_row = format_row
+        self.selected.clear()
+        self.anchor = None
+        self.offset = 0
+        self.render()
+
+    def resize_pool(self) -> None:
+        visible = max(1, self.tree.winfo_height() // self.row_height - 1)
+        while len(self.items) < visible:
+            self.items.append(self.tree.insert("", tk.END, values=()))
+        while len(self.items) > visible:
+            self.tree.delete(self.items.pop())
+        self.render()
+
+    def scroll_to(self, offset: int) -> str:
+        self.offset = max(0, min(offset, len(self.rows) - len(self.items)))
+        self.render()
+        return "break"
+
+    def on_scrollbar(self, action: str, value: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.rows)))
+        elif action == "scroll":
+            step = len(self.items) if unit == "pages" else 1
+            self.scroll_to(self.offset + int(value) * step)
+
+    def on_mousewheel(self, event: Any) -> str:
+        return self.scroll_to(self.offset - int(event.delta / 120) * 3)
+
+    def on_click(self, event: Any) -> str:
+        item = self.tree.identify_row(event.y)
+        if not item or item not in self.items:
+            return ""
+        index = self.offset + self.items.index(item)
+        if index >= len(self.rows):
+            return "break"
+        if event.state & 0x0001 and self.anchor is not None:  # Shift: select a range
+            low, high = sorted((self.anchor, index))
+            self.selected = set(range(low, high + 1))
+        elif event.state & 0x0004:  # Control: toggle
+            self.selected.symmetric_difference_update({index})
+            self.anchor = index
+        else:
+            self.selected = {index}
+            self.anchor = index
+        self.tree.focus_set()
+        self.render()
+        return "break"
+
+    def render(self) -> None:
+        for position, item in enumerate(self.items):
+            index = self.offset + position
+            if index < len(self.rows):
+                values, tag = self.format_row(self.rows[index])
+                self.tree.item(item, values=values, tags=("selected",) if index in self.selected else (tag,))
+            else:
+                self.tree.item(item, values=(), tags=())
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(self.items)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
 ###############################################################################
 # MAIN APPLICATION CLASS
 ###############################################################################
 class PresenceAuthApp:
-    def __init__(self, appsettings: dict) -> None:
+    def __init__(self, appsettings: dict, profiler: Optional[Any] = None) -> None:
         """
         Initialize the PresenceAuthApp with configuration settings.
 
@@ -108,7 +537,25 @@ class PresenceAuthApp:
         self.default_creds_path: str = str(Path(self.credentials_folder_base) / self.creds_youtube_file)
         self.chrome_path_cache: Optional[str] = None
         self.current_process: Optional[subprocess.Popen] = None
+        # RunProfiler of a --profile session (None otherwise); refreshes are then profiled as well.
+        self.profiler = profiler
+        self.creds_files: Dict[str, Path] = {
+            "youtube": Path(self.credentials_folder_base) / self.creds_youtube_file,
+            "tiktok": Path(self.credentials_folder_base) / self.creds_tiktok_file,
+        }
+        notifications_path = appsettings.get("AuthorizationRefreshNotificationsFilePath", "")
+        self.notifications_file: Optional[Path] = Path(os.path.expandvars(notifications_path)) \
+            if notifications_path else None
+        self.account_directory = AccountDirectory(self.creds_files)
+        self.fleet_rows: List[FleetRow] = []
+        self.dashboard_view: List[FleetRow] = []
+        self.dashboard_sort: Tuple[str, bool] = ("account", False)
+        self.dashboard_queue: queue.Queue = queue.Queue()
+        self.reauthorization_queue: List[FleetRow] = []
         self.setup_ui()
+        self.account_directory.refresh_async()
+        self.root.after(ACCOUNT_DIRECTORY_POLL_MS, self.poll_account_directory)
+        self.load_dashboard_async()
 
     def setup_ui(self) -> None:
         """Initialize and configure the Tkinter GUI."""
@@ -140,9 +587,18 @@ class PresenceAuthApp:
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
 
         self.setup_header_frame()
+
+        self.notebook = ttk.Notebook(self.main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.add_account_tab = ttk.Frame(self.notebook, style='TFrame')
+        self.dashboard_tab = ttk.Frame(self.notebook, style='TFrame')
+        self.notebook.add(self.add_account_tab, text="Add Account")
+        self.notebook.add(self.dashboard_tab, text="Fleet Status")
+
         self.setup_form_frame()
         self.setup_buttons_frame()
         self.setup_output_frame()
+        self.setup_dashboard_frame()
 
         self.root.update_idletasks()
         width = self.root.winfo_width()
@@ -202,8 +658,8 @@ class PresenceAuthApp:
 
     def setup_form_frame(self) -> None:
         """Create the form frame for user input."""
-        self.form_frame = ttk.Frame(self.main_frame, style='Card.TFrame')
-        self.form_frame.pack(fill=tk.X, pady=(0, 10))
+        self.form_frame = ttk.Frame(self.add_account_tab, style='Card.TFrame')
+        self.form_frame.pack(fill=tk.X, pady=(10, 10))
         self.form_frame['borderwidth'] = 1
         self.form_frame['relief'] = 'solid'
 
@@ -219,6 +675,18 @@ class PresenceAuthApp:
         entry_frame.grid(row=0, column=1, columnspan=2, sticky='ew', padx=5, pady=5)
         self.entry_account = ttk.Entry(entry_frame, font=('Segoe UI', 9), width=40)
         self.entry_account.pack(fill=tk.X)
+        self.entry_account.bind("<KeyRelease>", self.update_account_suggestions)
+        self.entry_account.bind("<Down>", self.focus_account_suggestions)
+        self.entry_account.bind("<Escape>", lambda event: self.hide_account_suggestions())
+        self.entry_account.bind("<FocusOut>", lambda event: self.root.after(150, self.hide_account_suggestions_on_blur))
+        # Autocomplete list, shown under the entry only while there are matches.
+        self.suggestions_list = tk.Listbox(entry_frame, height=ACCOUNT_SUGGESTIONS_LIMIT, font=('Segoe UI', 9),
+                                           activestyle='none', borderwidth=1, relief='solid',
+                                           selectbackground=COLOR_PRESENCE, highlightthickness=0)
+        self.suggestions_list.bind("<Return>", self.select_account_suggestion)
+        self.suggestions_list.bind("<ButtonRelease-1>", self.select_account_suggestion)
+        self.suggestions_list.bind("<Escape>", lambda event: self.hide_account_suggestions(focus_entry=True))
+        self.suggestion_accounts: List[str] = []
 
         ttk.Label(self.form_inner, text="Platform:", style='TLabel')\
             .grid(row=1, column=0, sticky='w', padx=5, pady=5)
@@ -261,7 +729,7 @@ class PresenceAuthApp:
 
     def setup_buttons_frame(self) -> None:
         """Create the action buttons and status display."""
-        self.buttons_frame = ttk.Frame(self.main_frame, style='TFrame')
+        self.buttons_frame = ttk.Frame(self.add_account_tab, style='TFrame')
         self.buttons_frame.pack(fill=tk.X, pady=(0, 10))
         self.status_label = ttk.Label(self.buttons_frame, text="", style='NormalStatus.TLabel')
         self.status_label.pack(side=tk.LEFT, padx=10)
@@ -281,7 +749,7 @@ class PresenceAuthApp:
 
     def setup_output_frame(self) -> None:
         """Create the frame for displaying process logs and messages."""
-        self.output_frame = ttk.Frame(self.main_frame, style='Card.TFrame')
+        self.output_frame = ttk.Frame(self.add_account_tab, style='Card.TFrame')
         self.output_frame.pack(fill=tk.BOTH, expand=True)
         self.output_frame['borderwidth'] = 1
         self.output_frame['relief'] = 'solid'
@@ -313,6 +781,130 @@ class PresenceAuthApp:
 
         self.display_welcome_message()
 
+    def setup_dashboard_frame(self) -> None:
+        """Create the fleet status tab: filters, the virtual account table and the re-authorize action."""
+        filters = ttk.Frame(self.dashboard_tab, style='TFrame')
+        filters.pack(fill=tk.X, pady=(10, 5))
+        ttk.Label(filters, text="Filter:", style='NormalStatus.TLabel').pack(side=tk.LEFT)
+        self.dashboard_filter_text = tk.StringVar()
+        self.dashboard_filter = ttk.Entry(filters, font=('Segoe UI', 9), width=30,
+                                          textvariable=self.dashboard_filter_text)
+        self.dashboard_filter.pack(side=tk.LEFT, padx=(5, 10))
+        # Any edit (typing, paste, clear) re-filters once the user pauses.
+        self.dashboard_filter_text.trace_add("write", lambda *trace: self.schedule_dashboard_filter())
+        self.dashboard_platform = ttk.Combobox(filters, values=["All", "YouTube", "TikTok"], state="readonly",
+                                               font=('Segoe UI', 9), width=10)
+        self.dashboard_platform.current(0)
+        self.dashboard_platform.pack(side=tk.LEFT, padx=(0, 10))
+        self.dashboard_platform.bind("<<ComboboxSelected>>", lambda event: self.apply_dashboard_filter())
+        self.dashboard_pending_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filters, text="Pending re-auth only", variable=self.dashboard_pending_only,
+                        command=self.apply_dashboard_filter, style='TCheckbutton').pack(side=tk.LEFT)
+        ttk.Button(filters, text="Reload", command=self.load_dashboard_async, width=8).pack(side=tk.RIGHT)
+        self.btn_reauthorize = ttk.Button(filters, text="Re-authorize Selected", style='Accent.TButton',
+                                          command=self.reauthorize_selected)
+        self.btn_reauthorize.pack(side=tk.RIGHT, padx=(0, 8))
+
+        self.dashboard_table = VirtualTable(self.dashboard_tab, DASHBOARD_COLUMNS, self.sort_dashboard)
+        self.dashboard_table.frame.pack(fill=tk.BOTH, expand=True)
+        self.dashboard_status = ttk.Label(self.dashboard_tab, text="Loading accounts...", style='NormalStatus.TLabel')
+        self.dashboard_status.pack(anchor='w', pady=(5, 0))
+        self.dashboard_filter_job: Optional[str] = None
+
+    def load_dashboard_async(self) -> None:
+        """Read the credentials and notifications files on a background thread."""
+        self.dashboard_status.configure(text="Loading accounts...")
+
+        def worker() -> None:
+            start = time.perf_counter()
+            try:
+                rows = load_fleet_rows(self.creds_files, self.notifications_file)
+            except Exception as e:
+                # Always answer the poller, or it would wait behind "Loading..." forever.
+                logger.exception("Fleet dashboard failed to load.")
+                self.dashboard_queue.put((None, e, time.perf_counter() - start))
+                return
+            self.dashboard_queue.put((rows, None, time.perf_counter() - start))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(50, self.poll_dashboard_load)
+
+    def poll_dashboard_load(self) -> None:
+        try:
+            rows, error, elapsed = self.dashboard_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.poll_dashboard_load)
+            return
+        if error is not None:
+            self.dashboard_status.configure(text=f"Could not load accounts: {error}", style='ErrorStatus.TLabel')
+            return
+        self.dashboard_status.configure(style='NormalStatus.TLabel')
+        self.fleet_rows = rows
+        logger.info("Fleet dashboard loaded %d accounts in %.2f seconds.", len(rows), elapsed)
+        self.apply_dashboard_filter()
+
+    def schedule_dashboard_filter(self) -> None:
+        """Debounce filtering while the user types."""
+        if self.dashboard_filter_job is not None:
+            self.root.after_cancel(self.dashboard_filter_job)
+        self.dashboard_filter_job = self.root.after(150, self.apply_dashboard_filter)
+
+    def apply_dashboard_filter(self) -> None:
+        """Filter and sort the loaded rows; the virtual table formats the visible ones."""
+        if self.dashboard_filter_job is not None:
+            self.root.after_cancel(self.dashboard_filter_job)
+        self.dashboard_filter_job = None
+        view = filter_fleet_rows(self.fleet_rows, self.dashboard_filter_text.get(),
+                                 self.dashboard_platform.get().lower(), self.dashboard_pending_only.get(),
+                                 self.dashboard_sort)
+        self.dashboard_view = view
+        now = datetime.now(timezone.utc)
+        self.dashboard_table.set_rows(view, lambda row: format_fleet_row(row, now))
+        pending_total = sum(1 for row in self.fleet_rows if row.pending)
+        self.dashboard_status.configure(
+            text=f"{len(view)} of {len(self.fleet_rows)} accounts shown · {pending_total} pending re-authorization")
+
+    def sort_dashboard(self, column: str) -> None:
+        current, descending = self.dashboard_sort
+        self.dashboard_sort = (column, not descending if column == current else False)
+        self.apply_dashboard_filter()
+
+    def reauthorize_selected(self) -> None:
+        """Queue the selected accounts and authorize them one after another in the Add Account tab."""
+        selected = [self.dashboard_view[index] for index in sorted(self.dashboard_table.selected)]
+        if not selected:
+            self.dashboard_status.configure(text="Select one or more accounts to re-authorize.")
+            return
+        if self.current_process is not None:
+            self.dashboard_status.configure(text="An authorization is already running.")
+            return
+        logger.info("Re-authorization requested for %d account(s).", len(selected))
+        self.reauthorization_queue = selected
+        self.notebook.select(self.add_account_tab)
+        self.start_next_reauthorization()
+
+    def start_next_reauthorization(self) -> None:
+        if not self.reauthorization_queue or self.current_process is not None:
+            return
+        row = self.reauthorization_queue.pop(0)
+        self.entry_account.delete(0, tk.END)
+        self.entry_account.insert(0, row.account)
+        self.combo_platform.current(0 if row.platform == "youtube" else 1)
+        self.update_creds_path()
+        use_default = self.use_default_browser_var.get()
+        chrome_path = "" if use_default else self.entry_chrome.get().strip()
+        self.start_authorization_process(row.account, row.platform, str(self.creds_files[row.platform]),
+                                         chrome_path, use_default, add_new_account=False)
+
+    def on_authorization_finished(self) -> None:
+        """Continue a re-authorization batch, or refresh the dashboard once it is done."""
+        if self.profiler is not None:
+            self.profiler.set_phase("idle")
+        if self.reauthorization_queue:
+            self.root.after(500, self.start_next_reauthorization)
+        else:
+            self.load_dashboard_async()
+
     def display_welcome_message(self) -> None:
         """
         Clear the output text and display a welcome message.
@@ -377,6 +969,85 @@ class PresenceAuthApp:
             segments.append((text[last_end:], current_tag))
         return segments
 
+    def poll_account_directory(self) -> None:
+        """Periodically re-index the credentials files if they changed."""
+        self.account_directory.refresh_async()
+        self.root.after(ACCOUNT_DIRECTORY_POLL_MS, self.poll_account_directory)
+
+    def update_account_suggestions(self, event: Optional[Any] = None) -> None:
+        """Show the known accounts starting with the typed text."""
+        if event is not None and event.keysym in ("Down", "Up", "Escape", "Return", "Tab"):
+            return
+        matches = self.account_directory.complete(self.entry_account.get())
+        typed = self.entry_account.get().strip().lower()
+        if not matches or (len(matches) == 1 and matches[0][0].lower() == typed):
+            self.hide_account_suggestions()
+            return
+        self.suggestion_accounts = [account for account, _ in matches]
+        self.suggestions_list.delete(0, tk.END)
+        for account, platforms in matches:
+            platform_names = ", ".join("YouTube" if platform == "youtube" else "TikTok" for platform in platforms)
+            self.suggestions_list.insert(tk.END, f"{account}    ({platform_names})")
+        self.suggestions_list.config(height=len(matches))
+        if not self.suggestions_list.winfo_ismapped():
+            self.suggestions_list.pack(fill=tk.X)
+
+    def focus_account_suggestions(self, event: Optional[Any] = None) -> str:
+        """Move keyboard focus from the entry to the suggestions list."""
+        if self.suggestions_list.winfo_ismapped():
+            self.suggestions_list.focus_set()
+            self.suggestions_list.selection_clear(0, tk.END)
+            self.suggestions_list.selection_set(0)
+            self.suggestions_list.activate(0)
+        return "break"
+
+    def select_account_suggestion(self, event: Optional[Any] = None) -> None:
+        """Copy the selected suggestion into the account entry."""
+        selection = self.suggestions_list.curselection()
+        if not selection:
+            return
+        account = self.suggestion_accounts[selection[0]]
+        self.entry_account.delete(0, tk.END)
+        self.entry_account.insert(0, account)
+        self.hide_account_suggestions(focus_entry=True)
+
+    def hide_account_suggestions(self, focus_entry: bool = False) -> None:
+        if self.suggestions_list.winfo_ismapped():
+            self.suggestions_list.pack_forget()
+        if focus_entry:
+            self.entry_account.focus_set()
+            self.entry_account.icursor(tk.END)
+
+    def hide_account_suggestions_on_blur(self) -> None:
+        if self.root.focus_get() is not self.suggestions_list:
+            self.hide_account_suggestions()
+
+    def confirm_account_is_intended(self, account: str, platform: str) -> bool:
+        """
+        Before adding an account that is not in the credentials file, warn about existing accounts
+        with a near-identical name (likely a typo that would create a duplicate entry).
+
+        :return: True to go ahead with the authorization.
+        """
+        if not self.account_directory.ready.is_set() or self.account_directory.contains(account, platform):
+            return True
+        suggestions = self.account_directory.suggest(account)
+        if not suggestions:
+            return True
+        logger.info("Possible duplicate of %s for new account: %s", suggestions, account)
+        proceed = messagebox.askyesno(
+            "Did you mean...?",
+            f"'{account}' is not in the {platform.capitalize()} credentials file, "
+            f"but similar accounts exist:\n\n" + "\n".join(f"  • {name}" for name in suggestions) +
+            "\n\nAdd it as a new account anyway?",
+            icon=messagebox.WARNING,
+            parent=self.root
+        )
+        if not proceed:
+            self.status_label.configure(style='NormalStatus.TLabel', text=f"Did you mean {suggestions[0]}?")
+            logger.info("New account %s not added; user chose to review the suggestion.", account)
+        return proceed
+
     def update_creds_path(self, event: Optional[Any] = None) -> None:
         """
         Update the credentials file path and change the platform indicator color.
@@ -431,6 +1102,7 @@ class PresenceAuthApp:
     def clear_form(self) -> None:
         """Clear all form inputs and reset the output area."""
         self.entry_account.delete(0, tk.END)
+        self.hide_account_suggestions()
         self.combo_platform.current(0)
         self.entry_creds.delete(0, tk.END)
         self.entry_chrome.config(state='normal')
@@ -533,6 +1205,7 @@ class PresenceAuthApp:
                         self.btn_add.config(state=tk.NORMAL)
                         self.btn_cancel.config(state=tk.DISABLED)
                         self.current_process = None
+                        self.on_authorization_finished()
                         return
                     else:
                         colored_segments = self.parse_ansi_colors(line)
@@ -594,6 +1267,7 @@ class PresenceAuthApp:
                     self.btn_cancel.config(state=tk.DISABLED)
                     self.current_process = None
                     logger.info("Process terminated due to timeout.")
+                    self.on_authorization_finished()
                     return
                 except Exception as e:
                     logger.info("Error terminating process: %s", e)
@@ -631,6 +1305,19 @@ class PresenceAuthApp:
             logger.info("Missing credentials file; authorization aborted.")
             return
 
+        self.hide_account_suggestions()
+        if not self.confirm_account_is_intended(account, platform):
+            return
+
+        self.start_authorization_process(account, platform, creds_file, chrome_path, use_default)
+
+    def start_authorization_process(self, account: str, platform: str, creds_file: str, chrome_path: str,
+                                    use_default: bool, add_new_account: bool = True) -> None:
+        """
+        Launch the refresh executable for one account and stream its output into the console area.
+
+        :param add_new_account: Pass --add_new_account (the Add Account form) or not (re-authorizing known accounts).
+        """
         self.status_label.configure(style='NormalStatus.TLabel', text=f"Authorizing {account}...")
         self.output_text.config(state=tk.NORMAL)
         self.output_text.delete("1.0", tk.END)
@@ -644,11 +1331,15 @@ class PresenceAuthApp:
             "--platform", platform,
             "--account", account,
             "--creds_file_path", creds_file,
-            "--timeout", "120",
-            "--add_new_account"
+            "--timeout", "120"
         ]
+        if add_new_account:
+            cmd.append("--add_new_account")
         if chrome_path and not use_default:
             cmd.extend(["--chrome", chrome_path])
+        if self.profiler is not None:
+            cmd.extend(["--profile", str(self.profiler.output_base.parent)])
+            self.profiler.set_phase("authorization")
 
         try:
             self.btn_add.config(state=tk.DISABLED)
@@ -701,6 +1392,11 @@ class PresenceAuthApp:
                 self.btn_add.config(state=tk.NORMAL)
                 self.btn_cancel.config(state=tk.DISABLED)
                 self.current_process = None
+                if self.reauthorization_queue:
+                    logger.info("Remaining %d re-authorization(s) cancelled.", len(self.reauthorization_queue))
+                    self.reauthorization_queue = []
+                if self.profiler is not None:
+                    self.profiler.set_phase("idle")
                 logger.info("Authorization process cancelled by user.")
             except Exception as e:
                 logger.info("Error cancelling process: %s", e)
@@ -720,6 +1416,8 @@ def main():
     # Optional log file argument.
     parser.add_argument("--log", dest="log_file", type=Path, default=None,
                         help="Optional log file path. If not provided, a 'Logs' folder with a timestamped filename is used.")
+    parser.add_argument("--profile", action="store_true", default=False,
+                        help="Profile the session and write .pstats and collapsed-stack files next to the log file.")
     args = parser.parse_args()
 
     if not args.appsettings.is_file():
@@ -736,8 +1434,23 @@ def main():
     log_file_path = get_log_file_path(args.log_file)
     logger.info("Log file: %s", log_file_path)
 
-    app = PresenceAuthApp(appsettings)
-    app.run()
+    profiler = None
+    if args.profile:
+        # profiling.py sits next to this script; imported only when profiling.
+        from profiling import RunProfiler
+        profiler = RunProfiler(log_file_path.with_name(log_file_path.stem + "_profile"))
+        profiler.set_phase("startup")
+        profiler.start()
+
+    try:
+        app = PresenceAuthApp(appsettings, profiler)
+        if profiler is not None:
+            profiler.set_phase("idle")
+        app.run()
+    finally:
+        if profiler is not None:
+            pstats_path, collapsed_path = profiler.stop()
+            logger.info("Profile written to %s and %s", pstats_path, collapsed_path)
 
 
 if __name__ == "__main__":
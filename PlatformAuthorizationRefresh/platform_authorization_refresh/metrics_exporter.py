@@ -0,0 +1,316 @@
+"""
+Prometheus textfile exporter for OAuth token freshness.
+
+Reads the YouTube/TikTok credentials files and the AuthorizationRefreshNotifications.json backlog
+written by the poller, and writes a Prometheus text-format file for the node_exporter textfile
+collector. The credentials files are streamed (see credentials_reader.py) and only opened for
+reading (never rewritten or locked), and the output file is replaced atomically, so the exporter
+is safe to run every minute from a scheduler.
+
+The refresh duration histogram is built from every attempt in the refresh history database
+(see refresh_history.py), which is only ever appended to, so its buckets, _sum and _count only
+grow, as Prometheus expects of a histogram.
+
+Usage:
+    PlatformAuthorizationRefresh.exe export-metrics --output <path_to_file.prom>
+        [--youtube_creds_file_path <path>] [--tiktok_creds_file_path <path>]
+        [--notifications_file_path <path>] [--history_file <path>]
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sqlite3
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from platform_authorization_refresh import refresh_history
+from platform_authorization_refresh.credentials_reader import iter_credentials
+from platform_authorization_refresh.utils import Colors, parse_utc_timestamp, print_status
+
+# Upper bounds (in seconds) of the refresh duration histogram buckets.
+# An interactive consent flow usually takes 10-60 seconds; the default timeout is 120.
+REFRESH_DURATION_BUCKETS: Tuple[float, ...] = (5, 10, 15, 30, 45, 60, 90, 120, 300)
+
+METRIC_PREFIX = "presence_auth"
+
+
+def escape_label_value(value: str) -> str:
+    """Escape a label value according to the Prometheus text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Render a label set as {name="value",...} (empty string for no labels)."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """
+    Accumulates metric families in Prometheus text format.
+    Each family gets a single HELP/TYPE header, followed by all of its samples.
+    """
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {METRIC_PREFIX}_{name} {metric_type}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        # repr() keeps full precision for Unix timestamps, which the "g" format would round.
+        rendered = str(value) if isinstance(value, int) else repr(float(value))
+        self.lines.append(f"{METRIC_PREFIX}_{name}{format_labels(labels or {})} {rendered}")
+
+    def histogram(self, name: str, buckets: Tuple[float, ...], counts: List[int], total: float,
+                  labels: Dict[str, str]) -> None:
+        """
+        Write the _bucket/_sum/_count samples of one histogram series.
+
+        :param counts: Observations per bucket (not cumulative), the last one for values above every bound.
+        """
+        cumulative = 0
+        for bound, count in zip(buckets, counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, {**labels, "le": f"{bound:g}"})
+        self.sample(f"{name}_bucket", sum(counts), {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", round(total, 3), labels)
+        self.sample(f"{name}_count", sum(counts), labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def load_json_file(path: Optional[Path]) -> Tuple[bool, Any]:
+    """
+    Read a JSON file without modifying it.
+
+    :return: (readable, data). A missing file or a file caught mid-write yields (False, None).
+    """
+    if path is None or not path.is_file():
+        return False, None
+    try:
+        with path.open("r", encoding="utf-8-sig") as f:
+            return True, json.load(f)
+    except (OSError, ValueError) as e:
+        print_status(f"Warning: could not read {path}: {e}", Colors.YELLOW)
+        return False, None
+
+
+def duration_histograms(history_files: Sequence[Path]) -> Dict[Tuple[str, str], Tuple[List[int], float]]:
+    """
+    Bucket the duration of every recorded refresh attempt.
+
+    :return: (platform, outcome) -> (observations per REFRESH_DURATION_BUCKETS bucket plus +Inf, sum of durations).
+        A missing history file contributes nothing; refreshes may not have been tracked yet.
+    """
+    histograms: Dict[Tuple[str, str], Tuple[List[int], float]] = {}
+    for history_file in history_files:
+        if not history_file.is_file():
+            continue
+        try:
+            for attempt in refresh_history.iter_attempts(history_file):
+                counts, total = histograms.get((attempt.platform, attempt.outcome),
+                                               ([0] * (len(REFRESH_DURATION_BUCKETS) + 1), 0.0))
+                counts[bisect.bisect_left(REFRESH_DURATION_BUCKETS, attempt.duration_seconds)] += 1
+                histograms[(attempt.platform, attempt.outcome)] = (counts, total + attempt.duration_seconds)
+        except (OSError, sqlite3.Error) as e:
+            print_status(f"Warning: could not read {history_file}: {e}", Colors.YELLOW)
+    return histograms
+
+
+def collect_metrics(creds_files: Dict[str, Optional[Path]], notifications_file: Optional[Path],
+                    now: Optional[datetime] = None, history_files: Sequence[Path] = ()) -> str:
+    """
+    Build the Prometheus textfile content for the given credentials and notifications files.
+
+    :param creds_files: Mapping of platform name ("youtube", "tiktok") to its credentials file path.
+    :param notifications_file: Path to AuthorizationRefreshNotifications.json (optional).
+    :param history_files: Refresh history databases to build the duration histogram from.
+    :param now: Reference time for ages and horizons (defaults to the current UTC time).
+    :return: The metrics in Prometheus text exposition format.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_ts = now.timestamp()
+
+    # One pass over each file; per-account samples are buffered per family so that
+    # every family is written contiguously, as the text format requires.
+    file_readable: Dict[str, bool] = {}
+    account_counts: Dict[str, int] = {}
+    untracked_counts: Dict[str, int] = {}
+    token_age: List[Tuple[Dict[str, str], float]] = []
+    last_refresh: List[Tuple[Dict[str, str], float]] = []
+    access_horizon: List[Tuple[Dict[str, str], float]] = []
+    refresh_horizon: List[Tuple[Dict[str, str], float]] = []
+    durations: List[Tuple[Dict[str, str], float]] = []
+
+    for platform, creds_path in creds_files.items():
+        file_readable[platform] = False
+        account_counts[platform] = 0
+        untracked_counts[platform] = 0
+        if creds_path is None or not creds_path.is_file():
+            continue
+
+        # Streamed entry by entry (bounded memory); the samples of a file are only kept when the
+        # whole file parses, since a file caught mid-write would otherwise report a partial fleet.
+        file_age: List[Tuple[Dict[str, str], float]] = []
+        file_last_refresh: List[Tuple[Dict[str, str], float]] = []
+        file_access: List[Tuple[Dict[str, str], float]] = []
+        file_refresh: List[Tuple[Dict[str, str], float]] = []
+        file_durations: List[Tuple[Dict[str, str], float]] = []
+        file_accounts = file_untracked = 0
+        try:
+            for account, entry in iter_credentials(creds_path):
+                file_accounts += 1
+                if not isinstance(entry, dict):
+                    continue
+                labels = {"platform": platform, "account": account}
+                updated_on = parse_utc_timestamp(entry.get("updatedOn"))
+                if updated_on is None:
+                    file_untracked += 1
+                else:
+                    file_age.append((labels, now_ts - updated_on.timestamp()))
+                    file_last_refresh.append((labels, updated_on.timestamp()))
+
+                access_expires_on = parse_utc_timestamp(entry.get("accessTokenExpiresOn"))
+                if access_expires_on is not None:
+                    file_access.append((labels, access_expires_on.timestamp() - now_ts))
+
+                refresh_expires_on = parse_utc_timestamp(entry.get("refreshTokenExpiresOn"))
+                if refresh_expires_on is not None:
+                    file_refresh.append((labels, refresh_expires_on.timestamp() - now_ts))
+
+                duration = entry.get("refreshDurationSeconds")
+                if isinstance(duration, (int, float)):
+                    file_durations.append((labels, float(duration)))
+        except (OSError, ValueError) as e:
+            print_status(f"Warning: could not read {creds_path}: {e}", Colors.YELLOW)
+            continue
+
+        file_readable[platform] = True
+        account_counts[platform] = file_accounts
+        untracked_counts[platform] = file_untracked
+        durations.extend(file_durations)
+        token_age.extend(file_age)
+        last_refresh.extend(file_last_refresh)
+        access_horizon.extend(file_access)
+        refresh_horizon.extend(file_refresh)
+
+    pending: Counter = Counter({platform: 0 for platform in creds_files})
+    notifications_readable, records = load_json_file(notifications_file)
+    for record in records if isinstance(records, list) else []:
+        if isinstance(record, dict) and record.get("Platform"):
+            pending[str(record["Platform"]).lower()] += 1
+
+    writer = MetricsWriter()
+    writer.family("credentials_file_readable", "gauge",
+                  "Whether the platform credentials file could be read and parsed (1) or not (0).")
+    for platform, readable in file_readable.items():
+        writer.sample("credentials_file_readable", int(readable), {"platform": platform})
+
+    writer.family("accounts", "gauge", "Number of accounts in the platform credentials file.")
+    for platform, count in account_counts.items():
+        writer.sample("accounts", count, {"platform": platform})
+
+    writer.family("accounts_untracked", "gauge",
+                  "Accounts whose credentials entry has no updatedOn timestamp (written before tracking existed).")
+    for platform, count in untracked_counts.items():
+        writer.sample("accounts_untracked", count, {"platform": platform})
+
+    for name, help_text, samples in (
+            ("token_age_seconds", "Seconds since the account's current tokens were issued.", token_age),
+            ("last_refresh_timestamp_seconds",
+             "Unix time of the last successful token refresh for the account.", last_refresh),
+            ("access_token_expires_in_seconds",
+             "Seconds until the access token expires (negative once expired).", access_horizon),
+            ("refresh_token_expires_in_seconds",
+             "Seconds until the refresh token expires (negative once expired).", refresh_horizon),
+            ("last_refresh_duration_seconds",
+             "Duration of the account's last successful refresh flow.", durations)):
+        writer.family(name, "gauge", help_text)
+        for labels, value in samples:
+            writer.sample(name, round(value, 3), labels)
+
+    writer.family("pending_notifications", "gauge",
+                  "Authorization refresh notifications awaiting re-authorization, per platform.")
+    for platform, count in sorted(pending.items()):
+        writer.sample("pending_notifications", count, {"platform": platform})
+    writer.family("notifications_file_readable", "gauge",
+                  "Whether the authorization refresh notifications file could be read and parsed (1) or not (0).")
+    writer.sample("notifications_file_readable", int(notifications_readable and isinstance(records, list)))
+
+    writer.family("refresh_duration_seconds", "histogram",
+                  "Duration of the refresh attempts recorded in the refresh history, by outcome.")
+    for (platform, outcome), (counts, total) in sorted(duration_histograms(history_files).items()):
+        writer.histogram("refresh_duration_seconds", REFRESH_DURATION_BUCKETS, counts, total,
+                         {"platform": platform, "outcome": outcome})
+
+    writer.family("export_timestamp_seconds", "gauge", "Unix time at which these metrics were exported.")
+    writer.sample("export_timestamp_seconds", round(now_ts, 3))
+    return writer.render()
+
+
+def write_textfile(output_path: Path, content: str) -> None:
+    """
+    Write the metrics file atomically (temporary file + rename in the same folder),
+    so the textfile collector never scrapes a partially written file.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8", newline="\n") as f:
+        f.write(content)
+    os.replace(temp_path, output_path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="export-metrics",
+        description="Export token freshness metrics in Prometheus textfile format.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--youtube_creds_file_path", type=Path, default=None,
+                        help="YouTube credentials JSON file path")
+    parser.add_argument("--tiktok_creds_file_path", type=Path, default=None,
+                        help="TikTok credentials JSON file path")
+    parser.add_argument("--notifications_file_path", type=Path, default=None,
+                        help="AuthorizationRefreshNotifications.json file path (environment variables are expanded)")
+    parser.add_argument("--history_file", type=Path, default=None,
+                        help="Refresh history database for the refresh duration histogram "
+                             f"(default: {refresh_history.HISTORY_FILE_NAME} next to each credentials file)")
+    parser.add_argument("--output", required=True, type=Path,
+                        help="Output .prom file path (usually inside the node_exporter textfile directory)")
+    args = parser.parse_args(argv)
+
+    creds_files = {
+        "youtube": args.youtube_creds_file_path,
+        "tiktok": args.tiktok_creds_file_path,
+    }
+    creds_files = {platform: path for platform, path in creds_files.items() if path is not None}
+    if not creds_files:
+        parser.error("at least one of --youtube_creds_file_path / --tiktok_creds_file_path is required")
+
+    notifications_file = None
+    if args.notifications_file_path is not None:
+        notifications_file = Path(os.path.expandvars(str(args.notifications_file_path)))
+
+    if args.history_file is not None:
+        history_files = [args.history_file]
+    else:
+        # Both credentials files usually share a folder, and so a history database.
+        history_files = list(dict.fromkeys(refresh_history.default_history_file(str(path)).absolute()
+                                           for path in creds_files.values()))
+
+    try:
+        content = collect_metrics(creds_files, notifications_file, history_files=history_files)
+        write_textfile(args.output, content)
+    except Exception as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
+    print_status(f"Metrics written to {args.output}", Colors.GREEN)
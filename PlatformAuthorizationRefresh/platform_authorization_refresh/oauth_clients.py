@@ -0,0 +1,239 @@
+"""
+Pool of OAuth app registrations per platform.
+
+Token traffic and API quota are accounted per app registration, so spreading accounts over several
+registrations raises the aggregate refresh throughput and downstream quota. Accounts are assigned to
+a registration with rendezvous hashing of the account name, which is deterministic and moves only
+the accounts of an added/removed registration. The assignment is stored in the credentials entry
+("oauthClient"), because a refresh token can only be used with the registration that issued it, so
+consumers refreshing access tokens must use the stored registration. A stored assignment wins over
+the hash as long as that registration is still configured; otherwise the account is re-assigned
+(its next consent flow issues tokens for the new registration).
+
+The pool is loaded from a JSON file:
+
+    {
+      "youtube": [
+        {"name": "yt-main", "client_id": "...", "client_secret": "...", "requests_per_minute": 60},
+        {"name": "yt-2", "client_id": "...", "client_secret": "..."}
+      ],
+      "tiktok": [
+        {"name": "tt-main", "client_key": "...", "client_secret": "...", "requests_per_minute": 30}
+      ]
+    }
+
+Without a file, each platform has a single "default" registration built from the module constants.
+
+"requests_per_minute" limits the token requests sent through a registration. Each run of the CLI is
+a new process, so the token bucket is not kept in memory: it lives in a state file next to the
+config file (<config file>.budget.json), read and rewritten under a lock file by every process
+using that config - one-shot refreshes, queue workers and the GUI alike. Hosts sharing the config
+file on shared storage therefore share the budget as well.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from platform_authorization_refresh import tiktok_auth_refresh, youtube_auth_refresh
+from platform_authorization_refresh.credentials_reader import find_credentials
+from platform_authorization_refresh.file_lock import exclusive_lock, lock_path_for
+
+DEFAULT_CLIENT_NAME = "default"
+
+BUDGET_STATE_SUFFIX = ".budget.json"
+
+
+@dataclass(frozen=True)
+class OAuthClient:
+    """One app registration. client_id holds the TikTok client key for TikTok registrations."""
+    name: str
+    client_id: str
+    client_secret: str
+    requests_per_minute: Optional[float] = None
+
+
+class RateBudget:
+    """
+    Token bucket limiting the token requests sent through one registration.
+
+    With a state file, the bucket is stored in it under `key` and shared by every process using
+    the file; without one, it only lives in this process.
+    """
+
+    def __init__(self, requests_per_minute: float, state_file: Optional[Path] = None, key: str = "") -> None:
+        self.capacity = max(1.0, requests_per_minute)
+        self.rate = requests_per_minute / 60.0
+        self.state_file = state_file
+        self.key = key
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self, available: float, elapsed: float) -> Tuple[float, float]:
+        """Refill a bucket for the elapsed seconds and take one request. Returns (available, seconds to wait)."""
+        available = min(self.capacity, available + max(0.0, elapsed) * self.rate)
+        if available >= 1:
+            return available - 1, 0.0
+        return available, (1 - available) / self.rate
+
+    def try_acquire(self) -> float:
+        """Take one request from the budget. Returns 0 on success, else the seconds to wait before retrying."""
+        if self.state_file is not None:
+            return self._try_acquire_shared(self.state_file)
+        with self.lock:
+            now = time.monotonic()
+            self.available, wait = self._take(self.available, now - self.updated_at)
+            self.updated_at = now
+            return wait
+
+    def _try_acquire_shared(self, state_file: Path) -> float:
+        # Wall-clock time: monotonic clocks are not comparable between processes.
+        with exclusive_lock(lock_path_for(state_file)):
+            state = _read_budget_state(state_file)
+            now = time.time()
+            bucket = state.get(self.key) or {}
+            available, wait = self._take(float(bucket.get("available", self.capacity)),
+                                         now - float(bucket.get("updatedOn", now)))
+            state[self.key] = {"available": available, "updatedOn": now}
+            _write_budget_state(state_file, state)
+        return wait
+
+    def acquire(self) -> None:
+        """Block until one request is available."""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+def budget_state_path(config_file: Path) -> Path:
+    """The shared rate budget state lives next to the pool config file."""
+    return config_file.with_name(config_file.name + BUDGET_STATE_SUFFIX)
+
+
+def _read_budget_state(state_file: Path) -> Dict[str, Any]:
+    """The stored buckets; a missing or damaged file starts every bucket full."""
+    try:
+        with state_file.open("r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_budget_state(state_file: Path, state: Dict[str, Any]) -> None:
+    temp_path = state_file.with_name(f".{state_file.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, state_file)
+
+
+class OAuthClientPool:
+    """
+    The registrations available per platform, with their rate budgets.
+
+    :param budget_file: Shared rate budget state file (see the module docstring); None keeps the
+                        budgets in this process only.
+    """
+
+    def __init__(self, clients: Dict[str, List[OAuthClient]], budget_file: Optional[Path] = None) -> None:
+        for platform, platform_clients in clients.items():
+            if not platform_clients:
+                raise ValueError(f"No OAuth client registrations configured for platform '{platform}'")
+            names = [client.name for client in platform_clients]
+            if len(set(names)) != len(names):
+                raise ValueError(f"Duplicate OAuth client names for platform '{platform}': {names}")
+        self.clients = clients
+        self.budgets: Dict[tuple, RateBudget] = {
+            (platform, client.name): RateBudget(client.requests_per_minute, budget_file, f"{platform}/{client.name}")
+            for platform, platform_clients in clients.items()
+            for client in platform_clients if client.requests_per_minute
+        }
+
+    def assign(self, platform: str, account: str, stored_name: Optional[str] = None) -> OAuthClient:
+        """
+        Return the registration an account's token requests go through.
+
+        :param platform: "youtube" or "tiktok".
+        :param account: The account key (case insensitive).
+        :param stored_name: The assignment stored in the credentials entry, if any.
+        """
+        platform_clients = self.clients.get(platform)
+        if not platform_clients:
+            raise ValueError(f"Unsupported platform: {platform}")
+        for client in platform_clients:
+            if client.name == stored_name:
+                return client
+        return max(platform_clients, key=lambda client: _rendezvous_score(client.name, account))
+
+    def resolve(self, platform: str, account: str, creds_file: str) -> OAuthClient:
+        """Assign an account using the assignment stored in its credentials file, if any."""
+        return self.assign(platform, account, stored_client_name(creds_file, account))
+
+    def acquire(self, platform: str, client: OAuthClient) -> None:
+        """Wait for the registration's rate budget, if it has one."""
+        budget = self.budgets.get((platform, client.name))
+        if budget is not None:
+            budget.acquire()
+
+
+def _rendezvous_score(client_name: str, account: str) -> int:
+    digest = hashlib.sha256(f"{client_name}\x00{account.lower()}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def default_pool() -> OAuthClientPool:
+    """A pool with the single registration hard-coded in each platform module."""
+    return OAuthClientPool({
+        "youtube": [OAuthClient(DEFAULT_CLIENT_NAME, youtube_auth_refresh.CLIENT_ID,
+                                youtube_auth_refresh.CLIENT_SECRET)],
+        "tiktok": [OAuthClient(DEFAULT_CLIENT_NAME, tiktok_auth_refresh.CLIENT_KEY,
+                               tiktok_auth_refresh.CLIENT_SECRET)],
+    })
+
+
+def load_pool(config_file: Optional[Path]) -> OAuthClientPool:
+    """
+    Load the registrations from a JSON config file (see the module docstring).
+    Platforms missing from the file keep their built-in default registration.
+    """
+    if config_file is None:
+        return default_pool()
+    with config_file.open("r", encoding="utf-8-sig") as f:
+        config = json.load(f)
+
+    clients = dict(default_pool().clients)
+    for platform, entries in config.items():
+        platform = platform.lower()
+        if platform not in clients:
+            raise ValueError(f"Unsupported platform in {config_file}: {platform}")
+        id_field = "client_key" if platform == "tiktok" else "client_id"
+        clients[platform] = [
+            OAuthClient(name=entry["name"], client_id=entry[id_field], client_secret=entry["client_secret"],
+                        requests_per_minute=entry.get("requests_per_minute"))
+            for entry in entries
+        ]
+    return OAuthClientPool(clients, budget_state_path(config_file))
+
+
+def stored_client_name(creds_file: str, account: str) -> Optional[str]:
+    """
+    Read the "oauthClient" assignment of an account from its credentials file.
+
+    Entries written before assignments existed were issued by the built-in registration and map to
+    DEFAULT_CLIENT_NAME; accounts that are not in the file yet have no assignment (None).
+    """
+    creds_file_path = Path(creds_file)
+    if not creds_file_path.exists():
+        return None
+    found = find_credentials(creds_file_path, account)
+    if found is None:
+        return None
+    return found[1].get("oauthClient", DEFAULT_CLIENT_NAME)
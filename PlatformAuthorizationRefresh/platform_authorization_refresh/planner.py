@@ -0,0 +1,367 @@
+"""
+Refresh wave planner.
+
+Before a big re-authorization day, tells how many consent flows and headless refreshes land in
+each wave (one hour by default) and in which order to run them. All accounts' expiry timestamps
+are loaded into NumPy arrays, so the analysis and the schedule of a 100k-account fleet take a
+fraction of a second.
+
+Two kinds of jobs are planned:
+  * consent  - the refresh token expires within the horizon, or the poller reported the account
+               in AuthorizationRefreshNotifications.json. Needs an operator to complete a consent
+               flow, so it is bound by the operator capacity and by the platform's rate budget.
+  * headless - only the access token expires within the horizon; the consumer refreshes it with
+               the refresh token. Bound by the platform's rate budget only.
+
+Jobs are scheduled earliest deadline first into consecutive waves. Consent flows are placed
+first (they are the scarce resource); headless refreshes fill the platform budget left in each
+wave. A job whose wave starts after its deadline is reported as late.
+
+The job list is written as JSON and can be fed to the work queue, which only runs consent flows:
+    PlatformAuthorizationRefresh.exe queue seed --queue_file <path> --plan_file <plan.json>
+
+Usage:
+    PlatformAuthorizationRefresh.exe plan --output <plan.json>
+        [--youtube_creds_file_path <path>] [--tiktok_creds_file_path <path>]
+        [--notifications_file_path <path>] [--horizon_hours 168] [--wave_minutes 60]
+        [--operator_per_hour 30] [--youtube_per_hour N] [--tiktok_per_hour N] [--oauth_clients_file <path>]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from platform_authorization_refresh import oauth_clients, work_queue
+from platform_authorization_refresh.credentials_reader import iter_credentials
+from platform_authorization_refresh.utils import Colors, format_utc_timestamp, parse_utc_timestamp, print_status
+
+PLATFORMS: Tuple[str, ...] = work_queue.SUPPORTED_PLATFORMS
+
+KIND_CONSENT = "consent"
+KIND_HEADLESS = "headless"
+
+
+@dataclass
+class ExpiryArrays:
+    """Expiry data of every account, one array element per account (timestamps in Unix seconds, NaN if unknown)."""
+    platform: np.ndarray          # index into PLATFORMS
+    account: np.ndarray           # account keys (object array)
+    access_expires: np.ndarray
+    refresh_expires: np.ndarray
+    pending: np.ndarray           # reported in the notifications file
+
+
+@dataclass
+class Plan:
+    """A schedule over consecutive waves; the job arrays are sorted by (wave, deadline)."""
+    start: float
+    wave_seconds: float
+    platform: np.ndarray
+    account: np.ndarray
+    kind: np.ndarray              # True for consent flows, False for headless refreshes
+    deadline: np.ndarray
+    wave: np.ndarray
+
+    @property
+    def late(self) -> np.ndarray:
+        return self.start + self.wave * self.wave_seconds > self.deadline
+
+
+def parse_timestamps(values: List[Optional[str]]) -> np.ndarray:
+    """
+    Convert ISO 8601 timestamps to Unix seconds (NaN for missing or unparsable values).
+    The "...Z" format written by update_credentials_json is parsed by NumPy in one call;
+    anything else falls back to the per-value parser.
+    """
+    stamps = None
+    if all(not value or (isinstance(value, str) and value.endswith("Z")) for value in values):
+        try:
+            stamps = np.array([value[:-1] if value else "NaT" for value in values], dtype="datetime64[us]")
+        except ValueError:
+            pass
+    if stamps is None:
+        parsed = (parse_utc_timestamp(value) if isinstance(value, str) else None for value in values)
+        return np.array([value.timestamp() if value else np.nan for value in parsed], dtype=np.float64)
+    seconds = stamps.astype(np.int64) / 1e6
+    seconds[np.isnat(stamps)] = np.nan
+    return seconds
+
+
+def load_expiry_arrays(creds_files: Dict[str, Path], notifications_file: Optional[Path]) -> ExpiryArrays:
+    """Read the credentials and notifications files into column arrays."""
+    pending_keys = set()
+    if notifications_file is not None:
+        pending_keys = {(platform, account.lower())
+                        for platform, account in work_queue.jobs_from_notifications(notifications_file)}
+
+    platforms: List[int] = []
+    accounts: List[str] = []
+    access: List[Optional[str]] = []
+    refresh: List[Optional[str]] = []
+    for platform, creds_path in creds_files.items():
+        code = PLATFORMS.index(platform)
+        for account, entry in iter_credentials(creds_path):
+            platforms.append(code)
+            accounts.append(account)
+            access.append(entry.get("accessTokenExpiresOn"))
+            refresh.append(entry.get("refreshTokenExpiresOn"))
+
+    platform_array = np.array(platforms, dtype=np.int8)
+    account_array = np.array(accounts, dtype=object)
+    pending = np.fromiter(((PLATFORMS[code], account.lower()) in pending_keys
+                           for code, account in zip(platforms, accounts)), dtype=bool, count=len(accounts))
+    return ExpiryArrays(platform_array, account_array, parse_timestamps(access), parse_timestamps(refresh), pending)
+
+
+def expiry_histograms(expiry: ExpiryArrays, start: float, wave_seconds: float,
+                      waves: int) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Count the access and refresh token expiries per platform and wave.
+    Bucket 0 holds the tokens that have already expired; bucket i the expiries of wave i-1.
+    """
+    histograms: Dict[str, Dict[str, np.ndarray]] = {}
+    for code, platform in enumerate(PLATFORMS):
+        mask = expiry.platform == code
+        histograms[platform] = {}
+        for name, values in (("access", expiry.access_expires[mask]), ("refresh", expiry.refresh_expires[mask])):
+            values = values[~np.isnan(values)]
+            buckets = np.floor((values - start) / wave_seconds).astype(np.int64) + 1
+            buckets = np.clip(buckets, 0, None)
+            histograms[platform][name] = np.bincount(buckets[buckets <= waves], minlength=waves + 1)
+    return histograms
+
+
+def schedule_consent(platform: np.ndarray, deadline: np.ndarray, operator_per_wave: int,
+                     platform_per_wave: List[Optional[int]]) -> np.ndarray:
+    """
+    Assign consent jobs to waves, earliest deadline first, so that no wave exceeds the operator
+    capacity or any platform's budget. Returns the wave index of each job.
+
+    A wave can only take each platform's earliest min(budget, operator capacity) jobs, so each
+    wave merges those small per-platform heads instead of rescanning all remaining jobs.
+    """
+    waves = np.zeros(len(deadline), dtype=np.int64)
+    order = np.argsort(deadline, kind="stable")
+    queues = [order[platform[order] == code] for code in range(len(PLATFORMS))]
+    heads = [0] * len(PLATFORMS)
+    take_limits = [operator_per_wave if budget is None else min(budget, operator_per_wave)
+                   for budget in platform_per_wave]
+    remaining = len(deadline)
+    wave = 0
+    while remaining:
+        candidates = np.concatenate([queue[head:head + limit]
+                                     for queue, head, limit in zip(queues, heads, take_limits)])
+        taken = candidates[np.argsort(deadline[candidates], kind="stable")[:operator_per_wave]]
+        waves[taken] = wave
+        taken_per_platform = np.bincount(platform[taken], minlength=len(PLATFORMS))
+        for code in range(len(PLATFORMS)):
+            heads[code] += int(taken_per_platform[code])
+        remaining -= len(taken)
+        wave += 1
+    return waves
+
+
+def schedule_headless(deadline: np.ndarray, budget: Optional[int], used: np.ndarray) -> np.ndarray:
+    """
+    Assign one platform's headless jobs to waves, earliest deadline first, into the budget left
+    after the consent flows (`used` per wave). Returns the wave index of each job, in input order.
+    """
+    if budget is None or not len(deadline):
+        return np.zeros(len(deadline), dtype=np.int64)
+    waves_needed = len(used) + -(-len(deadline) // budget)
+    capacity = np.full(waves_needed, budget, dtype=np.int64)
+    capacity[:len(used)] -= used
+    cumulative = np.cumsum(capacity)
+    order = np.argsort(deadline, kind="stable")
+    waves = np.empty(len(deadline), dtype=np.int64)
+    waves[order] = np.searchsorted(cumulative, np.arange(len(deadline)), side="right")
+    return waves
+
+
+def build_plan(expiry: ExpiryArrays, start: float, horizon_seconds: float, wave_seconds: float,
+               operator_per_hour: int, platform_per_hour: Dict[str, Optional[int]]) -> Plan:
+    """
+    Select the jobs due within the horizon and schedule them into waves.
+
+    :param operator_per_hour: Consent flows the operators can complete per hour.
+    :param platform_per_hour: Token requests allowed per hour per platform (None: unlimited).
+    """
+    scale = wave_seconds / 3600
+    operator_per_wave = max(1, int(operator_per_hour * scale))
+    platform_per_wave = [None if platform_per_hour.get(platform) is None
+                         else max(1, int(platform_per_hour[platform] * scale)) for platform in PLATFORMS]
+    end = start + horizon_seconds
+
+    # NaN compares False, so accounts without expiry data are only planned when pending.
+    consent = expiry.pending | (expiry.refresh_expires <= end)
+    headless = ~consent & (expiry.access_expires <= end)
+    # Already expired tokens are due immediately (the expiry analysis reports them separately).
+    consent_deadline = np.where(expiry.pending, start, np.fmax(expiry.refresh_expires, start))[consent]
+    headless_deadline = np.fmax(expiry.access_expires[headless], start)
+
+    consent_platform = expiry.platform[consent]
+    consent_waves = schedule_consent(consent_platform, consent_deadline, operator_per_wave, platform_per_wave)
+    headless_platform = expiry.platform[headless]
+    headless_waves = np.zeros(len(headless_deadline), dtype=np.int64)
+    for code, budget in enumerate(platform_per_wave):
+        mask = headless_platform == code
+        used = np.bincount(consent_waves[consent_platform == code], minlength=1)
+        headless_waves[mask] = schedule_headless(headless_deadline[mask], budget, used)
+
+    platform = np.concatenate([consent_platform, headless_platform])
+    deadline = np.concatenate([consent_deadline, headless_deadline])
+    wave = np.concatenate([consent_waves, headless_waves])
+    order = np.lexsort((deadline, wave))
+    return Plan(start=start, wave_seconds=wave_seconds, platform=platform[order],
+                account=np.concatenate([expiry.account[consent], expiry.account[headless]])[order],
+                kind=np.concatenate([np.ones(len(consent_waves), dtype=bool),
+                                     np.zeros(len(headless_waves), dtype=bool)])[order],
+                deadline=deadline[order], wave=wave[order])
+
+
+def _format_timestamp(seconds: float) -> str:
+    return format_utc_timestamp(datetime.fromtimestamp(seconds, timezone.utc))
+
+
+def write_plan(plan: Plan, output_path: Path) -> None:
+    """Write the job list as JSON, atomically (see work_queue.jobs_from_plan for the reader)."""
+    wave_starts = {int(wave): _format_timestamp(plan.start + wave * plan.wave_seconds)
+                   for wave in np.unique(plan.wave)}
+    jobs = [{
+        "wave": int(wave),
+        "startsOn": wave_starts[int(wave)],
+        "platform": PLATFORMS[code],
+        "account": account,
+        "kind": KIND_CONSENT if consent else KIND_HEADLESS,
+        "deadline": _format_timestamp(deadline),
+    } for wave, code, account, consent, deadline
+        in zip(plan.wave.tolist(), plan.platform.tolist(), plan.account.tolist(), plan.kind.tolist(),
+               plan.deadline.tolist())]
+    document = {"generatedOn": _format_timestamp(plan.start), "waveMinutes": plan.wave_seconds / 60, "jobs": jobs}
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(document, f, indent=1)
+    os.replace(temp_path, output_path)
+
+
+def print_plan(plan: Plan, histograms: Dict[str, Dict[str, np.ndarray]], show_waves: int) -> None:
+    """Print the expiry analysis and the busiest part of the schedule."""
+    print("\n" + "-" * 30 + " Expiry Analysis " + "-" * 30)
+    for platform, platform_histograms in histograms.items():
+        refresh, access = platform_histograms["refresh"], platform_histograms["access"]
+        busiest = int(np.argmax(refresh[1:])) if len(refresh) > 1 else 0
+        print(f"{Colors.BOLD}{platform}:{Colors.ENDC} refresh tokens already expired {refresh[0]}, "
+              f"expiring in horizon {refresh[1:].sum()} (peak {refresh[1:].max(initial=0)} in wave {busiest}); "
+              f"access tokens expiring in horizon {access[1:].sum()}")
+
+    waves = int(plan.wave.max()) + 1 if len(plan.wave) else 0
+    print("\n" + "-" * 30 + " Refresh Waves " + "-" * 30)
+    print(f"{'Wave':>5}  {'Starts (UTC)':<20}" + "".join(f"{platform + ' ' + kind:>18}"
+                                                         for platform in PLATFORMS
+                                                         for kind in (KIND_CONSENT, KIND_HEADLESS)) + f"{'late':>8}")
+    counts = np.zeros((waves, len(PLATFORMS), 2), dtype=np.int64)
+    np.add.at(counts, (plan.wave, plan.platform, plan.kind.astype(np.int64)), 1)
+    late = np.bincount(plan.wave[plan.late], minlength=waves)
+    for wave in range(min(waves, show_waves)):
+        starts = datetime.fromtimestamp(plan.start + wave * plan.wave_seconds, timezone.utc)
+        cells = "".join(f"{counts[wave, code, kind]:>18}" for code in range(len(PLATFORMS)) for kind in (1, 0))
+        print(f"{wave:>5}  {starts:%Y-%m-%d %H:%M}    {cells}{late[wave]:>8}")
+    if waves > show_waves:
+        print(f"  ... {waves - show_waves} more wave(s)")
+
+    late_total = int(plan.late.sum())
+    color = Colors.RED if late_total else Colors.GREEN
+    print(f"{color}{len(plan.wave)} job(s) in {waves} wave(s) "
+          f"({int(plan.kind.sum())} consent, {int((~plan.kind).sum())} headless), {late_total} late{Colors.ENDC}")
+    print("-" * 80)
+
+
+def platform_budgets(args: argparse.Namespace) -> Dict[str, Optional[int]]:
+    """
+    Requests per hour per platform: the explicit option, else the sum of the OAuth client pool's
+    requests_per_minute when every registration of the platform has one, else unlimited.
+    """
+    pool = oauth_clients.load_pool(args.oauth_clients_file)
+    budgets: Dict[str, Optional[int]] = {}
+    for platform in PLATFORMS:
+        explicit = getattr(args, f"{platform}_per_hour")
+        clients = pool.clients.get(platform, [])
+        if explicit is not None:
+            budgets[platform] = explicit
+        elif clients and all(client.requests_per_minute for client in clients):
+            budgets[platform] = int(sum(client.requests_per_minute for client in clients) * 60)
+        else:
+            budgets[platform] = None
+    return budgets
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value!r}")
+    return number
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="plan",
+        description="Plan consent flows and headless refreshes into waves under rate and operator budgets.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--youtube_creds_file_path", type=Path, default=None,
+                        help="YouTube credentials JSON file path")
+    parser.add_argument("--tiktok_creds_file_path", type=Path, default=None,
+                        help="TikTok credentials JSON file path")
+    parser.add_argument("--notifications_file_path", type=Path, default=None,
+                        help="AuthorizationRefreshNotifications.json file path (environment variables are expanded)")
+    parser.add_argument("--output", required=True, type=Path, help="Job list JSON file to write")
+    parser.add_argument("--horizon_hours", type=float, default=168, help="Plan the tokens expiring within this window")
+    parser.add_argument("--wave_minutes", type=float, default=60, help="Length of a wave")
+    parser.add_argument("--operator_per_hour", type=_positive_int, default=30,
+                        help="Consent flows the operators can complete per hour")
+    parser.add_argument("--youtube_per_hour", type=_positive_int, default=None,
+                        help="YouTube token requests allowed per hour (default: from --oauth_clients_file, else unlimited)")
+    parser.add_argument("--tiktok_per_hour", type=_positive_int, default=None,
+                        help="TikTok token requests allowed per hour (default: from --oauth_clients_file, else unlimited)")
+    parser.add_argument("--oauth_clients_file", type=Path, default=None,
+                        help="JSON file with the pool of OAuth app registrations and their requests_per_minute")
+    parser.add_argument("--show_waves", type=int, default=24, help="Number of waves to print")
+    args = parser.parse_args(argv)
+
+    creds_files = {"youtube": args.youtube_creds_file_path, "tiktok": args.tiktok_creds_file_path}
+    creds_files = {platform: path for platform, path in creds_files.items() if path is not None}
+    if not creds_files:
+        parser.error("at least one of --youtube_creds_file_path / --tiktok_creds_file_path is required")
+    notifications_file = None
+    if args.notifications_file_path is not None:
+        notifications_file = Path(os.path.expandvars(str(args.notifications_file_path)))
+
+    try:
+        budgets = platform_budgets(args)
+        load_start = time.perf_counter()
+        expiry = load_expiry_arrays(creds_files, notifications_file)
+        plan_start = time.perf_counter()
+        start, wave_seconds = time.time(), args.wave_minutes * 60
+        plan = build_plan(expiry, start, args.horizon_hours * 3600, wave_seconds, args.operator_per_hour, budgets)
+        horizon_waves = int(np.ceil(args.horizon_hours * 3600 / wave_seconds))
+        histograms = expiry_histograms(expiry, start, wave_seconds, horizon_waves)
+        plan_end = time.perf_counter()
+        write_plan(plan, args.output)
+    except Exception as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
+
+    print_status(f"Loaded {len(expiry.account)} accounts in {plan_start - load_start:.2f}s, "
+                 f"planned in {plan_end - plan_start:.3f}s", Colors.BLUE)
+    print_plan(plan, histograms, args.show_waves)
+    print_status(f"Job list written to {args.output}", Colors.GREEN)
@@ -0,0 +1,107 @@
+"""
+Opt-in profiler for refresh runs and GUI sessions (--profile).
+
+Two views of the same run are recorded:
+  * cProfile of the main thread, written as a .pstats file (open with pstats or snakeviz).
+  * A wall-clock stack sampler over all threads, written as collapsed stacks
+    ("phase;thread;outer;...;inner count" per line), ready for flamegraph.pl or speedscope.
+    Every sample is tagged with the flow phase that was active when it was taken
+    (see refresh_history.PhaseTimer), so the flame graph splits by phase at its root.
+
+Nothing here is imported unless --profile is given, so a normal run pays nothing for it.
+This module only uses the standard library: gui_add_account.py, which runs as a standalone
+script, imports it from the same folder.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Default sampling interval of the stack sampler (100 samples per second).
+SAMPLE_INTERVAL_SECONDS = 0.01
+
+IDLE_PHASE = "no_phase"
+
+
+def default_profile_dir() -> Path:
+    """The Logs folder next to the executable (PyInstaller build) or next to this package."""
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent / "Logs"
+    return Path(__file__).parent / "Logs"
+
+
+class RunProfiler:
+    """
+    Profiles a run until stopped, then writes <output_base>.pstats and <output_base>.collapsed.txt.
+
+    Usage:
+        profiler = RunProfiler(Path("Logs/refresh_profile_20250420_125830"))
+        profiler.start()
+        profiler.set_phase("authorize")
+        ...
+        pstats_path, collapsed_path = profiler.stop()
+    """
+
+    def __init__(self, output_base: Path, interval: float = SAMPLE_INTERVAL_SECONDS) -> None:
+        self.output_base = output_base
+        self.interval = interval
+        self.phase = IDLE_PHASE
+        self.samples: Counter = Counter()
+        self._profile = cProfile.Profile()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+
+    def set_phase(self, name: Optional[str]) -> None:
+        """Tag the following samples with a flow phase (None: no phase)."""
+        self.phase = name or IDLE_PHASE
+
+    def start(self) -> None:
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> Tuple[Path, Path]:
+        """Stop profiling and write both files. Returns (pstats path, collapsed stacks path)."""
+        self._profile.disable()
+        self._stop.set()
+        self._sampler.join()
+
+        self.output_base.parent.mkdir(parents=True, exist_ok=True)
+        pstats_path = self.output_base.with_name(self.output_base.name + ".pstats")
+        collapsed_path = self.output_base.with_name(self.output_base.name + ".collapsed.txt")
+        self._profile.dump_stats(str(pstats_path))
+        with collapsed_path.open("w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        return pstats_path, collapsed_path
+
+    def _sample_loop(self) -> None:
+        own_id = threading.get_ident()
+        code_names: Dict[object, str] = {}
+        while not self._stop.wait(self.interval):
+            phase = self.phase
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = code_names.get(code)
+                    if name is None:
+                        # ';' separates frames and ' ' the count in the collapsed format.
+                        name = f"{code.co_name}({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                        name = code_names[code] = name.replace(";", ":").replace(" ", "_")
+                    stack.append(name)
+                    frame = frame.f_back
+                thread_name = thread_names.get(thread_id, str(thread_id)).replace(";", ":").replace(" ", "_")
+                self.samples[";".join([phase.replace(" ", "_"), thread_name] + stack[::-1])] += 1
+
+
+def profile_output_base(directory: Path, prefix: str) -> Path:
+    """A timestamped output base path, e.g. <directory>/<prefix>_20250420_125830."""
+    return directory / f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}"
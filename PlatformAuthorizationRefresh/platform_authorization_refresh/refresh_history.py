@@ -0,0 +1,317 @@
+"""
+Refresh history store and latency/failure analytics.
+
+Every refresh attempt made through auth_manager.main() is appended to a small SQLite database
+(platform, account, mode, start time, per-phase durations, outcome and error class). The
+`stats` subcommand streams over the attempts in a time range - answered from the started_at
+index, not a full scan - and reports the flow duration percentiles of the successful attempts,
+failure and timeout counts per platform, and accounts that keep failing. Failed attempts are left
+out of the percentiles: a timeout records the whole wait window, so it would measure the
+--timeout setting rather than refresh latency.
+
+Usage:
+    PlatformAuthorizationRefresh.exe stats (--history_file <path_to_RefreshHistory.db> | --creds_file_path <path>)
+        [--since <ISO time>] [--until <ISO time>] [--platform youtube|tiktok] [--min_failures N]
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from platform_authorization_refresh.utils import Colors, format_utc_timestamp, parse_utc_timestamp, print_status
+
+HISTORY_FILE_NAME = "RefreshHistory.db"
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_FAILURE = "failure"
+OUTCOME_TIMEOUT = "timeout"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refresh_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    account TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration_seconds REAL NOT NULL,
+    phases TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    error_class TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_refresh_attempts_started_at ON refresh_attempts (started_at);
+CREATE INDEX IF NOT EXISTS ix_refresh_attempts_account ON refresh_attempts (platform, account, started_at);
+"""
+
+
+@dataclass
+class RefreshAttempt:
+    """A single refresh attempt as stored in the history database."""
+    platform: str
+    account: str
+    mode: str
+    started_at: float
+    duration_seconds: float
+    phases: Dict[str, float]
+    outcome: str
+    error_class: Optional[str] = None
+
+
+class PhaseTimer:
+    """
+    Measures the wall-clock duration of the named phases of a refresh flow.
+
+    Usage:
+        timer = PhaseTimer()
+        with timer.phase("authorize"):
+            ...
+        timer.phases  # {"authorize": 12.3}
+
+    :param listener: Called with the phase name when a phase starts and with the enclosing
+                     phase (None at the top level) when it ends, e.g. RunProfiler.set_phase.
+    """
+
+    def __init__(self, listener: Optional[Callable[[Optional[str]], None]] = None) -> None:
+        self.started_at: float = time.time()
+        self._start_monotonic: float = time.monotonic()
+        self.phases: Dict[str, float] = {}
+        self.listener = listener
+        self._active: List[str] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.monotonic()
+        self._active.append(name)
+        if self.listener is not None:
+            self.listener(name)
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.monotonic() - start, 3)
+            self._active.pop()
+            if self.listener is not None:
+                self.listener(self._active[-1] if self._active else None)
+
+    @property
+    def elapsed(self) -> float:
+        return round(time.monotonic() - self._start_monotonic, 3)
+
+
+def default_history_file(creds_file: str) -> Path:
+    """The history database lives next to the credentials file it describes."""
+    return Path(creds_file).with_name(HISTORY_FILE_NAME)
+
+
+def connect(history_file: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the history database."""
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(history_file), timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def classify_outcome(error: Optional[BaseException]) -> Tuple[str, Optional[str]]:
+    """Map the exception raised by a refresh attempt (if any) to (outcome, error_class)."""
+    if error is None:
+        return OUTCOME_SUCCESS, None
+    outcome = OUTCOME_TIMEOUT if isinstance(error, TimeoutError) else OUTCOME_FAILURE
+    return outcome, type(error).__name__
+
+
+def record_attempt(history_file: Path, attempt: RefreshAttempt) -> None:
+    """Append one attempt to the history database."""
+    connection = connect(history_file)
+    try:
+        with connection:
+            connection.execute(
+                "INSERT INTO refresh_attempts (platform, account, mode, started_at, duration_seconds, "
+                "phases, outcome, error_class) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (attempt.platform, attempt.account.lower(), attempt.mode, attempt.started_at,
+                 attempt.duration_seconds, json.dumps(attempt.phases, separators=(",", ":")),
+                 attempt.outcome, attempt.error_class)
+            )
+    finally:
+        connection.close()
+
+
+def connect_read_only(history_file: Path) -> sqlite3.Connection:
+    """
+    Open an existing history database for reading, without creating or migrating it.
+    :raises FileNotFoundError: If the database does not exist.
+    """
+    if not history_file.is_file():
+        raise FileNotFoundError(f"History file not found at {history_file}")
+    return sqlite3.connect(f"{history_file.resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+
+
+def iter_attempts(history_file: Path, since: Optional[float] = None, until: Optional[float] = None,
+                  platform: Optional[str] = None) -> Iterator[RefreshAttempt]:
+    """
+    Stream attempts in chronological order, restricted to [since, until) via the started_at index.
+    The database is opened read-only once iteration starts and closed when it ends.
+
+    :raises FileNotFoundError: If the database does not exist (checked when this is called).
+    """
+    if not history_file.is_file():
+        raise FileNotFoundError(f"History file not found at {history_file}")
+    clauses: List[str] = []
+    params: List[object] = []
+    if since is not None:
+        clauses.append("started_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("started_at < ?")
+        params.append(until)
+    if platform:
+        clauses.append("platform = ?")
+        params.append(platform.lower())
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    query = ("SELECT platform, account, mode, started_at, duration_seconds, phases, outcome, error_class "
+             f"FROM refresh_attempts {where}ORDER BY started_at")
+    return _iter_rows(history_file, query, params)
+
+
+def _iter_rows(history_file: Path, query: str, params: List[object]) -> Iterator[RefreshAttempt]:
+    connection = connect_read_only(history_file)
+    try:
+        for row in connection.execute(query, params):
+            yield RefreshAttempt(platform=row[0], account=row[1], mode=row[2], started_at=row[3],
+                                 duration_seconds=row[4], phases=json.loads(row[5]),
+                                 outcome=row[6], error_class=row[7])
+    finally:
+        connection.close()
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class PlatformStats:
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    # Flow durations of the successful attempts, sorted
+    durations: List[float] = field(default_factory=list)
+    error_classes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+
+@dataclass
+class HistoryStats:
+    platforms: Dict[str, PlatformStats]
+    # (platform, account) -> number of consecutive failures ending with the latest attempt
+    failure_streaks: Dict[Tuple[str, str], int]
+
+
+def compute_stats(attempts: Iterator[RefreshAttempt]) -> HistoryStats:
+    """Aggregate a chronological stream of attempts in a single pass."""
+    platforms: Dict[str, PlatformStats] = {}
+    streaks: Dict[Tuple[str, str], int] = {}
+    for attempt in attempts:
+        stats = platforms.setdefault(attempt.platform, PlatformStats())
+        stats.attempts += 1
+        key = (attempt.platform, attempt.account)
+        if attempt.outcome == OUTCOME_SUCCESS:
+            stats.successes += 1
+            stats.durations.append(attempt.duration_seconds)
+            streaks[key] = 0
+        else:
+            if attempt.outcome == OUTCOME_TIMEOUT:
+                stats.timeouts += 1
+            else:
+                stats.failures += 1
+            error_class = attempt.error_class or attempt.outcome
+            stats.error_classes[error_class] = stats.error_classes.get(error_class, 0) + 1
+            streaks[key] = streaks.get(key, 0) + 1
+    for stats in platforms.values():
+        stats.durations.sort()
+    return HistoryStats(platforms=platforms, failure_streaks=streaks)
+
+
+def print_stats(stats: HistoryStats, min_failures: int) -> None:
+    """Print the aggregated statistics to the console."""
+    if not stats.platforms:
+        print_status("No refresh attempts found in the selected range.", Colors.YELLOW)
+        return
+
+    print("\n" + "-" * 30 + " Refresh Statistics " + "-" * 30)
+    for platform, platform_stats in sorted(stats.platforms.items()):
+        print(f"{Colors.BOLD}{platform}:{Colors.ENDC} {platform_stats.attempts} attempts, "
+              f"success rate {platform_stats.success_rate:.1%} "
+              f"({platform_stats.failures} failed, {platform_stats.timeouts} timed out)")
+        if platform_stats.durations:
+            p50, p95, p99 = (percentile(platform_stats.durations, pct) for pct in (50, 95, 99))
+            print(f"  Successful flow duration p50/p95/p99: {p50:.1f}s / {p95:.1f}s / {p99:.1f}s")
+        else:
+            print("  Successful flow duration: no successful attempts")
+        for error_class, count in sorted(platform_stats.error_classes.items(), key=lambda kv: -kv[1]):
+            print(f"  {error_class}: {count}")
+
+    chronic = sorted(((streak, platform, account) for (platform, account), streak
+                      in stats.failure_streaks.items() if streak >= min_failures), reverse=True)
+    print(f"\n{Colors.BOLD}Chronic failures ({min_failures}+ consecutive):{Colors.ENDC} {len(chronic)}")
+    for streak, platform, account in chronic:
+        print(f"{Colors.RED}  {platform} {account}: {streak} failures in a row{Colors.ENDC}")
+    print("-" * 80)
+
+
+def _parse_time_argument(value: str) -> float:
+    parsed = parse_utc_timestamp(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"invalid ISO 8601 time: {value!r}")
+    return parsed.timestamp()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="stats",
+        description="Report successful refresh latency percentiles, failure and timeout counts, and chronic "
+                    "failures from the history store.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--history_file", type=Path, default=None, help="Refresh history database")
+    source.add_argument("--creds_file_path", default=None,
+                        help=f"Credentials JSON file whose history to read ({HISTORY_FILE_NAME} next to it)")
+    parser.add_argument("--since", type=_parse_time_argument, default=None,
+                        help="Only include attempts started at or after this ISO 8601 time (UTC if no offset)")
+    parser.add_argument("--until", type=_parse_time_argument, default=None,
+                        help="Only include attempts started before this ISO 8601 time (UTC if no offset)")
+    parser.add_argument("--platform", choices=["tiktok", "youtube"], type=str.lower, default=None,
+                        help="Only include attempts for this platform")
+    parser.add_argument("--min_failures", type=int, default=3,
+                        help="Consecutive failures after which an account is reported as chronically failing")
+    args = parser.parse_args(argv)
+
+    if args.history_file is None:
+        args.history_file = default_history_file(args.creds_file_path)
+    if not args.history_file.is_file():
+        print_status(f"Error: History file not found at {args.history_file}", Colors.RED)
+        sys.exit(1)
+
+    range_text = " ".join(f"{label} {format_utc_timestamp(datetime.fromtimestamp(ts, timezone.utc))}"
+                          for label, ts in (("since", args.since), ("until", args.until)) if ts is not None)
+    print_status(f"Reading refresh history from {args.history_file}"
+                 + (f" ({range_text})" if range_text else ""), Colors.BLUE)
+    try:
+        stats = compute_stats(iter_attempts(args.history_file, args.since, args.until, args.platform))
+    except (OSError, sqlite3.Error) as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
+    print_stats(stats, args.min_failures)
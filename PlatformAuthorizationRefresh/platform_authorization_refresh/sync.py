@@ -0,0 +1,261 @@
+"""
+Incremental replication of a credentials file between hosts through a shared directory.
+
+Each host pushes the entries changed since its previous push (from the change feed, see
+change_feed.py) as a numbered batch into its outbox in the shared directory. Every other host
+pulls the batches newer than the last one it applied from that peer, merges them and writes an
+acknowledgement; batches acknowledged by every known peer are deleted on the next push. The
+bytes exchanged are proportional to the changes, not to the fleet.
+
+    <shared_dir>/<platform>/outbox/<host>/<batch:012d>.json   entries pushed by <host>
+    <shared_dir>/<platform>/acks/<host>.json                  {"<peer>": last batch applied, ...}
+
+Conflicts are resolved per account: the entry with the higher "version" (incremented by every
+update_credentials_json write) wins, and "updatedOn" breaks ties. Entries applied by a pull are
+recorded in the local change feed as "replicated", so local consumers see them incrementally
+and the next push does not echo them back.
+
+The local cursor (host id, last pushed change sequence and batch, batches applied per peer) is
+kept in <creds file>.sync.json. Batches may already be pruned when a new host joins; seed it
+with `push --full` from an up-to-date host.
+
+Usage:
+    PlatformAuthorizationRefresh.exe sync --shared_dir <dir> --platform youtube|tiktok
+        --creds_file_path <path> [--host_id <name>] push [--full]
+    PlatformAuthorizationRefresh.exe sync --shared_dir <dir> --platform youtube|tiktok
+        --creds_file_path <path> [--host_id <name>] pull
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from platform_authorization_refresh import change_feed
+from platform_authorization_refresh.auth_manager import credentials_lock, write_credentials_file
+from platform_authorization_refresh.credentials_reader import iter_credentials
+from platform_authorization_refresh.utils import Colors, format_utc_timestamp, parse_utc_timestamp, print_status
+
+SYNC_STATE_SUFFIX = ".sync.json"
+
+# Change feed action of entries written by a pull; never pushed again.
+ACTION_REPLICATED = "replicated"
+
+
+@dataclass
+class SyncState:
+    """The replication cursor of one credentials file on this host."""
+    host_id: str
+    pushed_seq: int = 0
+    last_batch: int = 0
+    applied: Dict[str, int] = field(default_factory=dict)
+
+
+def sync_state_path(creds_file: str) -> Path:
+    creds_file_path = Path(creds_file)
+    return creds_file_path.with_name(creds_file_path.name + SYNC_STATE_SUFFIX)
+
+
+def load_state(creds_file: str, host_id: str) -> SyncState:
+    path = sync_state_path(creds_file)
+    if not path.is_file():
+        return SyncState(host_id=host_id)
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return SyncState(host_id=host_id, pushed_seq=data.get("pushedSeq", 0), last_batch=data.get("lastBatch", 0),
+                     applied=data.get("applied", {}))
+
+
+def _write_json_atomic(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def save_state(creds_file: str, state: SyncState) -> None:
+    _write_json_atomic(sync_state_path(creds_file), {
+        "hostId": state.host_id, "pushedSeq": state.pushed_seq, "lastBatch": state.last_batch,
+        "applied": state.applied,
+    })
+
+
+def _outbox(shared_dir: Path, platform: str, host_id: str) -> Path:
+    return shared_dir / platform / "outbox" / host_id
+
+
+def _acks_dir(shared_dir: Path, platform: str) -> Path:
+    return shared_dir / platform / "acks"
+
+
+def _batch_number(path: Path) -> Optional[int]:
+    return int(path.stem) if path.suffix == ".json" and path.stem.isdigit() else None
+
+
+def entry_version(entry: Dict[str, Any]) -> Tuple[int, float]:
+    """The conflict resolution key of an entry: (version, updatedOn as Unix time)."""
+    updated_on = parse_utc_timestamp(entry.get("updatedOn"))
+    version = entry.get("version")
+    return (version if isinstance(version, int) else 0), (updated_on.timestamp() if updated_on else 0.0)
+
+
+def push(creds_file: str, platform: str, shared_dir: Path, host_id: str, full: bool = False) -> int:
+    """
+    Publish the entries changed locally since the previous push as the next batch.
+
+    :param full: Publish every entry (first push of a host, or after restoring a file).
+    :return: The number of entries pushed.
+    """
+    state = load_state(creds_file, host_id)
+    latest_seq = change_feed.latest_sequence(creds_file)
+    if full:
+        wanted = None
+    else:
+        changes = change_feed.changed_accounts_since(creds_file, state.pushed_seq)
+        wanted = {account for account, change in changes.items() if change.action != ACTION_REPLICATED}
+        if not wanted:
+            state.pushed_seq = latest_seq
+            save_state(creds_file, state)
+            prune_outbox(shared_dir, platform, host_id)
+            return 0
+
+    entries = {account: entry for account, entry in iter_credentials(Path(creds_file))
+               if wanted is None or account.lower() in wanted}
+    batch = state.last_batch + 1
+    _write_json_atomic(_outbox(shared_dir, platform, host_id) / f"{batch:012d}.json", {
+        "host": host_id, "platform": platform, "batch": batch, "pushedOn": format_utc_timestamp(),
+        "entries": entries,
+    })
+    state.last_batch = batch
+    state.pushed_seq = latest_seq
+    save_state(creds_file, state)
+    prune_outbox(shared_dir, platform, host_id)
+    return len(entries)
+
+
+def prune_outbox(shared_dir: Path, platform: str, host_id: str) -> int:
+    """Delete this host's batches that every peer with an acknowledgement file has applied."""
+    acks_dir = _acks_dir(shared_dir, platform)
+    acknowledged: List[int] = []
+    for ack_file in acks_dir.glob("*.json") if acks_dir.is_dir() else []:
+        if ack_file.stem == host_id:
+            continue
+        try:
+            with ack_file.open("r", encoding="utf-8") as f:
+                acknowledged.append(json.load(f).get(host_id, 0))
+        except (OSError, ValueError):
+            return 0  # Being rewritten; prune on a later push.
+    if not acknowledged:
+        return 0
+    removed = 0
+    outbox = _outbox(shared_dir, platform, host_id)
+    for batch_file in outbox.iterdir() if outbox.is_dir() else []:
+        number = _batch_number(batch_file)
+        if number is not None and number <= min(acknowledged):
+            batch_file.unlink()
+            removed += 1
+    return removed
+
+
+def merge_entries(data: Dict[str, Any], incoming: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Merge incoming entries into the credentials data in place (account keys are case insensitive).
+    Returns the keys of the accounts that were added or replaced.
+    """
+    keys = {account.lower(): account for account in data}
+    changed = []
+    for account, entry in incoming.items():
+        local_key = keys.get(account.lower())
+        if local_key is not None and entry_version(data[local_key]) >= entry_version(entry):
+            continue
+        key = local_key or account
+        data[key] = entry
+        keys[account.lower()] = key
+        changed.append(key)
+    return changed
+
+
+def pull(creds_file: str, platform: str, shared_dir: Path, host_id: str) -> int:
+    """
+    Apply the batches pushed by other hosts since the last pull, oldest first.
+    :return: The number of local entries added or replaced.
+    """
+    state = load_state(creds_file, host_id)
+    incoming: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    outboxes = shared_dir / platform / "outbox"
+    for peer_outbox in sorted(outboxes.iterdir()) if outboxes.is_dir() else []:
+        peer = peer_outbox.name
+        if peer == host_id or not peer_outbox.is_dir():
+            continue
+        batches = []
+        for batch_file in peer_outbox.iterdir():
+            number = _batch_number(batch_file)
+            if number is not None and number > state.applied.get(peer, 0):
+                batches.append((number, batch_file))
+        for number, batch_file in sorted(batches):
+            with batch_file.open("r", encoding="utf-8") as f:
+                batch = json.load(f)
+            for account, entry in batch["entries"].items():
+                current = incoming.get(account.lower())
+                if current is None or entry_version(entry) > entry_version(current[1]):
+                    incoming[account.lower()] = (account, entry)
+            state.applied[peer] = number
+
+    changed: List[str] = []
+    if incoming:
+        creds_file_path = Path(creds_file)
+        # Same lock as update_credentials_json, so a refresh landing mid-merge is not overwritten.
+        with credentials_lock(creds_file):
+            if creds_file_path.exists():
+                with creds_file_path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+            else:
+                data = {}
+            changed = merge_entries(data, dict(incoming.values()))
+            if changed:
+                write_credentials_file(creds_file_path, data)
+                for account in changed:
+                    change_feed.record_change(creds_file, account, platform, ACTION_REPLICATED)
+
+    save_state(creds_file, state)
+    _write_json_atomic(_acks_dir(shared_dir, platform) / f"{host_id}.json", state.applied)
+    return len(changed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="sync",
+        description="Replicate credentials changes between hosts through a shared directory.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--shared_dir", required=True, type=Path, help="Directory shared by all hosts")
+    parser.add_argument("--platform", required=True, choices=["tiktok", "youtube"], type=str.lower,
+                        help="Platform of the credentials file")
+    parser.add_argument("--creds_file_path", required=True, help="Local credentials JSON file path")
+    parser.add_argument("--host_id", default=socket.gethostname(),
+                        help="Name of this host in the shared directory (must be unique per host)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    push_parser = commands.add_parser("push", help="Publish the entries changed since the previous push",
+                                      formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    push_parser.add_argument("--full", action="store_true", default=False,
+                             help="Publish every entry instead of only the changed ones")
+    commands.add_parser("pull", help="Apply the entries pushed by other hosts since the previous pull")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "push":
+            pushed = push(args.creds_file_path, args.platform, args.shared_dir, args.host_id, args.full)
+            print_status(f"Pushed {pushed} {args.platform} entr{'y' if pushed == 1 else 'ies'} "
+                         f"from {args.host_id}.", Colors.GREEN)
+        else:
+            applied = pull(args.creds_file_path, args.platform, args.shared_dir, args.host_id)
+            print_status(f"Pulled {applied} newer {args.platform} entr{'y' if applied == 1 else 'ies'} "
+                         f"into {args.creds_file_path}.", Colors.GREEN)
+    except Exception as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
@@ -30,6 +30,9 @@ tokens: Dict[str, str] = {}  # Unified tokens dictionary
 state: str = ""
 code_verifier: str = ""
 ACCOUNT: Optional[str] = None
+# App registration used by the current flow (defaults to the constants above; see oauth_clients.py)
+active_client_key: str = CLIENT_KEY
+active_client_secret: str = CLIENT_SECRET
 
 def generate_state_token(length: int = 30) -> str:
     """
@@ -59,8 +62,8 @@ def exchange_code_for_tokens(encoded_code: str) -> Optional[Dict[str, str]]:
     """
     token_url = "https://open.tiktokapis.com/v2/oauth/token/"
     data = {
-        "client_key": CLIENT_KEY,
-        "client_secret": CLIENT_SECRET,
+        "client_key": active_client_key,
+        "client_secret": active_client_secret,
         "code": encoded_code,
         "grant_type": "authorization_code",
         "redirect_uri": REDIRECT_URI,
@@ -137,7 +140,8 @@ def run_flask_app() -> None:
     app.run(port=8080, debug=False, host="127.0.0.1")
 
 def refresh_tokens(timeout: int = 60, account: Optional[str] = None,
-                   chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None) -> Tuple[str, str]:
+                   chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None,
+                   client_key: Optional[str] = None, client_secret: Optional[str] = None) -> Tuple[str, str]:
     """
     Execute the TikTok OAuth flow and return (access_token, refresh_token).
 
@@ -145,14 +149,18 @@ def refresh_tokens(timeout: int = 60, account: Optional[str] = None,
     :param account: Optional TikTok username to prefill.
     :param chrome_path: Optional path to a specific Chrome executable.
     :param chrome_profile: Optional Chrome profile directory to use (e.g. "Profile 1").
+    :param client_key: Optional app registration client key (defaults to CLIENT_KEY).
+    :param client_secret: Optional app registration client secret (defaults to CLIENT_SECRET).
     :return: Tuple containing the access token and refresh token.
     :raises TimeoutError: If the authorization times out.
     :raises RuntimeError: If tokens cannot be retrieved.
     """
-    global tokens, state, code_verifier, ACCOUNT
+    global tokens, state, code_verifier, ACCOUNT, active_client_key, active_client_secret
     # Reset globals
     tokens = {}
     ACCOUNT = account
+    active_client_key = client_key or CLIENT_KEY
+    active_client_secret = client_secret or CLIENT_SECRET
 
     print("\n" + "=" * 70)
     print_status("Starting TikTok OAuth authorization process", Colors.HEADER)
@@ -164,7 +172,7 @@ def refresh_tokens(timeout: int = 60, account: Optional[str] = None,
 
     # Build authorization URL
     auth_params = {
-        "client_key": CLIENT_KEY,
+        "client_key": active_client_key,
         "scope": SCOPES,
         "response_type": "code",
         "redirect_uri": REDIRECT_URI,
@@ -1,5 +1,7 @@
 import os
-from datetime import datetime
+import re
+from datetime import datetime, timezone
+from typing import Optional
 
 class Colors:
     HEADER = '\033[95m'
@@ -22,6 +24,41 @@ def print_status(message: str, color: str = Colors.CYAN) -> None:
     timestamp = datetime.now().strftime("%H:%M:%S")
     print(f"{color}[{timestamp}] {message}{Colors.ENDC}")
 
+def format_utc_timestamp(value: Optional[datetime] = None) -> str:
+    """
+    Format a datetime (default: now) as an ISO 8601 UTC string, e.g. "2025-04-20T12:58:30.123456Z".
+    This matches the format Newtonsoft.Json uses for UTC DateTime values on the C# side.
+    """
+    value = value or datetime.now(timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+_FRACTION_PATTERN = re.compile(r"\.(\d+)")
+
+def parse_utc_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 timestamp written by either this package or the C# poller.
+
+    Newtonsoft.Json writes up to 7 fractional digits and a trailing 'Z', which
+    datetime.fromisoformat() does not accept on every supported Python version,
+    so the fraction is trimmed to microseconds first. Naive values are assumed UTC.
+
+    :param value: The timestamp string (may be None or empty).
+    :return: An aware datetime in UTC, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
+    text = value.strip()
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    text = _FRACTION_PATTERN.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
 def enable_windows_terminal_colors() -> None:
     """
     Enables ANSI escape sequence (color) support in Windows terminal (CMD/PowerShell).
@@ -0,0 +1,512 @@
+"""
+Lease-based work queue for running refresh flows on several hosts.
+
+Pending (platform, account) jobs live in a queue store - by default a SQLite file that every
+worker host can reach (e.g. on shared storage next to the credentials files). Workers claim one
+job at a time under a time-limited lease and extend it with heartbeats while the OAuth flow runs.
+A lease that is not extended (crashed or disconnected worker) expires and the job is re-queued,
+or marked failed once it has used all its attempts, so a job that keeps killing its worker does
+not circulate forever.
+Completions are accepted only from the current lease holder, so each job completes exactly once,
+and at most one open job exists per (platform, account), so two hosts never refresh the same
+account at the same time.
+
+A worker runs the OAuth flows of all its jobs through one long-lived callback listener that routes
+each redirect by its OAuth state (see async_refresh.BlockingCallbackServer), whatever the platform.
+
+Note: SQLite relies on the file system's locking; use a share that implements it correctly
+(SMB/local disks do, some NFS setups do not), or plug in another WorkQueueStore implementation.
+
+Usage:
+    PlatformAuthorizationRefresh.exe queue seed --queue_file <path> [--notifications_file_path <path>]
+        [--youtube_creds_file_path <path>] [--tiktok_creds_file_path <path>] [--expiring_within_hours H]
+        [--plan_file <plan.json> [--all_waves]]
+    PlatformAuthorizationRefresh.exe queue work --queue_file <path>
+        --youtube_creds_file_path <path> --tiktok_creds_file_path <path> [--chrome <path>]
+    PlatformAuthorizationRefresh.exe queue status --queue_file <path>
+"""
+
+import argparse
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from platform_authorization_refresh import oauth_clients, refresh_history
+from platform_authorization_refresh.credentials_reader import iter_credentials
+from platform_authorization_refresh.utils import Colors, parse_utc_timestamp, print_status
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+SUPPORTED_PLATFORMS = ("youtube", "tiktok")
+
+
+@dataclass
+class Job:
+    """A claimed unit of work: refresh the tokens of one account on one platform."""
+    job_id: int
+    platform: str
+    account: str
+    attempts: int
+    lease_id: str
+    lease_expires_at: float
+
+
+class WorkQueueStore(ABC):
+    """
+    Storage backend of the work queue.
+
+    Implementations must make claim/heartbeat/complete/fail atomic with respect to every
+    other worker sharing the store; the SQLite implementation does so with write transactions.
+    """
+
+    @abstractmethod
+    def enqueue(self, jobs: Iterable[Tuple[str, str]]) -> int:
+        """Add (platform, account) jobs, skipping accounts that already have an open job. Returns the number added."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Job]:
+        """
+        Lease the oldest pending job, or return None when idle. Expired leases are swept first:
+        their jobs are re-queued, or failed once they have had max_attempts attempts.
+        """
+
+    @abstractmethod
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        """Extend the lease of a job. Returns False if the lease was lost."""
+
+    @abstractmethod
+    def complete(self, job: Job) -> bool:
+        """Mark a job done. Returns False if the lease was lost (the completion is then discarded)."""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str, max_attempts: int) -> bool:
+        """Release a job after a failed attempt; it is re-queued until max_attempts is reached."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refresh_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    account TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    lease_id TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    completed_at REAL,
+    last_error TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_refresh_jobs_open ON refresh_jobs (platform, account)
+    WHERE status IN ('pending', 'leased');
+CREATE INDEX IF NOT EXISTS ix_refresh_jobs_status ON refresh_jobs (status, enqueued_at);
+CREATE INDEX IF NOT EXISTS ix_refresh_jobs_lease ON refresh_jobs (status, lease_expires_at);
+"""
+
+
+class SqliteWorkQueueStore(WorkQueueStore):
+    """Work queue store backed by a single SQLite file."""
+
+    def __init__(self, queue_file: Path, busy_timeout: float = 30.0) -> None:
+        self.queue_file = queue_file
+        self.busy_timeout = busy_timeout
+        queue_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps the store usable from the heartbeat thread.
+        connection = sqlite3.connect(str(self.queue_file), timeout=self.busy_timeout, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def enqueue(self, jobs: Iterable[Tuple[str, str]]) -> int:
+        now = time.time()
+        added = 0
+        with self._write_transaction() as connection:
+            for platform, account in jobs:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO refresh_jobs (platform, account, status, enqueued_at) VALUES (?, ?, ?, ?)",
+                    (platform.lower(), account.lower(), STATUS_PENDING, now)
+                )
+                added += cursor.rowcount
+        return added
+
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Job]:
+        now = time.time()
+        with self._write_transaction() as connection:
+            # The lease holder died or hung: count the attempt as failed, as fail() would have.
+            connection.execute(
+                "UPDATE refresh_jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "last_error = 'Lease expired: worker ' || COALESCE(lease_owner, '?') || ' stopped responding', "
+                "completed_at = CASE WHEN attempts >= ? THEN ? END, "
+                "lease_id = NULL, lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE status = ? AND lease_expires_at < ?",
+                (max_attempts, STATUS_FAILED, STATUS_PENDING, max_attempts, now, STATUS_LEASED, now)
+            )
+            row = connection.execute(
+                "SELECT id, platform, account, attempts FROM refresh_jobs WHERE status = ? "
+                "ORDER BY enqueued_at, id LIMIT 1",
+                (STATUS_PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job(job_id=row[0], platform=row[1], account=row[2], attempts=row[3] + 1,
+                      lease_id=secrets.token_hex(16), lease_expires_at=now + lease_seconds)
+            connection.execute(
+                "UPDATE refresh_jobs SET status = ?, attempts = ?, lease_id = ?, lease_owner = ?, "
+                "lease_expires_at = ? WHERE id = ?",
+                (STATUS_LEASED, job.attempts, job.lease_id, worker_id, job.lease_expires_at, job.job_id)
+            )
+        return job
+
+    def heartbeat(self, job: Job, lease_seconds: float) -> bool:
+        expires_at = time.time() + lease_seconds
+        with self._write_transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE refresh_jobs SET lease_expires_at = ? WHERE id = ? AND lease_id = ? AND status = ?",
+                (expires_at, job.job_id, job.lease_id, STATUS_LEASED)
+            )
+        if cursor.rowcount == 1:
+            job.lease_expires_at = expires_at
+            return True
+        return False
+
+    def complete(self, job: Job) -> bool:
+        with self._write_transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE refresh_jobs SET status = ?, completed_at = ?, lease_id = NULL, lease_expires_at = NULL, "
+                "last_error = NULL WHERE id = ? AND lease_id = ? AND status = ?",
+                (STATUS_DONE, time.time(), job.job_id, job.lease_id, STATUS_LEASED)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str, max_attempts: int) -> bool:
+        status = STATUS_FAILED if job.attempts >= max_attempts else STATUS_PENDING
+        with self._write_transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE refresh_jobs SET status = ?, last_error = ?, lease_id = NULL, lease_owner = NULL, "
+                "lease_expires_at = NULL, completed_at = ? WHERE id = ? AND lease_id = ? AND status = ?",
+                (status, error, time.time() if status == STATUS_FAILED else None,
+                 job.job_id, job.lease_id, STATUS_LEASED)
+            )
+        return cursor.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) FROM refresh_jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+###############################################################################
+# SEEDING
+###############################################################################
+def jobs_from_notifications(notifications_file: Path) -> List[Tuple[str, str]]:
+    """Read (platform, account) pairs from AuthorizationRefreshNotifications.json."""
+    if not notifications_file.is_file():
+        print_status(f"Notifications file not found at {notifications_file}; nothing to seed.", Colors.YELLOW)
+        return []
+    with notifications_file.open("r", encoding="utf-8-sig") as f:
+        records = json.load(f) or []
+    jobs = []
+    for record in records:
+        platform = str(record.get("Platform", "")).lower()
+        account = record.get("Account")
+        if platform in SUPPORTED_PLATFORMS and account:
+            jobs.append((platform, account))
+    return jobs
+
+
+def jobs_from_expiry(creds_files: Dict[str, Path], horizon: timedelta,
+                     now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    """Select accounts whose refresh token expires within the horizon (requires refreshTokenExpiresOn)."""
+    deadline = (now or datetime.now(timezone.utc)) + horizon
+    jobs = []
+    for platform, creds_path in creds_files.items():
+        for account, entry in iter_credentials(creds_path):
+            expires_on = parse_utc_timestamp(entry.get("refreshTokenExpiresOn"))
+            if expires_on is not None and expires_on <= deadline:
+                jobs.append((platform, account))
+    return jobs
+
+
+def jobs_from_plan(plan_file: Path, now: Optional[datetime] = None,
+                   all_waves: bool = False) -> List[Tuple[str, str]]:
+    """
+    Read the consent jobs of a job list written by the `plan` subcommand, in wave order.
+    Only the waves that have started are returned unless all_waves is set, so a scheduler can
+    re-run the seeding periodically; already queued jobs are skipped by enqueue().
+    """
+    now = now or datetime.now(timezone.utc)
+    with plan_file.open("r", encoding="utf-8-sig") as f:
+        plan = json.load(f)
+    jobs = []
+    for job in plan.get("jobs", []):
+        if job.get("kind") != "consent" or job.get("platform") not in SUPPORTED_PLATFORMS:
+            continue
+        starts_on = parse_utc_timestamp(job.get("startsOn"))
+        if all_waves or (starts_on is not None and starts_on <= now):
+            jobs.append((job["platform"], job["account"]))
+    return jobs
+
+
+###############################################################################
+# WORKER
+###############################################################################
+class LeaseKeeper:
+    """Extends a job's lease from a background thread until stopped, flagging a lost lease."""
+
+    def __init__(self, store: WorkQueueStore, job: Job, lease_seconds: float) -> None:
+        self.store = store
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.store.heartbeat(self.job, self.lease_seconds):
+                    self.lost = True
+                    return
+            except sqlite3.Error as e:
+                # Transient lock contention; the next heartbeat retries well before the lease expires.
+                print_status(f"Warning: heartbeat for job {self.job.job_id} failed: {e}", Colors.YELLOW)
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def process_job(store: WorkQueueStore, job: Job, creds_files: Dict[str, Path], timeout: int,
+                chrome_path: Optional[str], lease_seconds: float, max_attempts: int,
+                history_file: Optional[Path], pool: oauth_clients.OAuthClientPool,
+                callback_server: "async_refresh.BlockingCallbackServer") -> bool:
+    """
+    Run the refresh flow for a claimed job and report the outcome to the store.
+
+    :param callback_server: The worker's OAuth callback listener, shared by all of its jobs.
+    """
+    # Imported here: auth_manager registers this module as a subcommand.
+    from platform_authorization_refresh import auth_manager
+
+    print_status(f"Job {job.job_id}: refreshing {job.platform} account {job.account} "
+                 f"(attempt {job.attempts})", Colors.HEADER)
+    creds_file = creds_files[job.platform]
+    timer = refresh_history.PhaseTimer()
+    error: Optional[BaseException] = None
+    with LeaseKeeper(store, job, lease_seconds) as keeper:
+        try:
+            chrome_profile = None
+            if chrome_path:
+                with timer.phase("chrome_profile"):
+                    chrome_profile = auth_manager.find_profile_by_gmail(job.account)
+            with timer.phase("oauth_client"):
+                client = pool.resolve(job.platform, job.account, str(creds_file))
+                pool.acquire(job.platform, client)
+            with timer.phase("authorize"):
+                token_data = callback_server.refresh_tokens(platform=job.platform, account=job.account,
+                                                            timeout=timeout, chrome_path=chrome_path,
+                                                            chrome_profile=chrome_profile, client=client)
+            if keeper.lost:
+                raise RuntimeError("Lease lost before the credentials could be saved")
+            # update_credentials_json holds the credentials file lock shared by every writer.
+            with timer.phase("persist"):
+                auth_manager.update_credentials_json(account=job.account, creds_file=str(creds_file),
+                                                     token_data=token_data, platform=job.platform)
+        except Exception as e:
+            error = e
+
+    outcome, error_class = refresh_history.classify_outcome(error)
+    try:
+        refresh_history.record_attempt(
+            history_file or refresh_history.default_history_file(str(creds_file)),
+            refresh_history.RefreshAttempt(platform=job.platform, account=job.account, mode="queue",
+                                           started_at=timer.started_at, duration_seconds=timer.elapsed,
+                                           phases=timer.phases, outcome=outcome, error_class=error_class)
+        )
+    except Exception as e:
+        print_status(f"Warning: could not record refresh history: {e}", Colors.YELLOW)
+
+    if error is None:
+        if store.complete(job):
+            print_status(f"Job {job.job_id} completed.", Colors.GREEN)
+            return True
+        print_status(f"Job {job.job_id}: lease expired before completion; another worker owns it now.",
+                     Colors.YELLOW)
+        return False
+
+    print_status(f"Job {job.job_id} failed: {error}", Colors.RED)
+    store.fail(job, f"{type(error).__name__}: {error}", max_attempts)
+    return False
+
+
+def run_worker(store: WorkQueueStore, creds_files: Dict[str, Path], worker_id: str, lease_seconds: float,
+               timeout: int, chrome_path: Optional[str], max_attempts: int, idle_exit: bool,
+               poll_interval: float, history_file: Optional[Path],
+               pool: Optional[oauth_clients.OAuthClientPool] = None,
+               callback_server: Optional["async_refresh.BlockingCallbackServer"] = None) -> int:
+    """
+    Claim and process jobs until the queue is empty (idle_exit) or forever. Returns the number completed.
+
+    One OAuth callback listener serves every job of the worker (see async_refresh.BlockingCallbackServer);
+    it is started here unless a running one is given.
+    """
+    # Imported here: auth_manager registers this module as a subcommand.
+    from platform_authorization_refresh import async_refresh
+
+    pool = pool or oauth_clients.default_pool()
+    own_server = callback_server is None
+    if own_server:
+        callback_server = async_refresh.BlockingCallbackServer()
+        callback_server.start()
+    completed = 0
+    try:
+        while True:
+            job = store.claim(worker_id, lease_seconds, max_attempts)
+            if job is None:
+                if idle_exit:
+                    return completed
+                time.sleep(poll_interval)
+                continue
+            if job.platform not in creds_files:
+                store.fail(job, f"No credentials file configured for platform '{job.platform}' on {worker_id}",
+                           max_attempts)
+                continue
+            if process_job(store, job, creds_files, timeout, chrome_path, lease_seconds, max_attempts,
+                           history_file, pool, callback_server):
+                completed += 1
+    finally:
+        if own_server:
+            callback_server.close()
+
+
+###############################################################################
+# COMMAND LINE
+###############################################################################
+def _add_creds_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--youtube_creds_file_path", type=Path, default=None,
+                        help="YouTube credentials JSON file path")
+    parser.add_argument("--tiktok_creds_file_path", type=Path, default=None,
+                        help="TikTok credentials JSON file path")
+
+
+def _creds_files(args: argparse.Namespace) -> Dict[str, Path]:
+    creds_files = {"youtube": args.youtube_creds_file_path, "tiktok": args.tiktok_creds_file_path}
+    return {platform: path for platform, path in creds_files.items() if path is not None}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="queue",
+        description="Distributed refresh work queue shared by several worker hosts.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--queue_file", required=True, type=Path,
+                        help="SQLite queue file reachable by every worker host")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="Add pending jobs from notifications and/or upcoming expiry",
+                               formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    seed.add_argument("--notifications_file_path", type=Path, default=None,
+                      help="AuthorizationRefreshNotifications.json file path (environment variables are expanded)")
+    _add_creds_arguments(seed)
+    seed.add_argument("--expiring_within_hours", type=float, default=None,
+                      help="Also queue accounts whose refresh token expires within this many hours")
+    seed.add_argument("--plan_file", type=Path, default=None,
+                      help="Also queue the consent jobs of a job list written by the plan subcommand")
+    seed.add_argument("--all_waves", action="store_true", default=False,
+                      help="With --plan_file, queue every wave instead of only the waves that have started")
+
+    work = commands.add_parser("work", help="Claim and run jobs on this host",
+                               formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    _add_creds_arguments(work)
+    work.add_argument("--chrome", default=None, help="Path to Chrome executable (e.g., Chrome Beta)")
+    work.add_argument("--timeout", type=int, default=120, help="Timeout (in seconds) for each OAuth flow")
+    work.add_argument("--lease_seconds", type=float, default=60,
+                      help="Lease duration; extended by heartbeats every third of it while a job runs")
+    work.add_argument("--max_attempts", type=int, default=3, help="Attempts before a job is marked failed")
+    work.add_argument("--worker_id", default=default_worker_id(), help="Identifier recorded as the lease owner")
+    work.add_argument("--forever", action="store_true", default=False,
+                      help="Keep polling for new jobs instead of exiting when the queue is empty")
+    work.add_argument("--poll_interval", type=float, default=10, help="Seconds between polls when idle")
+    work.add_argument("--history_file", type=Path, default=None,
+                      help="Refresh history database (default: next to each credentials file)")
+    work.add_argument("--oauth_clients_file", type=Path, default=None,
+                      help="JSON file with the pool of OAuth app registrations (default: the built-in registration)")
+
+    commands.add_parser("status", help="Show the number of jobs per status")
+    args = parser.parse_args(argv)
+
+    try:
+        store = SqliteWorkQueueStore(args.queue_file)
+        if args.command == "seed":
+            jobs: List[Tuple[str, str]] = []
+            if args.notifications_file_path is not None:
+                jobs += jobs_from_notifications(Path(os.path.expandvars(str(args.notifications_file_path))))
+            if args.expiring_within_hours is not None:
+                jobs += jobs_from_expiry(_creds_files(args), timedelta(hours=args.expiring_within_hours))
+            if args.plan_file is not None:
+                jobs += jobs_from_plan(args.plan_file, all_waves=args.all_waves)
+            added = store.enqueue(jobs)
+            print_status(f"Queued {added} new job(s) ({len(jobs) - added} already queued).", Colors.GREEN)
+        elif args.command == "work":
+            creds_files = _creds_files(args)
+            if not creds_files:
+                parser.error("at least one of --youtube_creds_file_path / --tiktok_creds_file_path is required")
+            print_status(f"Worker {args.worker_id} started on {args.queue_file}", Colors.BLUE)
+            completed = run_worker(store, creds_files, args.worker_id, args.lease_seconds, args.timeout,
+                                   args.chrome, args.max_attempts, not args.forever, args.poll_interval,
+                                   args.history_file, oauth_clients.load_pool(args.oauth_clients_file))
+            print_status(f"Queue empty; worker completed {completed} job(s).", Colors.GREEN)
+        else:
+            counts = store.counts()
+            for status in (STATUS_PENDING, STATUS_LEASED, STATUS_DONE, STATUS_FAILED):
+                print(f"{Colors.BOLD}{status}:{Colors.ENDC} {counts.get(status, 0)}")
+    except KeyboardInterrupt:
+        print_status("Interrupted; leased jobs will be re-queued when their lease expires.", Colors.YELLOW)
+        sys.exit(130)
+    except Exception as e:
+        print_status(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
@@ -26,6 +26,10 @@ tokens: Dict[str, str] = {}
 # Global variable to hold the optional account login hint
 ACCOUNT: Optional[str] = None
 
+# App registration used by the current flow (defaults to the constants above; see oauth_clients.py)
+active_client_id: str = CLIENT_ID
+active_client_secret: str = CLIENT_SECRET
+
 @app.route("/")
 def index() -> "redirect":
     """
@@ -34,7 +38,7 @@ def index() -> "redirect":
     """
     auth_url = (
         "https://accounts.google.com/o/oauth2/auth?"
-        f"client_id={CLIENT_ID}&"
+        f"client_id={active_client_id}&"
         f"redirect_uri={REDIRECT_URI}&"
         "response_type=code&"
         f"scope={SCOPE}&"
@@ -52,8 +56,8 @@ def exchange_code_for_tokens(code: str) -> Optional[Dict[str, str]]:
     token_url = "https://oauth2.googleapis.com/token"
     payload = {
         "code": code,
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
+        "client_id": active_client_id,
+        "client_secret": active_client_secret,
         "redirect_uri": REDIRECT_URI,
         "grant_type": "authorization_code"
     }
@@ -90,6 +94,8 @@ def callback() -> Tuple[str, int]:
     if token_response and "access_token" in token_response:
         tokens["access_token"] = token_response.get("access_token")
         tokens["refresh_token"] = token_response.get("refresh_token")
+        if "expires_in" in token_response:
+            tokens["expires_in"] = token_response.get("expires_in")
         print_status("Tokens successfully retrieved!", Colors.GREEN)
 
         account_info: str = ""
@@ -114,7 +120,8 @@ def run_flask_app() -> None:
     app.run(port=8080, debug=False, host="127.0.0.1")
 
 def refresh_tokens(timeout: int = 60, account: Optional[str] = None,
-                   chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None) -> Tuple[str, str]:
+                   chrome_path: Optional[str] = None, chrome_profile: Optional[str] = None,
+                   client_id: Optional[str] = None, client_secret: Optional[str] = None) -> Tuple[str, str]:
     """
     Execute the YouTube OAuth flow and return (access_token, refresh_token).
 
@@ -122,13 +129,17 @@ def refresh_tokens(timeout: int = 60, account: Optional[str] = None,
     :param account: Optional account email to use for login_hint.
     :param chrome_path: Optional path to a specific Chrome executable.
     :param chrome_profile: Optional Chrome profile directory to use (e.g. "Profile 1").
+    :param client_id: Optional app registration client ID (defaults to CLIENT_ID).
+    :param client_secret: Optional app registration client secret (defaults to CLIENT_SECRET).
     :return: A tuple containing the access token and refresh token.
     :raises TimeoutError: If the authorization times out.
     :raises RuntimeError: If tokens cannot be retrieved.
     """
-    global tokens, ACCOUNT
+    global tokens, ACCOUNT, active_client_id, active_client_secret
     tokens = {}
     ACCOUNT = account
+    active_client_id = client_id or CLIENT_ID
+    active_client_secret = client_secret or CLIENT_SECRET
 
     print("\n" + "=" * 70)
     print_status("Starting YouTube OAuth authorization process", Colors.HEADER)
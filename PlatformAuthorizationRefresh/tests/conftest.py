@@ -0,0 +1,35 @@
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+
+@pytest.fixture
+def write_creds(tmp_path: Path):
+    """Write a credentials file in tmp_path and return its path."""
+    def write(data: Dict[str, Any], name: str = "credentials.json") -> Path:
+        path = tmp_path / name
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        return path
+    return write
+
+
+@pytest.fixture(scope="session")
+def gui(tmp_path_factory):
+    """The gui_add_account script as a module; it parses sys.argv and sets up logging on import."""
+    script = Path(__file__).resolve().parent.parent / "platform_authorization_refresh" / "gui_add_account.py"
+    tmp = tmp_path_factory.mktemp("gui")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(sys, "argv", [script.name, str(tmp / "appsettings.json"), "--log", str(tmp / "gui.log")])
+        # The script imports its sibling modules (utils) by plain name.
+        patch.syspath_prepend(str(script.parent))
+        spec = importlib.util.spec_from_file_location("gui_add_account", script)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    for handler in list(module.logger.handlers):
+        module.logger.removeHandler(handler)
+        handler.close()
@@ -0,0 +1,80 @@
+import os
+from pathlib import Path
+
+
+def test_edit_distance_gives_up_past_the_limit(gui):
+    assert gui.edit_distance("alice", "alice", 2) == 0
+    assert gui.edit_distance("alice", "alcie", 2) == 2
+    assert gui.edit_distance("alice", "bob", 2) == 3
+    assert gui.edit_distance("a", "abcdef", 2) == 3
+
+
+def test_complete_is_a_case_insensitive_prefix_lookup(gui, write_creds):
+    youtube = write_creds({"Alice@example.com": {}, "alicia@example.com": {}, "bob@example.com": {}}, "youtube.json")
+    tiktok = write_creds({"alice@example.com": {}}, "tiktok.json")
+    directory = gui.AccountDirectory({"youtube": youtube, "tiktok": tiktok})
+    directory.refresh()
+
+    assert directory.complete(" ALI") == [("Alice@example.com", ["youtube", "tiktok"]),
+                                          ("alicia@example.com", ["youtube"])]
+    assert directory.complete("ali", limit=1) == [("Alice@example.com", ["youtube", "tiktok"])]
+    assert directory.complete("") == []
+    assert directory.contains("BOB@example.com") and not directory.contains("bob@example.com", "tiktok")
+
+
+def test_suggest_returns_the_closest_accounts_but_not_the_account_itself(gui, write_creds):
+    youtube = write_creds({"alice@example.com": {}, "alicia@example.com": {}, "carol@example.com": {}})
+    directory = gui.AccountDirectory({"youtube": youtube})
+    directory.refresh()
+
+    assert directory.suggest("alcie@example.com") == ["alice@example.com", "alicia@example.com"]
+    assert directory.suggest("alcie@example.com", limit=1) == ["alice@example.com"]
+    assert directory.suggest("alice@example.com") == ["alicia@example.com"]
+    assert directory.suggest("zed@example.org") == []
+
+
+def test_refresh_applies_only_changed_files(gui, write_creds):
+    youtube = write_creds({"alice@example.com": {}, "bob@example.com": {}}, "youtube.json")
+    tiktok = write_creds({"bob@example.com": {}}, "tiktok.json")
+    directory = gui.AccountDirectory({"youtube": youtube, "tiktok": tiktok})
+    directory.refresh()
+
+    write_creds({"bob@example.com": {}, "carol@example.com": {}}, "youtube.json")
+    stat = youtube.stat()
+    os.utime(youtube, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    directory.refresh()
+
+    assert not directory.contains("alice@example.com")
+    assert directory.complete("a") == [] and not directory.suggest("alice@example.com")
+    assert directory.contains("carol@example.com", "youtube")
+    # Still held by the TikTok file after leaving the YouTube one.
+    assert directory.complete("bob") == [("bob@example.com", ["youtube", "tiktok"])]
+
+
+def test_unreadable_file_keeps_the_current_index(gui, write_creds):
+    youtube = write_creds({"alice@example.com": {}})
+    directory = gui.AccountDirectory({"youtube": youtube})
+    directory.refresh()
+
+    youtube.write_text("{truncated", encoding="utf-8")
+    directory.refresh()
+
+    assert directory.contains("alice@example.com")
+
+
+def test_bulk_change_rebuilds_the_index(gui, write_creds, tmp_path: Path):
+    tiktok = write_creds({"shared@example.com": {}}, "tiktok.json")
+    directory = gui.AccountDirectory({"youtube": tmp_path / "youtube.json", "tiktok": tiktok})
+    directory.refresh()
+
+    accounts = {f"user{i:04d}@example.com": f"User{i:04d}@example.com" for i in range(1500)}
+    accounts["shared@example.com"] = "shared@example.com"
+    directory.apply_accounts("youtube", accounts)
+
+    assert directory.sorted_keys == sorted(accounts)
+    assert directory.complete("user0999") == [("User0999@example.com", ["youtube"])]
+    assert directory.complete("shared")[0][1] == ["youtube", "tiktok"]
+    assert directory.suggest("user0999@exampel.com", limit=1) == ["User0999@example.com"]
+
+    directory.apply_accounts("youtube", {})
+    assert directory.sorted_keys == ["shared@example.com"]
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import threading
+import urllib.parse
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from platform_authorization_refresh import async_refresh, change_feed
+from platform_authorization_refresh.errors import (AccountNotFoundError, AuthorizationDeniedError,
+                                                   AuthorizationTimeoutError, CallbackServerError,
+                                                   CredentialsFileNotFoundError, IncompleteTokenDataError,
+                                                   TokenExchangeError, UnsupportedPlatformError)
+from platform_authorization_refresh.file_lock import exclusive_lock, lock_path_for
+
+
+@pytest.fixture
+def token_requests(monkeypatch) -> List[Dict[str, Any]]:
+    """Replaces the token endpoints: the issued access token is derived from the code or refresh token."""
+    requests: List[Dict[str, Any]] = []
+
+    def fake_token_endpoint(url: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        requests.append(dict(data, url=url))
+        if data.get("code") == "bad" or data.get("refresh_token") == "revoked":
+            raise TokenExchangeError("invalid_grant")
+        if data.get("code") == "crash":
+            raise RuntimeError("unexpected token response")
+        if data["grant_type"] == "refresh_token":
+            return {"access_token": f"access-{data['refresh_token']}", "expires_in": 3600}
+        return {"access_token": f"access-{data['code']}", "refresh_token": f"refresh-{data['code']}",
+                "expires_in": 3600}
+
+    monkeypatch.setattr(async_refresh, "_post_token_request", fake_token_endpoint)
+    return requests
+
+
+async def _get(port: int, target: str) -> int:
+    """Send a GET like the user's browser following the redirect; returns the HTTP status."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("ascii"))
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+def _state(url: str) -> str:
+    return urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)["state"][0]
+
+
+class _Browser:
+    """Collects the authorization URLs opened by the flows."""
+
+    def __init__(self) -> None:
+        self.urls: List[str] = []
+
+    def __call__(self, url: str) -> None:
+        self.urls.append(url)
+
+    async def wait_for(self, count: int) -> List[str]:
+        while len(self.urls) < count:
+            await asyncio.sleep(0.001)
+        return self.urls
+
+
+def test_concurrent_flows_share_one_callback_server(token_requests):
+    async def scenario():
+        browser = _Browser()
+        async with async_refresh.CallbackServer(port=0) as server:
+            flows = [asyncio.ensure_future(async_refresh.refresh_tokens_async(platform, account, server=server,
+                                                                               open_url=browser))
+                     for platform, account in (("youtube", "a@example.com"), ("tiktok", "b"), ("YouTube", None))]
+            urls = await browser.wait_for(3)
+            # Completed in reverse order; each callback resumes the flow its state belongs to.
+            statuses = [await _get(server.port, f"/callback?code=code{i}&state={_state(url)}")
+                        for i, url in reversed(list(enumerate(urls)))]
+            return urls, statuses, await asyncio.gather(*flows), server._flows
+
+    urls, statuses, results, remaining_flows = asyncio.run(scenario())
+
+    assert statuses == [200, 200, 200]
+    assert [result["access_token"] for result in results] == ["access-code0", "access-code1", "access-code2"]
+    assert results[1]["refresh_token"] == "refresh-code1" and results[1]["expires_in"] == 3600
+    assert "login_hint=a%40example.com" in urls[0] and "prefill_username=b" in urls[1]
+    assert not remaining_flows
+    tiktok_request = next(request for request in token_requests if request["url"] == async_refresh.TIKTOK_TOKEN_URL)
+    assert tiktok_request["code_verifier"]
+
+
+def test_denied_flow_raises_and_forged_callbacks_are_rejected(token_requests):
+    async def scenario():
+        browser = _Browser()
+        async with async_refresh.CallbackServer(port=0) as server:
+            flow = asyncio.ensure_future(async_refresh.refresh_tokens_async("youtube", server=server, open_url=browser))
+            state = _state((await browser.wait_for(1))[0])
+            statuses = [await _get(server.port, "/favicon.ico"),
+                        await _get(server.port, "/callback?code=x&state=forged"),
+                        await _get(server.port, f"/callback?error=access_denied&state={state}"),
+                        await _get(server.port, f"/callback?code=late&state={state}")]
+            with pytest.raises(AuthorizationDeniedError, match="access_denied"):
+                await flow
+            return statuses
+
+    assert asyncio.run(scenario()) == [404, 400, 400, 400]
+    assert token_requests == []
+
+
+def test_failed_token_exchange_raises_token_exchange_error(token_requests):
+    async def scenario():
+        browser = _Browser()
+        async with async_refresh.CallbackServer(port=0) as server:
+            flow = asyncio.ensure_future(async_refresh.refresh_tokens_async("tiktok", server=server, open_url=browser))
+            status = await _get(server.port, f"/callback?code=bad&state={_state((await browser.wait_for(1))[0])}")
+            with pytest.raises(TokenExchangeError):
+                await flow
+            return status
+
+    assert asyncio.run(scenario()) == 400
+
+
+def test_unexpected_exchange_failure_ends_the_flow(token_requests):
+    async def scenario():
+        browser = _Browser()
+        async with async_refresh.CallbackServer(port=0) as server:
+            # No timeout: without the error the flow would wait forever.
+            flow = asyncio.ensure_future(async_refresh.refresh_tokens_async("youtube", timeout=0, server=server,
+                                                                            open_url=browser))
+            status = await _get(server.port, f"/callback?code=crash&state={_state((await browser.wait_for(1))[0])}")
+            with pytest.raises(RuntimeError, match="unexpected token response"):
+                await asyncio.wait_for(flow, 5)
+            return status, server._flows
+
+    assert asyncio.run(scenario()) == (400, {})
+
+
+def test_timed_out_and_cancelled_flows_are_withdrawn(token_requests):
+    async def scenario():
+        browser = _Browser()
+        async with async_refresh.CallbackServer(port=0) as server:
+            with pytest.raises(AuthorizationTimeoutError) as timeout:
+                await async_refresh.refresh_tokens_async("youtube", timeout=0.05, server=server, open_url=browser)
+            late_status = await _get(server.port, f"/callback?code=x&state={_state(browser.urls[0])}")
+
+            flow = asyncio.ensure_future(async_refresh.refresh_tokens_async("tiktok", server=server, open_url=browser))
+            await browser.wait_for(2)
+            flow.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await flow
+            return timeout.value, late_status, server._flows
+
+    error, late_status, remaining_flows = asyncio.run(scenario())
+
+    assert isinstance(error, TimeoutError)
+    assert late_status == 400 and not remaining_flows and token_requests == []
+
+
+def test_platform_and_port_errors_are_typed():
+    async def scenario():
+        with pytest.raises(UnsupportedPlatformError):
+            await async_refresh.refresh_tokens_async("myspace", open_url=lambda url: None)
+        async with async_refresh.CallbackServer(port=0) as server:
+            with pytest.raises(CallbackServerError) as busy:
+                await async_refresh.CallbackServer(port=server.port).start()
+        return busy.value
+
+    assert isinstance(asyncio.run(scenario()), OSError)
+
+
+def test_refresh_access_token_keeps_the_refresh_token_unless_rotated(token_requests):
+    token_data = asyncio.run(async_refresh.refresh_access_token_async("tiktok", "stored"))
+
+    assert token_data == {"access_token": "access-stored", "refresh_token": "stored", "expires_in": 3600}
+    assert token_requests[0]["client_key"] and "client_id" not in token_requests[0]
+    with pytest.raises(TokenExchangeError):
+        asyncio.run(async_refresh.refresh_access_token_async("youtube", "revoked"))
+
+
+def test_concurrent_updates_are_coalesced_into_few_writes(write_creds, monkeypatch):
+    creds_file = write_creds({"Alice@example.com": {"accessToken": "old", "refreshToken": "old"}})
+    batch_sizes: List[int] = []
+    write_updates = async_refresh._write_updates
+
+    def counting_write_updates(path: Path, updates):
+        batch_sizes.append(len(updates))
+        return write_updates(path, updates)
+
+    monkeypatch.setattr(async_refresh, "_write_updates", counting_write_updates)
+
+    async def scenario():
+        updates = [async_refresh.update_credentials_async(f"user{i}@example.com", creds_file,
+                                                          {"access_token": f"a{i}", "refresh_token": f"r{i}"},
+                                                          add_new_account=True, platform="youtube")
+                   for i in range(10)]
+        updates.append(async_refresh.update_credentials_async("alice@example.com", creds_file,
+                                                              {"access_token": "new", "refresh_token": "new"}))
+        updates.append(async_refresh.update_credentials_async("nobody@example.com", creds_file,
+                                                              {"access_token": "x", "refresh_token": "y"}))
+        updates.append(async_refresh.update_credentials_async("alice@example.com", creds_file,
+                                                              {"access_token": "x"}))
+        return await asyncio.gather(*updates, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert results[:11] == [f"user{i}@example.com" for i in range(10)] + ["Alice@example.com"]
+    assert isinstance(results[11], AccountNotFoundError) and isinstance(results[12], IncompleteTokenDataError)
+    assert sum(batch_sizes) == 13 and len(batch_sizes) <= 2
+    data = json.loads(creds_file.read_text(encoding="utf-8"))
+    assert len(data) == 11 and data["Alice@example.com"]["accessToken"] == "new"
+    assert len(list(change_feed.changes_since(str(creds_file)))) == 11
+
+
+def test_update_of_a_missing_file_raises(tmp_path: Path):
+    with pytest.raises(CredentialsFileNotFoundError):
+        asyncio.run(async_refresh.update_credentials_async("a", tmp_path / "missing.json",
+                                                           {"access_token": "x", "refresh_token": "y"}))
+
+
+def test_updates_wait_for_the_credentials_lock(write_creds):
+    creds_file = write_creds({"alice@example.com": {"accessToken": "old", "refreshToken": "old"}})
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock() -> None:
+        with exclusive_lock(lock_path_for(creds_file)):
+            locked.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+
+    async def scenario():
+        update = asyncio.ensure_future(async_refresh.update_credentials_async(
+            "alice@example.com", creds_file, {"access_token": "new", "refresh_token": "new"}))
+        await asyncio.sleep(0.2)
+        blocked = not update.done()
+        release.set()
+        return blocked, await update
+
+    try:
+        assert asyncio.run(scenario()) == (True, "alice@example.com")
+    finally:
+        release.set()
+        holder.join()
+    assert json.loads(creds_file.read_text(encoding="utf-8"))["alice@example.com"]["accessToken"] == "new"
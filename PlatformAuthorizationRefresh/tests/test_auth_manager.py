@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from platform_authorization_refresh import auth_manager
+
+
+def test_subcommand_modules_are_imported_on_dispatch_only():
+    script = ("import sys\nimport platform_authorization_refresh.auth_manager\n"
+              "print(sorted(name for name in ('numpy', 'platform_authorization_refresh.planner', "
+              "'platform_authorization_refresh.sync', 'platform_authorization_refresh.work_queue') "
+              "if name in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", script], cwd=Path(__file__).resolve().parents[1],
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "[]"
+
+
+def test_every_subcommand_resolves_to_a_main_function():
+    for name in auth_manager.SUBCOMMANDS:
+        handler = auth_manager.resolve_subcommand(name)
+        assert callable(handler) and handler.__name__ == "main"
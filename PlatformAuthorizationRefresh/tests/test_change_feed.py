@@ -0,0 +1,168 @@
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from platform_authorization_refresh import change_feed
+from platform_authorization_refresh.auth_manager import update_credentials_json
+from platform_authorization_refresh.file_lock import exclusive_lock, lock_path_for
+
+
+def _sequences(creds_file: str):
+    return [change.seq for change in change_feed.changes_since(creds_file)]
+
+
+def test_sequences_increase_by_one(tmp_path: Path):
+    creds_file = str(tmp_path / "credentials.json")
+    assert change_feed.latest_sequence(creds_file) == 0
+
+    for account in ("a", "b", "a"):
+        change_feed.record_change(creds_file, account, "youtube", "updated")
+
+    assert _sequences(creds_file) == [1, 2, 3]
+    assert change_feed.latest_sequence(creds_file) == 3
+
+
+def test_changes_since_seeks_to_the_first_newer_record(tmp_path: Path):
+    creds_file = str(tmp_path / "credentials.json")
+    for i in range(200):
+        change_feed.record_change(creds_file, f"account{i % 7}", "tiktok", "updated")
+
+    for since in (0, 1, 99, 150, 199):
+        assert [change.seq for change in change_feed.changes_since(creds_file, since)] == list(range(since + 1, 201))
+    assert list(change_feed.changes_since(creds_file, 200)) == []
+    assert list(change_feed.changes_since(str(tmp_path / "missing.json"))) == []
+
+
+def test_torn_last_line_is_ignored(tmp_path: Path):
+    creds_file = str(tmp_path / "credentials.json")
+    change_feed.record_change(creds_file, "a", "youtube", "added")
+    with change_feed.change_log_path(creds_file).open("ab") as f:
+        f.write(b'{"seq": 2, "acc')
+
+    assert change_feed.latest_sequence(creds_file) == 1
+    assert _sequences(creds_file) == [1]
+
+
+def test_compact_keeps_the_latest_record_per_account(tmp_path: Path):
+    creds_file = str(tmp_path / "credentials.json")
+    for account in ("a", "B", "a", "c", "b"):
+        change_feed.record_change(creds_file, account, "youtube", "updated")
+
+    assert change_feed.compact(creds_file) == 3
+
+    assert [(change.seq, change.account) for change in change_feed.changes_since(creds_file)] == \
+        [(3, "a"), (4, "c"), (5, "b")]
+    assert set(change_feed.changed_accounts_since(creds_file, 3)) == {"b", "c"}
+    # Numbering continues after the kept records.
+    assert change_feed.record_change(creds_file, "d", "youtube", "added").seq == 6
+
+
+def test_concurrent_appends_get_unique_sequences(tmp_path: Path):
+    creds_file = str(tmp_path / "credentials.json")
+
+    def append(worker: int) -> None:
+        for i in range(50):
+            change_feed.record_change(creds_file, f"thread{worker}-{i}", "youtube", "updated")
+
+    threads = [threading.Thread(target=append, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    script = ("import sys\nfrom platform_authorization_refresh import change_feed\n"
+              "for i in range(50):\n    change_feed.record_change(sys.argv[1], f'process-{i}', 'tiktok', 'updated')\n")
+    process = subprocess.Popen([sys.executable, "-c", script, creds_file], cwd=Path(__file__).resolve().parents[1])
+    for thread in threads:
+        thread.join()
+    assert process.wait(timeout=60) == 0
+
+    assert _sequences(creds_file) == list(range(1, 451))
+
+
+def test_compaction_during_appends_loses_nothing(tmp_path: Path, monkeypatch):
+    creds_file = str(tmp_path / "credentials.json")
+    monkeypatch.setattr(change_feed, "COMPACT_EVERY", 10)
+    errors = []
+
+    def append(worker: int) -> None:
+        try:
+            for i in range(60):
+                change_feed.record_change(creds_file, f"worker{worker}-{i}", "youtube", "added")
+        except Exception as e:
+            errors.append(e)
+
+    def compact_repeatedly() -> None:
+        for _ in range(30):
+            change_feed.compact(creds_file)
+
+    threads = [threading.Thread(target=append, args=(worker,)) for worker in range(4)]
+    threads.append(threading.Thread(target=compact_repeatedly))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    # Every account was added once, so compaction keeps every record.
+    assert _sequences(creds_file) == list(range(1, 241))
+
+
+def test_credentials_writes_are_recorded_in_write_order(write_creds):
+    creds_file = write_creds({})
+
+    def update(worker: int) -> None:
+        for i in range(10):
+            update_credentials_json(f"account{i}", str(creds_file),
+                                    {"access_token": f"w{worker}-{i}", "refresh_token": "r"},
+                                    add_new_account=True, platform="youtube")
+
+    threads = [threading.Thread(target=update, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    data = json.loads(creds_file.read_text(encoding="utf-8"))
+    latest = change_feed.changed_accounts_since(str(creds_file))
+    assert _sequences(str(creds_file)) == list(range(1, 41))
+    # Each account's entry holds as many writes as the log recorded for it.
+    for account, entry in data.items():
+        assert entry["version"] == sum(1 for change in change_feed.changes_since(str(creds_file))
+                                       if change.account == account)
+    assert set(latest) == set(data)
+
+
+def test_change_is_recorded_under_the_credentials_lock(write_creds, monkeypatch):
+    creds_file = write_creds({"a": {"accessToken": "x", "refreshToken": "y"}})
+    record_change = change_feed.record_change
+
+    def checking_record_change(*args, **kwargs):
+        with pytest.raises(TimeoutError):
+            with exclusive_lock(lock_path_for(creds_file), timeout=0.05):
+                pass
+        return record_change(*args, **kwargs)
+
+    monkeypatch.setattr(change_feed, "record_change", checking_record_change)
+    update_credentials_json("a", str(creds_file), {"access_token": "new", "refresh_token": "new"})
+
+    assert _sequences(str(creds_file)) == [1]
+
+
+def test_failed_credentials_write_leaves_the_file_and_log_untouched(write_creds, monkeypatch):
+    creds_file = write_creds({"a": {"accessToken": "x", "refreshToken": "y"}})
+    before = creds_file.read_bytes()
+    dump = json.dump
+
+    def crashing_dump(data, f, **kwargs):
+        f.write('{"a": {"accessT')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", crashing_dump)
+    with pytest.raises(OSError, match="disk full"):
+        update_credentials_json("a", str(creds_file), {"access_token": "new", "refresh_token": "new"})
+    monkeypatch.setattr(json, "dump", dump)
+
+    assert creds_file.read_bytes() == before
+    assert _sequences(str(creds_file)) == []
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from platform_authorization_refresh.credentials_reader import describe_entry, find_credentials, iter_credentials
+
+FLEET = {
+    "Alice@example.com": {"accessToken": "ya29.a\"b\\c", "refreshToken": "1//x", "version": 123456789,
+                          "refreshDurationSeconds": 9.25, "scopes": ["a", {"nested": [1, 2.5e3, None]}]},
+    "bob@example.com": {"accessToken": "é ünïcode ☃", "refreshToken": "", "expired": True},
+    "carol@example.com": {},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_credentials_matches_json_load_at_any_chunk_boundary(write_creds, chunk_size, indent):
+    path = write_creds({})
+    path.write_text(json.dumps(FLEET, indent=indent, ensure_ascii=False), encoding="utf-8")
+
+    assert list(iter_credentials(path, chunk_size=chunk_size)) == list(FLEET.items())
+
+
+def test_iter_credentials_reads_empty_object_and_bom(tmp_path: Path):
+    path = tmp_path / "credentials.json"
+    path.write_text(" { } ", encoding="utf-8")
+    assert list(iter_credentials(path)) == []
+
+    path.write_text('{"a": {"version": 7}}', encoding="utf-8-sig")
+    assert list(iter_credentials(path, chunk_size=1)) == [("a", {"version": 7})]
+
+
+@pytest.mark.parametrize("text", ['[]', '{"a": {}, "b" {}}', '{"a": {} "b": {}}', '{"a": {}, "b": {"x": 1', ''])
+def test_malformed_file_raises_value_error(tmp_path: Path, text: str):
+    path = tmp_path / "credentials.json"
+    path.write_text(text, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(iter_credentials(path, chunk_size=4))
+
+
+def test_entries_before_an_error_are_yielded(tmp_path: Path):
+    path = tmp_path / "credentials.json"
+    path.write_text('{"a": {"version": 1}, "b": {"version": ', encoding="utf-8")
+    entries = iter_credentials(path, chunk_size=8)
+
+    assert next(entries) == ("a", {"version": 1})
+    with pytest.raises(ValueError):
+        next(entries)
+
+
+def test_find_credentials_is_case_insensitive_and_stops_at_the_match(tmp_path: Path):
+    path = tmp_path / "credentials.json"
+    # Everything after the first entry is garbage, so only an early exit succeeds.
+    path.write_text('{"Alice@example.com": {"version": 2}, "bob": <truncated', encoding="utf-8")
+
+    assert find_credentials(path, "ALICE@example.com") == ("Alice@example.com", {"version": 2})
+    with pytest.raises(ValueError):
+        find_credentials(path, "bob")
+
+
+def test_find_credentials_returns_none_for_a_missing_account(write_creds):
+    assert find_credentials(write_creds(FLEET), "dave@example.com") is None
+
+
+def test_describe_entry_flags_expired_and_missing_tokens():
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    line, needs_attention = describe_entry("a", {"accessToken": "x", "refreshToken": "y",
+                                                 "refreshTokenExpiresOn": "2026-06-01T00:00:00Z"}, now)
+    assert not needs_attention and "valid until 2026-06-01 00:00 UTC" in line
+    line, needs_attention = describe_entry("b", {"refreshTokenExpiresOn": "2025-06-01T00:00:00Z"}, now)
+    assert needs_attention and "expired" in line and "missing accessToken and refreshToken" in line
@@ -0,0 +1,34 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from platform_authorization_refresh.file_lock import exclusive_lock, lock_path_for
+
+
+def test_lock_serializes_read_modify_write(tmp_path: Path):
+    counter = tmp_path / "counter.txt"
+    counter.write_text("0")
+
+    def increment() -> None:
+        for _ in range(50):
+            with exclusive_lock(lock_path_for(counter)):
+                counter.write_text(str(int(counter.read_text()) + 1))
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.read_text() == "200"
+
+
+def test_lock_times_out_while_held(tmp_path: Path):
+    lock_path = tmp_path / "held.lock"
+    with exclusive_lock(lock_path):
+        with pytest.raises(TimeoutError):
+            with exclusive_lock(lock_path, timeout=0.05):
+                pass
+    with exclusive_lock(lock_path, timeout=0.05):
+        pass
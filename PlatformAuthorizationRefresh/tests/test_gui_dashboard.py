@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_load_fleet_rows_joins_pending_notifications(gui, tmp_path: Path, write_creds):
+    youtube = write_creds({
+        "Alice@example.com": {"updatedOn": "2025-12-31T10:00:00Z", "accessTokenExpiresOn": "2026-01-01T01:00:00Z"},
+        "bob@example.com": {"refreshTokenExpiresOn": "2026-02-01T00:00:00+00:00",
+                            "accessTokenExpiresOn": "2026-01-01T01:00:00Z"},
+    }, "youtube.json")
+    notifications = tmp_path / "notifications.json"
+    notifications.write_text(json.dumps([{"Platform": "YouTube", "Account": "alice@example.com"}, "junk"]),
+                             encoding="utf-8")
+
+    rows = {row.account: row for row in gui.load_fleet_rows({"youtube": youtube}, notifications)}
+
+    assert rows["Alice@example.com"].pending and rows["Alice@example.com"].account_key == "alice@example.com"
+    assert rows["Alice@example.com"].updated_on == datetime(2025, 12, 31, 10, tzinfo=timezone.utc)
+    assert not rows["bob@example.com"].pending
+    # The refresh token's expiry wins over the access token's.
+    assert rows["bob@example.com"].expires_on == datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+
+def test_load_fleet_rows_skips_unreadable_and_malformed_input(gui, tmp_path: Path, write_creds):
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    not_an_object = write_creds(["a", "b"], "list.json")
+    mixed = write_creds({"ok@example.com": {}, "bad@example.com": "oops"}, "mixed.json")
+    notifications = tmp_path / "notifications.json"
+    notifications.write_text(json.dumps({"Platform": "youtube"}), encoding="utf-8")
+
+    rows = gui.load_fleet_rows({"youtube": broken, "tiktok": not_an_object, "other": mixed,
+                                "missing": tmp_path / "missing.json"}, notifications)
+
+    assert [(row.platform, row.account) for row in rows] == [("other", "ok@example.com")]
+
+
+def _row(gui, platform, account, expires_in_hours=None, pending=False):
+    expires_on = NOW + timedelta(hours=expires_in_hours) if expires_in_hours is not None else None
+    return gui.FleetRow(platform, account, None, expires_on, pending, account.lower())
+
+
+def test_filter_fleet_rows_filters_and_sorts_raw_rows(gui):
+    rows = [_row(gui, "youtube", "Carol", 5), _row(gui, "tiktok", "alice", 1, pending=True),
+            _row(gui, "youtube", "Bob"), _row(gui, "youtube", "alicia", 3)]
+
+    assert [row.account for row in gui.filter_fleet_rows(rows, "", "all", False, ("account", False))] == \
+        ["alice", "alicia", "Bob", "Carol"]
+    assert [row.account for row in gui.filter_fleet_rows(rows, " ALI ", "youtube", False, ("account", False))] == \
+        ["alicia"]
+    assert [row.account for row in gui.filter_fleet_rows(rows, "", "all", True, ("account", False))] == ["alice"]
+    # Rows without an expiry sort as the oldest.
+    assert [row.account for row in gui.filter_fleet_rows(rows, "", "all", False, ("horizon", True))] == \
+        ["Carol", "alicia", "alice", "Bob"]
+
+
+def test_format_fleet_row_and_horizon(gui):
+    values, tag = gui.format_fleet_row(_row(gui, "tiktok", "alice", 26, pending=True), NOW)
+
+    assert values == ("TikTok", "alice", "—", "in 1d 2h", "Yes")
+    assert tag == "pending"
+    assert gui.format_horizon(NOW - timedelta(minutes=90), NOW) == "expired 1h 30m ago"
+    assert gui.format_horizon(None, NOW) == "—"
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from platform_authorization_refresh import refresh_history
+from platform_authorization_refresh.metrics_exporter import collect_metrics, format_labels, write_textfile
+
+NOW = datetime(2025, 4, 20, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def sample_lines(content: str, name: str):
+    return [line for line in content.splitlines() if line.startswith(f"presence_auth_{name}")]
+
+
+def test_collect_metrics_reports_freshness_per_account(write_creds):
+    creds = write_creds({
+        "a@gmail.com": {"accessToken": "a", "refreshToken": "r", "updatedOn": "2025-04-20T11:00:00Z",
+                        "accessTokenExpiresOn": "2025-04-20T12:30:00Z",
+                        "refreshTokenExpiresOn": "2025-04-19T12:00:00Z", "refreshDurationSeconds": 12.5},
+        "legacy@gmail.com": {"accessToken": "a", "refreshToken": "r"},
+    })
+
+    content = collect_metrics({"youtube": creds}, None, now=NOW)
+
+    assert 'presence_auth_accounts{platform="youtube"} 2' in content
+    assert 'presence_auth_accounts_untracked{platform="youtube"} 1' in content
+    assert 'presence_auth_token_age_seconds{platform="youtube",account="a@gmail.com"} 3600.0' in content
+    assert 'presence_auth_access_token_expires_in_seconds{platform="youtube",account="a@gmail.com"} 1800.0' in content
+    assert ('presence_auth_refresh_token_expires_in_seconds{platform="youtube",account="a@gmail.com"} -86400.0'
+            in content)
+
+
+def test_refresh_duration_is_a_per_account_gauge(write_creds):
+    creds = write_creds({
+        "a@gmail.com": {"updatedOn": "2025-04-20T11:00:00Z", "refreshDurationSeconds": 12.5},
+        "b@gmail.com": {"updatedOn": "2025-04-20T11:00:00Z", "refreshDurationSeconds": 40},
+        "c@gmail.com": {"updatedOn": "2025-04-20T11:00:00Z"},
+    })
+
+    content = collect_metrics({"youtube": creds}, None, now=NOW)
+
+    assert "# TYPE presence_auth_last_refresh_duration_seconds gauge" in content
+    assert sample_lines(content, "last_refresh_duration_seconds") == [
+        'presence_auth_last_refresh_duration_seconds{platform="youtube",account="a@gmail.com"} 12.5',
+        'presence_auth_last_refresh_duration_seconds{platform="youtube",account="b@gmail.com"} 40.0',
+    ]
+    # The credentials entries only feed the gauge; the histogram comes from the refresh history.
+    assert sample_lines(content, "refresh_duration_seconds") == []
+
+
+def test_unreadable_file_reports_no_partial_fleet(tmp_path: Path, write_creds):
+    creds = tmp_path / "credentials.json"
+    creds.write_text('{"a@gmail.com": {"updatedOn": "2025-04-20T11:00:00Z"}, "b@gm', encoding="utf-8")
+
+    content = collect_metrics({"youtube": creds, "tiktok": tmp_path / "missing.json"}, None, now=NOW)
+
+    assert 'presence_auth_credentials_file_readable{platform="youtube"} 0' in content
+    assert 'presence_auth_credentials_file_readable{platform="tiktok"} 0' in content
+    assert 'presence_auth_accounts{platform="youtube"} 0' in content
+    assert sample_lines(content, "token_age_seconds") == []
+
+
+def test_pending_notifications_are_counted_per_platform(tmp_path: Path, write_creds):
+    notifications = tmp_path / "AuthorizationRefreshNotifications.json"
+    notifications.write_text('[{"Platform": "YouTube"}, {"Platform": "youtube"}, {"Platform": "TikTok"}]',
+                             encoding="utf-8")
+
+    content = collect_metrics({"youtube": write_creds({}), "tiktok": None}, notifications, now=NOW)
+
+    assert 'presence_auth_pending_notifications{platform="youtube"} 2' in content
+    assert 'presence_auth_pending_notifications{platform="tiktok"} 1' in content
+    assert "presence_auth_notifications_file_readable 1" in content
+
+
+def test_label_values_are_escaped():
+    assert format_labels({"account": 'a"b\\c\nd'}) == '{account="a\\"b\\\\c\\nd"}'
+
+
+def test_write_textfile_replaces_atomically(tmp_path: Path):
+    output = tmp_path / "textfile" / "presence_auth.prom"
+    write_textfile(output, "first\n")
+    write_textfile(output, "second\n")
+
+    assert output.read_text(encoding="utf-8") == "second\n"
+    assert [path.name for path in output.parent.iterdir()] == ["presence_auth.prom"]
+
+
+def _record(history_file: Path, platform: str, duration: float, outcome: str = refresh_history.OUTCOME_SUCCESS):
+    refresh_history.record_attempt(history_file, refresh_history.RefreshAttempt(
+        platform=platform, account="a@gmail.com", mode="cli", started_at=NOW.timestamp(), duration_seconds=duration,
+        phases={}, outcome=outcome))
+
+
+def test_refresh_duration_histogram_is_built_from_the_history(tmp_path: Path, write_creds):
+    creds = write_creds({"a@gmail.com": {}})
+    history_file = tmp_path / refresh_history.HISTORY_FILE_NAME
+    for duration in (4, 5, 12.5, 400):
+        _record(history_file, "youtube", duration)
+    _record(history_file, "youtube", 120, refresh_history.OUTCOME_TIMEOUT)
+
+    content = collect_metrics({"youtube": creds}, None, now=NOW, history_files=[history_file])
+
+    assert "# TYPE presence_auth_refresh_duration_seconds histogram" in content
+    success = 'platform="youtube",outcome="success"'
+    assert f'presence_auth_refresh_duration_seconds_bucket{{{success},le="5"}} 2' in content
+    assert f'presence_auth_refresh_duration_seconds_bucket{{{success},le="15"}} 3' in content
+    assert f'presence_auth_refresh_duration_seconds_bucket{{{success},le="300"}} 3' in content
+    assert f'presence_auth_refresh_duration_seconds_bucket{{{success},le="+Inf"}} 4' in content
+    assert f"presence_auth_refresh_duration_seconds_sum{{{success}}} 421.5" in content
+    assert f"presence_auth_refresh_duration_seconds_count{{{success}}} 4" in content
+    timeout = 'platform="youtube",outcome="timeout"'
+    assert f'presence_auth_refresh_duration_seconds_bucket{{{timeout},le="90"}} 0' in content
+    assert f'presence_auth_refresh_duration_seconds_bucket{{{timeout},le="120"}} 1' in content
+
+    # New attempts only add to the series, whatever happens to the credentials entries.
+    _record(history_file, "youtube", 3)
+    content = collect_metrics({"youtube": creds}, None, now=NOW, history_files=[history_file])
+    assert f"presence_auth_refresh_duration_seconds_count{{{success}}} 5" in content
+
+
+def test_missing_history_file_exports_an_empty_histogram(tmp_path: Path, write_creds):
+    content = collect_metrics({"youtube": write_creds({})}, None, now=NOW,
+                              history_files=[tmp_path / "missing.db"])
+
+    assert "# TYPE presence_auth_refresh_duration_seconds histogram" in content
+    assert not sample_lines(content, "refresh_duration_seconds")
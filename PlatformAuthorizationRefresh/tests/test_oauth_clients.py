@@ -0,0 +1,103 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from platform_authorization_refresh.oauth_clients import (DEFAULT_CLIENT_NAME, OAuthClient, OAuthClientPool,
+                                                          RateBudget, budget_state_path, load_pool)
+
+ACCOUNTS = [f"account{i}@gmail.com" for i in range(400)]
+
+
+def pool_of(*names: str) -> OAuthClientPool:
+    return OAuthClientPool({"youtube": [OAuthClient(name, f"id-{name}", "secret") for name in names]})
+
+
+def test_assignment_is_deterministic_and_case_insensitive():
+    pool = pool_of("a", "b", "c")
+
+    assert pool.assign("youtube", "Someone@Gmail.com") == pool.assign("youtube", "someone@gmail.com")
+    assert {pool.assign("youtube", account).name for account in ACCOUNTS} == {"a", "b", "c"}
+
+
+def test_adding_a_registration_only_moves_accounts_to_it():
+    before = {account: pool_of("a", "b", "c").assign("youtube", account).name for account in ACCOUNTS}
+    after = {account: pool_of("a", "b", "c", "d").assign("youtube", account).name for account in ACCOUNTS}
+
+    moved = [account for account in ACCOUNTS if before[account] != after[account]]
+    assert moved and all(after[account] == "d" for account in moved)
+    assert len(moved) < len(ACCOUNTS) / 2
+
+
+def test_stored_assignment_wins_while_configured():
+    pool = pool_of("a", "b")
+    hashed = pool.assign("youtube", "x@gmail.com").name
+    other = "a" if hashed == "b" else "b"
+
+    assert pool.assign("youtube", "x@gmail.com", stored_name=other).name == other
+    assert pool.assign("youtube", "x@gmail.com", stored_name="removed").name == hashed
+    with pytest.raises(ValueError):
+        pool.assign("instagram", "x@gmail.com")
+
+
+def test_resolve_reads_the_stored_assignment(write_creds):
+    creds = write_creds({"X@gmail.com": {"oauthClient": "b"}, "legacy@gmail.com": {}})
+    pool = pool_of("a", "b", DEFAULT_CLIENT_NAME)
+
+    assert pool.resolve("youtube", "x@gmail.com", str(creds)).name == "b"
+    assert pool.resolve("youtube", "legacy@gmail.com", str(creds)).name == DEFAULT_CLIENT_NAME
+
+
+def test_load_pool_reads_tiktok_client_keys_and_keeps_defaults(tmp_path: Path):
+    config_file = tmp_path / "oauth_clients.json"
+    config_file.write_text(json.dumps({"TikTok": [
+        {"name": "tt-1", "client_key": "key", "client_secret": "secret", "requests_per_minute": 30},
+    ]}), encoding="utf-8")
+
+    pool = load_pool(config_file)
+
+    assert pool.clients["tiktok"] == [OAuthClient("tt-1", "key", "secret", 30)]
+    assert [client.name for client in pool.clients["youtube"]] == [DEFAULT_CLIENT_NAME]
+    assert pool.budgets[("tiktok", "tt-1")].state_file == budget_state_path(config_file)
+
+
+def test_duplicate_names_are_rejected():
+    with pytest.raises(ValueError, match="Duplicate"):
+        pool_of("a", "a")
+
+
+def test_in_process_budget_limits_bursts():
+    budget = RateBudget(requests_per_minute=2)
+
+    assert budget.try_acquire() == 0
+    assert budget.try_acquire() == 0
+    assert 29 < budget.try_acquire() <= 30
+
+
+def test_shared_budget_is_spent_across_pools(tmp_path: Path):
+    state_file = tmp_path / "oauth_clients.json.budget.json"
+    first = RateBudget(requests_per_minute=2, state_file=state_file, key="youtube/a")
+    second = RateBudget(requests_per_minute=2, state_file=state_file, key="youtube/a")
+    other_client = RateBudget(requests_per_minute=2, state_file=state_file, key="youtube/b")
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0
+    assert second.try_acquire() > 0
+    assert other_client.try_acquire() == 0
+
+
+def test_shared_budget_holds_across_processes(tmp_path: Path):
+    """Each one-shot CLI refresh is a new process; the budget must still limit them together."""
+    state_file = tmp_path / "budget.json"
+    script = ("import sys; from pathlib import Path; "
+              "from platform_authorization_refresh.oauth_clients import RateBudget; "
+              "print(RateBudget(3, Path(sys.argv[1]), 'tiktok/a').try_acquire() == 0)")
+    package_dir = Path(__file__).resolve().parent.parent
+    granted = [subprocess.run([sys.executable, "-c", script, str(state_file)], cwd=package_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+               for _ in range(5)]
+
+    assert granted == ["True", "True", "True", "False", "False"]
@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from platform_authorization_refresh import planner, work_queue
+
+START = 1_767_225_600.0  # 2026-01-01T00:00:00Z
+HOUR = 3600.0
+
+
+def _random_expiry(count: int, seed: int) -> planner.ExpiryArrays:
+    rng = np.random.default_rng(seed)
+    access = START + rng.uniform(-HOUR, 72 * HOUR, count)
+    refresh = START + rng.uniform(-HOUR, 200 * HOUR, count)
+    refresh[rng.random(count) < 0.1] = np.nan
+    return planner.ExpiryArrays(platform=rng.integers(0, len(planner.PLATFORMS), count).astype(np.int8),
+                                account=np.array([f"account{i}" for i in range(count)], dtype=object),
+                                access_expires=access, refresh_expires=refresh, pending=rng.random(count) < 0.05)
+
+
+@pytest.mark.parametrize("operator_per_hour, budgets", [
+    (30, {"youtube": 50, "tiktok": 20}),
+    (5, {"youtube": None, "tiktok": 3}),
+    (100, {"youtube": None, "tiktok": None}),
+])
+def test_build_plan_respects_budgets_and_deadline_order(operator_per_hour, budgets):
+    expiry = _random_expiry(2000, seed=operator_per_hour)
+    horizon = 48 * HOUR
+
+    plan = planner.build_plan(expiry, START, horizon, HOUR, operator_per_hour, budgets)
+
+    consent = expiry.pending | (expiry.refresh_expires <= START + horizon)
+    headless = ~consent & (expiry.access_expires <= START + horizon)
+    # Every due account is planned exactly once, with the right kind.
+    assert sorted(plan.account[plan.kind]) == sorted(expiry.account[consent])
+    assert sorted(plan.account[~plan.kind]) == sorted(expiry.account[headless])
+    assert (plan.deadline >= START).all()
+
+    waves = int(plan.wave.max()) + 1
+    consent_per_wave = np.bincount(plan.wave[plan.kind], minlength=waves)
+    assert consent_per_wave.max() <= operator_per_hour
+    for code, platform in enumerate(planner.PLATFORMS):
+        mine = plan.platform == code
+        if budgets[platform] is not None:
+            assert np.bincount(plan.wave[mine], minlength=waves).max() <= budgets[platform]
+        # Earliest deadline first within each platform and kind.
+        for kind in (True, False):
+            jobs = mine & (plan.kind == kind)
+            order = np.argsort(plan.deadline[jobs], kind="stable")
+            assert (np.diff(plan.wave[jobs][order]) >= 0).all()
+    # Jobs are listed by (wave, deadline).
+    assert (np.diff(plan.wave) >= 0).all()
+
+
+def test_unlimited_headless_refreshes_all_run_in_the_first_wave():
+    expiry = planner.ExpiryArrays(platform=np.zeros(3, dtype=np.int8), account=np.array(["a", "b", "c"], dtype=object),
+                                  access_expires=np.array([START + HOUR, START + 2 * HOUR, START + 500 * HOUR]),
+                                  refresh_expires=np.full(3, np.nan), pending=np.zeros(3, dtype=bool))
+
+    plan = planner.build_plan(expiry, START, 24 * HOUR, HOUR, 30, {"youtube": None, "tiktok": None})
+
+    assert plan.account.tolist() == ["a", "b"]
+    assert plan.wave.tolist() == [0, 0] and not plan.kind.any() and not plan.late.any()
+
+
+def test_late_jobs_are_reported():
+    expiry = planner.ExpiryArrays(platform=np.zeros(3, dtype=np.int8), account=np.array(["a", "b", "c"], dtype=object),
+                                  access_expires=np.full(3, np.nan), refresh_expires=np.full(3, START + 30 * 60),
+                                  pending=np.zeros(3, dtype=bool))
+
+    plan = planner.build_plan(expiry, START, 24 * HOUR, HOUR, 1, {"youtube": None, "tiktok": None})
+
+    assert plan.wave.tolist() == [0, 1, 2]
+    assert plan.late.tolist() == [False, True, True]
+
+
+def test_parse_timestamps_handles_mixed_and_missing_values():
+    fast = planner.parse_timestamps(["2026-01-01T00:00:00.500000Z", None])
+    slow = planner.parse_timestamps(["2026-01-01T01:00:00+00:00", "garbage", ""])
+
+    assert fast[0] == START + 0.5 and np.isnan(fast[1])
+    assert slow[0] == START + HOUR and np.isnan(slow[1:]).all()
+
+
+def test_written_plan_feeds_the_work_queue(tmp_path: Path, write_creds):
+    youtube = write_creds({
+        "Consent@example.com": {"refreshTokenExpiresOn": "2026-01-01T02:00:00Z"},
+        "headless@example.com": {"accessTokenExpiresOn": "2026-01-01T03:00:00Z",
+                                 "refreshTokenExpiresOn": "2027-01-01T00:00:00Z"},
+        "idle@example.com": {"accessTokenExpiresOn": "2027-01-01T00:00:00Z"},
+    })
+    expiry = planner.load_expiry_arrays({"youtube": youtube}, None)
+    plan = planner.build_plan(expiry, START, 24 * HOUR, HOUR, 30, {"youtube": None, "tiktok": None})
+    output = tmp_path / "plan.json"
+
+    planner.write_plan(plan, output)
+
+    jobs = json.loads(output.read_text(encoding="utf-8"))["jobs"]
+    assert [(job["account"], job["kind"]) for job in jobs] == \
+        [("Consent@example.com", planner.KIND_CONSENT), ("headless@example.com", planner.KIND_HEADLESS)]
+    # Only consent flows are queued.
+    assert list(work_queue.jobs_from_plan(output)) == [("youtube", "Consent@example.com")]
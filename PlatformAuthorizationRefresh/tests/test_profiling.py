@@ -0,0 +1,42 @@
+import pstats
+import threading
+import time
+from pathlib import Path
+
+from platform_authorization_refresh import profiling, refresh_history
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profiler_writes_pstats_and_phase_tagged_collapsed_stacks(tmp_path: Path):
+    profiler = profiling.RunProfiler(tmp_path / "out" / "refresh_profile", interval=0.002)
+    profiler.start()
+    timer = refresh_history.PhaseTimer(listener=profiler.set_phase)
+    with timer.phase("authorize"):
+        _busy(0.1)
+    worker = threading.Thread(target=_busy, args=(0.1,), name="token worker")
+    worker.start()
+    worker.join()
+    pstats_path, collapsed_path = profiler.stop()
+
+    assert pstats_path == tmp_path / "out" / "refresh_profile.pstats"
+    assert any(function[2] == "_busy" for function in pstats.Stats(str(pstats_path)).stats)
+
+    lines = collapsed_path.read_text(encoding="utf-8").splitlines()
+    stacks = [line.rsplit(" ", 1) for line in lines]
+    assert all(count.isdigit() and " " not in stack for stack, count in stacks)
+    phases = {stack.split(";")[0] for stack, _ in stacks}
+    assert {"authorize", profiling.IDLE_PHASE} <= phases
+    assert any(stack.startswith(f"{profiling.IDLE_PHASE};token_worker;") and "_busy(" in stack
+               for stack, _ in stacks)
+    assert not any("profiler-sampler" in stack for stack, _ in stacks)
+
+
+def test_profile_output_base_is_timestamped(tmp_path: Path):
+    base = profiling.profile_output_base(tmp_path, "gui_profile")
+
+    assert base.parent == tmp_path and base.name.startswith("gui_profile_") and len(base.name) == 27
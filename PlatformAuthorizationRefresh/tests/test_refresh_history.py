@@ -0,0 +1,148 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from platform_authorization_refresh import refresh_history
+from platform_authorization_refresh.refresh_history import (OUTCOME_FAILURE, OUTCOME_SUCCESS, OUTCOME_TIMEOUT,
+                                                            PhaseTimer, RefreshAttempt, classify_outcome,
+                                                            compute_stats, connect_read_only, iter_attempts,
+                                                            percentile, record_attempt)
+
+
+def attempt(started_at: float, outcome: str = OUTCOME_SUCCESS, duration: float = 10.0, account: str = "A@x",
+            platform: str = "youtube", error_class=None) -> RefreshAttempt:
+    return RefreshAttempt(platform=platform, account=account, mode="refresh", started_at=started_at,
+                          duration_seconds=duration, phases={"authorize": duration}, outcome=outcome,
+                          error_class=error_class)
+
+
+def test_attempts_round_trip_in_time_range(tmp_path: Path):
+    history_file = tmp_path / "RefreshHistory.db"
+    for started_at in (300.0, 100.0, 200.0):
+        record_attempt(history_file, attempt(started_at, platform="youtube"))
+    record_attempt(history_file, attempt(150.0, platform="tiktok"))
+
+    assert [a.started_at for a in iter_attempts(history_file)] == [100.0, 150.0, 200.0, 300.0]
+    selected = list(iter_attempts(history_file, since=100.0, until=300.0, platform="YouTube"))
+    assert [a.started_at for a in selected] == [100.0, 200.0]
+    assert selected[0].account == "a@x"
+    assert selected[0].phases == {"authorize": 10.0}
+
+
+def test_iter_attempts_does_not_create_a_missing_database(tmp_path: Path):
+    history_file = tmp_path / "RefreshHistory.db"
+
+    with pytest.raises(FileNotFoundError, match="History file not found"):
+        iter_attempts(history_file)
+    assert not history_file.exists()
+
+
+def test_history_is_opened_read_only(tmp_path: Path):
+    history_file = tmp_path / "RefreshHistory.db"
+    record_attempt(history_file, attempt(100.0))
+    before = history_file.read_bytes()
+
+    connection = connect_read_only(history_file)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            connection.execute("DELETE FROM refresh_attempts")
+    finally:
+        connection.close()
+    assert len(list(iter_attempts(history_file))) == 1
+    assert history_file.read_bytes() == before
+
+
+def test_latency_percentiles_only_count_successful_attempts():
+    attempts = [attempt(float(i), duration=float(i + 1)) for i in range(10)]
+    attempts += [attempt(20.0, OUTCOME_TIMEOUT, duration=120.0, error_class="TimeoutError"),
+                 attempt(21.0, OUTCOME_FAILURE, duration=3.0, error_class="RuntimeError")]
+
+    stats = compute_stats(iter(attempts)).platforms["youtube"]
+
+    assert (stats.attempts, stats.successes, stats.failures, stats.timeouts) == (12, 10, 1, 1)
+    assert stats.durations == [float(i + 1) for i in range(10)]
+    assert percentile(stats.durations, 99) == 10.0
+    assert stats.error_classes == {"TimeoutError": 1, "RuntimeError": 1}
+
+
+def test_failure_streaks_reset_on_success():
+    attempts = [attempt(1.0, OUTCOME_FAILURE), attempt(2.0, OUTCOME_SUCCESS), attempt(3.0, OUTCOME_TIMEOUT),
+                attempt(4.0, OUTCOME_FAILURE), attempt(5.0, OUTCOME_FAILURE, account="b@x")]
+
+    streaks = compute_stats(iter(attempts)).failure_streaks
+
+    assert streaks == {("youtube", "A@x"): 2, ("youtube", "b@x"): 1}
+
+
+def test_percentile_is_nearest_rank():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 50) == 2.0
+    assert percentile(values, 95) == 4.0
+    assert percentile(values, 1) == 1.0
+    assert percentile([], 50) is None
+
+
+def test_classify_outcome():
+    assert classify_outcome(None) == (OUTCOME_SUCCESS, None)
+    assert classify_outcome(TimeoutError("late")) == (OUTCOME_TIMEOUT, "TimeoutError")
+    assert classify_outcome(KeyError("missing")) == (OUTCOME_FAILURE, "KeyError")
+
+
+def test_phase_timer_notifies_enclosing_phase():
+    events = []
+    timer = PhaseTimer(listener=events.append)
+    with timer.phase("authorize"):
+        with timer.phase("persist"):
+            pass
+
+    assert events == ["authorize", "persist", "authorize", None]
+    assert set(timer.phases) == {"authorize", "persist"}
+
+
+def test_stats_reports_missing_history_file(tmp_path: Path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        refresh_history.main(["--history_file", str(tmp_path / "missing.db")])
+
+    assert exit_info.value.code == 1
+    assert "History file not found" in capsys.readouterr().out
+
+
+def test_stats_prints_failure_and_timeout_counts(tmp_path: Path, capsys):
+    history_file = tmp_path / "RefreshHistory.db"
+    record_attempt(history_file, attempt(1.0, duration=12.0))
+    record_attempt(history_file, attempt(2.0, OUTCOME_TIMEOUT, duration=120.0, error_class="TimeoutError"))
+
+    refresh_history.main(["--history_file", str(history_file)])
+
+    out = capsys.readouterr().out
+    assert "(0 failed, 1 timed out)" in out
+    assert "p50/p95/p99: 12.0s / 12.0s / 12.0s" in out
+
+
+def test_iter_attempts_opens_the_database_only_while_iterating(tmp_path: Path, monkeypatch):
+    history_file = tmp_path / "RefreshHistory.db"
+    record_attempt(history_file, attempt(100.0))
+    opened = []
+
+    def tracking_connect(path: Path) -> sqlite3.Connection:
+        opened.append(connect_read_only(path))
+        return opened[-1]
+
+    monkeypatch.setattr(refresh_history, "connect_read_only", tracking_connect)
+    attempts = iter_attempts(history_file)
+    assert opened == []
+
+    assert len(list(attempts)) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
+
+
+def test_stats_defaults_to_the_history_next_to_the_credentials_file(tmp_path: Path, capsys):
+    record_attempt(tmp_path / refresh_history.HISTORY_FILE_NAME, attempt(100.0))
+
+    refresh_history.main(["--creds_file_path", str(tmp_path / "youtube.json")])
+
+    assert "youtube:" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        refresh_history.main([])
@@ -0,0 +1,142 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from platform_authorization_refresh import change_feed, sync
+from platform_authorization_refresh.auth_manager import update_credentials_json
+
+PLATFORM = "youtube"
+
+
+@pytest.fixture
+def hosts(tmp_path: Path) -> Dict[str, str]:
+    """Two hosts, each with its own (empty) credentials file."""
+    files = {}
+    for host in ("host-a", "host-b"):
+        path = tmp_path / host / "credentials.json"
+        path.parent.mkdir()
+        path.write_text("{}", encoding="utf-8")
+        files[host] = str(path)
+    return files
+
+
+def _write(creds_file: str, account: str, token: str) -> None:
+    update_credentials_json(account, creds_file, {"access_token": token, "refresh_token": f"refresh-{token}"},
+                            add_new_account=True, platform=PLATFORM)
+
+
+def _load(creds_file: str) -> Dict[str, Any]:
+    with open(creds_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _outbox(shared: Path, host: str):
+    return sorted(path.name for path in (shared / PLATFORM / "outbox" / host).glob("*.json"))
+
+
+def test_push_pull_replicates_changes_and_does_not_echo(hosts, tmp_path: Path):
+    shared = tmp_path / "shared"
+    _write(hosts["host-a"], "alice@example.com", "a1")
+    _write(hosts["host-a"], "bob@example.com", "b1")
+
+    assert sync.push(hosts["host-a"], PLATFORM, shared, "host-a") == 2
+    assert sync.pull(hosts["host-b"], PLATFORM, shared, "host-b") == 2
+    assert _load(hosts["host-b"]) == _load(hosts["host-a"])
+    assert {change.action for change in change_feed.changes_since(hosts["host-b"])} == {sync.ACTION_REPLICATED}
+
+    # Only the entry changed since the previous push travels.
+    _write(hosts["host-a"], "alice@example.com", "a2")
+    assert sync.push(hosts["host-a"], PLATFORM, shared, "host-a") == 1
+    assert sync.pull(hosts["host-b"], PLATFORM, shared, "host-b") == 1
+    assert _load(hosts["host-b"])["alice@example.com"]["accessToken"] == "a2"
+
+    # Replicated entries are not pushed back, and pulling again applies nothing.
+    assert sync.push(hosts["host-b"], PLATFORM, shared, "host-b") == 0
+    assert _outbox(shared, "host-b") == []
+    assert sync.pull(hosts["host-b"], PLATFORM, shared, "host-b") == 0
+
+
+def test_acknowledged_batches_are_pruned(hosts, tmp_path: Path):
+    shared = tmp_path / "shared"
+    _write(hosts["host-a"], "alice@example.com", "a1")
+    sync.push(hosts["host-a"], PLATFORM, shared, "host-a")
+    _write(hosts["host-a"], "alice@example.com", "a2")
+    sync.push(hosts["host-a"], PLATFORM, shared, "host-a")
+    assert _outbox(shared, "host-a") == ["000000000001.json", "000000000002.json"]
+
+    sync.pull(hosts["host-b"], PLATFORM, shared, "host-b")
+    assert json.loads((shared / PLATFORM / "acks" / "host-b.json").read_text(encoding="utf-8")) == {"host-a": 2}
+
+    # The next push (even with nothing new) deletes what every peer has applied.
+    assert sync.push(hosts["host-a"], PLATFORM, shared, "host-a") == 0
+    assert _outbox(shared, "host-a") == []
+
+
+def test_conflicts_resolve_to_the_higher_version_on_both_hosts(hosts, tmp_path: Path):
+    shared = tmp_path / "shared"
+    _write(hosts["host-a"], "Bob@example.com", "a1")
+    _write(hosts["host-b"], "bob@example.com", "b1")
+    _write(hosts["host-b"], "bob@example.com", "b2")
+
+    sync.push(hosts["host-a"], PLATFORM, shared, "host-a")
+    sync.push(hosts["host-b"], PLATFORM, shared, "host-b")
+    assert sync.pull(hosts["host-a"], PLATFORM, shared, "host-a") == 1
+    assert sync.pull(hosts["host-b"], PLATFORM, shared, "host-b") == 0
+
+    # host-a keeps its own key casing but takes host-b's newer entry.
+    assert _load(hosts["host-a"]) == {"Bob@example.com": _load(hosts["host-b"])["bob@example.com"]}
+    assert _load(hosts["host-a"])["Bob@example.com"]["accessToken"] == "b2"
+
+
+def test_full_push_seeds_a_new_host(hosts, tmp_path: Path):
+    shared = tmp_path / "shared"
+    _write(hosts["host-a"], "alice@example.com", "a1")
+    sync.push(hosts["host-a"], PLATFORM, shared, "host-a")
+    sync.pull(hosts["host-b"], PLATFORM, shared, "host-b")
+    sync.push(hosts["host-a"], PLATFORM, shared, "host-a")  # prunes batch 1
+
+    new_host = tmp_path / "host-c" / "credentials.json"
+    assert sync.pull(str(new_host), PLATFORM, shared, "host-c") == 0
+    assert sync.push(hosts["host-a"], PLATFORM, shared, "host-a", full=True) == 1
+    assert sync.pull(str(new_host), PLATFORM, shared, "host-c") == 1
+    assert _load(str(new_host)) == _load(hosts["host-a"])
+
+
+def test_merge_entries_breaks_version_ties_on_updated_on():
+    data = {"A": {"version": 2, "updatedOn": "2026-01-01T00:00:00Z", "accessToken": "old"}}
+    changed = sync.merge_entries(data, {
+        "a": {"version": 2, "updatedOn": "2026-01-02T00:00:00Z", "accessToken": "new"},
+        "b": {"accessToken": "added"},
+    })
+
+    assert changed == ["A", "b"]
+    assert data["A"]["accessToken"] == "new"
+    assert sync.merge_entries(data, {"a": {"version": 1, "accessToken": "stale"}}) == []
+
+
+def test_pull_does_not_lose_a_concurrent_local_update(hosts, tmp_path: Path, monkeypatch):
+    shared = tmp_path / "shared"
+    _write(hosts["host-a"], "alice@example.com", "a1")
+    sync.push(hosts["host-a"], PLATFORM, shared, "host-a")
+    local_update = threading.Thread(target=_write, args=(hosts["host-b"], "bob@example.com", "b1"))
+    merge_entries = sync.merge_entries
+
+    def merge_during_local_update(data, incoming):
+        # The local refresh starts after pull has read the file and must wait for its write.
+        local_update.start()
+        local_update.join(timeout=0.2)
+        assert local_update.is_alive()
+        return merge_entries(data, incoming)
+
+    monkeypatch.setattr(sync, "merge_entries", merge_during_local_update)
+    assert sync.pull(hosts["host-b"], PLATFORM, shared, "host-b") == 1
+    local_update.join()
+
+    data = _load(hosts["host-b"])
+    assert data["alice@example.com"]["accessToken"] == "a1"
+    assert data["bob@example.com"]["accessToken"] == "b1"
+    assert [change.account for change in change_feed.changes_since(hosts["host-b"])] == \
+        ["alice@example.com", "bob@example.com"]
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from platform_authorization_refresh import async_refresh, auth_manager, oauth_clients
+from platform_authorization_refresh.work_queue import (STATUS_DONE, STATUS_FAILED, STATUS_LEASED, STATUS_PENDING,
+                                                       SqliteWorkQueueStore, jobs_from_plan, run_worker)
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> SqliteWorkQueueStore:
+    return SqliteWorkQueueStore(tmp_path / "queue.db")
+
+
+def test_enqueue_skips_accounts_with_an_open_job(store: SqliteWorkQueueStore):
+    assert store.enqueue([("youtube", "A@x"), ("youtube", "a@x"), ("tiktok", "a@x")]) == 2
+    assert store.enqueue([("YouTube", "a@x")]) == 0
+    assert store.counts() == {STATUS_PENDING: 2}
+
+
+def test_done_job_can_be_queued_again(store: SqliteWorkQueueStore):
+    store.enqueue([("youtube", "a@x")])
+    assert store.complete(store.claim("w1", 60, 3))
+
+    assert store.enqueue([("youtube", "a@x")]) == 1
+
+
+def test_claim_leases_oldest_job_once(store: SqliteWorkQueueStore):
+    store.enqueue([("youtube", "first@x")])
+    store.enqueue([("youtube", "second@x")])
+
+    first = store.claim("w1", 60, 3)
+    second = store.claim("w2", 60, 3)
+
+    assert (first.account, second.account) == ("first@x", "second@x")
+    assert store.claim("w3", 60, 3) is None
+    assert store.counts() == {STATUS_LEASED: 2}
+
+
+def test_expired_lease_is_requeued_and_stale_holder_cannot_complete(store: SqliteWorkQueueStore):
+    store.enqueue([("youtube", "a@x")])
+    stale = store.claim("w1", 0.05, 3)
+    time.sleep(0.1)
+
+    fresh = store.claim("w2", 60, 3)
+
+    assert fresh is not None and fresh.job_id == stale.job_id and fresh.attempts == 2
+    assert not store.heartbeat(stale, 60)
+    assert not store.complete(stale)
+    assert store.complete(fresh)
+    assert store.counts() == {STATUS_DONE: 1}
+
+
+def test_fail_requeues_until_max_attempts(store: SqliteWorkQueueStore):
+    store.enqueue([("youtube", "a@x")])
+    assert store.fail(store.claim("w1", 60, 3), "RuntimeError: boom", max_attempts=2)
+    assert store.counts() == {STATUS_PENDING: 1}
+
+    assert store.fail(store.claim("w1", 60, 3), "RuntimeError: boom", max_attempts=2)
+    assert store.counts() == {STATUS_FAILED: 1}
+    assert store.claim("w1", 60, 3) is None
+
+
+def test_concurrent_workers_never_claim_the_same_job(store: SqliteWorkQueueStore):
+    store.enqueue([("youtube", f"acc{i}@x") for i in range(40)])
+    claimed: List[int] = []
+    lock = threading.Lock()
+
+    def work(worker_id: str) -> None:
+        while True:
+            job = store.claim(worker_id, 60, 3)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job.job_id)
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(set(claimed)) and len(claimed) == 40
+
+
+def test_jobs_from_plan_returns_started_consent_waves(tmp_path: Path):
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(json.dumps({"jobs": [
+        {"wave": 0, "startsOn": "2025-04-20T00:00:00Z", "platform": "youtube", "account": "a@x", "kind": "consent"},
+        {"wave": 0, "startsOn": "2025-04-20T00:00:00Z", "platform": "youtube", "account": "h@x", "kind": "headless"},
+        {"wave": 1, "startsOn": "2999-01-01T00:00:00Z", "platform": "tiktok", "account": "b", "kind": "consent"},
+    ]}), encoding="utf-8")
+
+    assert jobs_from_plan(plan_file) == [("youtube", "a@x")]
+    assert jobs_from_plan(plan_file, all_waves=True) == [("youtube", "a@x"), ("tiktok", "b")]
+
+
+def test_worker_runs_youtube_then_tiktok_job_on_one_callback_server(tmp_path: Path, store: SqliteWorkQueueStore,
+                                                                    monkeypatch):
+    exchanged: List[str] = []
+
+    def fake_token_endpoint(url: str, data: Dict[str, str]) -> Dict[str, str]:
+        exchanged.append(url)
+        platform = "youtube" if url == async_refresh.YOUTUBE_TOKEN_URL else "tiktok"
+        return {"access_token": f"{platform}-access", "refresh_token": f"{platform}-refresh", "expires_in": 3600}
+
+    monkeypatch.setattr(async_refresh, "_post_token_request", fake_token_endpoint)
+
+    def browser(url: str) -> None:
+        # Simulates the platform redirecting the user's browser back to the callback URL.
+        state = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))["state"]
+        callback = f"http://127.0.0.1:{server.server.port}/callback?code=abc&state={state}"
+        threading.Thread(target=lambda: urllib.request.urlopen(callback).read(), daemon=True).start()
+
+    creds_files = {"youtube": tmp_path / "youtube.json", "tiktok": tmp_path / "tiktok.json"}
+    for path in creds_files.values():
+        path.write_text(json.dumps({"a@x": {"accessToken": "old", "refreshToken": "old"}}), encoding="utf-8")
+    store.enqueue([("youtube", "a@x")])
+    store.enqueue([("tiktok", "a@x")])
+
+    with async_refresh.BlockingCallbackServer(port=0, open_url=browser) as server:
+        completed = run_worker(store, creds_files, "w1", lease_seconds=60, timeout=10, chrome_path=None,
+                               max_attempts=1, idle_exit=True, poll_interval=0, history_file=tmp_path / "h.db",
+                               pool=oauth_clients.default_pool(), callback_server=server)
+
+    assert completed == 2
+    assert store.counts() == {STATUS_DONE: 2}
+    assert exchanged == [async_refresh.YOUTUBE_TOKEN_URL, async_refresh.TIKTOK_TOKEN_URL]
+    for platform, path in creds_files.items():
+        assert json.loads(path.read_text(encoding="utf-8"))["a@x"]["accessToken"] == f"{platform}-access"
+
+
+def test_repeatedly_expired_lease_fails_the_job_at_max_attempts(store: SqliteWorkQueueStore):
+    store.enqueue([("youtube", "a@x")])
+    for attempt in (1, 2):
+        job = store.claim(f"crashed-{attempt}", 0.01, 2)
+        assert job is not None and job.attempts == attempt
+        time.sleep(0.05)
+
+    assert store.claim("w3", 60, 2) is None
+    assert store.counts() == {STATUS_FAILED: 1}
+    with sqlite3.connect(str(store.queue_file)) as connection:
+        last_error, completed_at = connection.execute("SELECT last_error, completed_at FROM refresh_jobs").fetchone()
+    assert last_error == "Lease expired: worker crashed-2 stopped responding" and completed_at is not None
+
+
+def test_credentials_write_waits_for_the_shared_credentials_lock(write_creds):
+    # Workers no longer hold a queue-private lock: the writer takes the one every writer shares.
+    creds_file = write_creds({"a@x": {"accessToken": "old", "refreshToken": "old"}})
+    done = threading.Event()
+
+    def update() -> None:
+        auth_manager.update_credentials_json("a@x", str(creds_file), {"access_token": "new", "refresh_token": "new"})
+        done.set()
+
+    with auth_manager.credentials_lock(str(creds_file)):
+        thread = threading.Thread(target=update)
+        thread.start()
+        assert not done.wait(0.2)
+        # Written by another process holding the lock (e.g. a sync pull); must survive the update.
+        creds_file.write_text(json.dumps({"a@x": {}, "b@x": {"accessToken": "b"}}), encoding="utf-8")
+    thread.join()
+
+    data = json.loads(creds_file.read_text(encoding="utf-8"))
+    assert data["a@x"]["accessToken"] == "new" and data["b@x"] == {"accessToken": "b"}